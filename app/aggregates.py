@@ -0,0 +1,48 @@
+# app/aggregates.py
+# Upsert "additivo" per le tabelle aggregate: INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+from sqlalchemy.orm import Session
+
+
+def _dialect_insert(db: Session):
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Upsert non supportato per {name}")
+    return insert
+
+
+def increment_rows(db: Session, model, key_cols: Sequence[str], rows: List[Dict]) -> None:
+    # righe con la stessa chiave vengono sommate prima dell'upsert
+    if not rows:
+        return
+
+    merged: Dict[tuple, Dict] = {}
+    for row in rows:
+        key = tuple(row[k] for k in key_cols)
+        acc = merged.get(key)
+        if acc is None:
+            merged[key] = dict(row)
+        else:
+            for col, value in row.items():
+                if col not in key_cols:
+                    acc[col] = acc.get(col, 0) + value
+
+    table = model.__table__
+    value_cols = sorted({c for row in merged.values() for c in row} - set(key_cols))
+    # tutte le righe con le stesse colonne (executemany)
+    params = [{c: row.get(c, 0) for c in (*key_cols, *value_cols)} for row in merged.values()]
+
+    insert = _dialect_insert(db)
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[k] for k in key_cols],
+        set_={c: table.c[c] + stmt.excluded[c] for c in value_cols},
+    )
+    db.execute(stmt, params)
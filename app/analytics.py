@@ -0,0 +1,180 @@
+# app/analytics.py
+# Frequenze di occorrenza eventi per squadra (over/under, goal/no goal, gol 1T,
+# gol per fascia di minuti, cartellini...). Tutto vettoriale su DataFrame
+# colonnari: nessun loop Python per partita.
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from .models import Card, Goal, LiveMatch, Match
+
+GOAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5)
+CARD_LINES = (2.5, 3.5, 4.5, 5.5)
+FIRST_HALF_LINES = (0.5, 1.5)
+
+MINUTE_BINS = (0, 15, 30, 45, 60, 75, 90)
+MINUTE_LABELS = ("0-15", "16-30", "31-45", "46-60", "61-75", "76-90")
+
+
+# ---------------- Caricamento colonnare ----------------
+def load_frames(
+    bind: Engine | Connection,
+    season_id: Optional[int] = None,
+    matchdays: Optional[Sequence[int]] = None,
+) -> Dict[str, pd.DataFrame]:
+    matches_q = select(
+        Match.id.label("match_id"), Match.season_id, Match.matchday, Match.kickoff,
+        Match.home_team_id, Match.away_team_id, Match.home_team_name, Match.away_team_name,
+        Match.home_score, Match.away_score,
+    ).where(Match.id.not_in(LiveMatch.open_match_ids()))  # niente 0-0 provvisori delle partite live
+    goals_q = select(
+        Goal.match_id, Goal.team_id, Goal.minute, Goal.period, Goal.goal_type,
+    ).join(Match, Goal.match_id == Match.id)
+    cards_q = select(
+        Card.match_id, Card.team_id, Card.minute, Card.period, Card.card_type,
+    ).join(Match, Card.match_id == Match.id)
+
+    if season_id is not None:
+        matches_q = matches_q.where(Match.season_id == season_id)
+        goals_q = goals_q.where(Match.season_id == season_id)
+        cards_q = cards_q.where(Match.season_id == season_id)
+    if matchdays is not None:
+        # solo alcune giornate (backtest): con season_id usa ix_matches_season_matchday
+        matches_q = matches_q.where(Match.matchday.in_(matchdays))
+        goals_q = goals_q.where(Match.matchday.in_(matchdays))
+        cards_q = cards_q.where(Match.matchday.in_(matchdays))
+
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return _read_frames(conn, matches_q, goals_q, cards_q)
+    return _read_frames(bind, matches_q, goals_q, cards_q)
+
+
+def _read_frames(conn: Connection, matches_q, goals_q, cards_q) -> Dict[str, pd.DataFrame]:
+    return {
+        "matches": pd.read_sql(matches_q, conn),
+        "goals": pd.read_sql(goals_q, conn),
+        "cards": pd.read_sql(cards_q, conn),
+    }
+
+
+# ---------------- Vista "squadra-partita" ----------------
+def _count_by_match_team(events: pd.DataFrame, match_ids: np.ndarray, team_ids: np.ndarray, mask=None) -> np.ndarray:
+    # conteggio eventi per coppia (match_id, team_id) allineato alle righe richieste
+    if mask is not None:
+        events = events[mask]
+    if events.empty:
+        return np.zeros(len(match_ids), dtype=np.int64)
+    counts = events.groupby(["match_id", "team_id"]).size()
+    idx = pd.MultiIndex.from_arrays([match_ids, team_ids])
+    return counts.reindex(idx, fill_value=0).to_numpy()
+
+
+def team_match_frame(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    # due righe per partita (prospettiva casa e trasferta)
+    m = frames["matches"]
+    goals, cards = frames["goals"], frames["cards"]
+    n = len(m)
+
+    match_id = np.concatenate([m["match_id"].to_numpy(), m["match_id"].to_numpy()])
+    team_id = np.concatenate([m["home_team_id"].to_numpy(), m["away_team_id"].to_numpy()])
+    opp_id = np.concatenate([m["away_team_id"].to_numpy(), m["home_team_id"].to_numpy()])
+
+    tm = pd.DataFrame({
+        "match_id": match_id,
+        "season_id": np.concatenate([m["season_id"].to_numpy()] * 2),
+        "matchday": np.concatenate([m["matchday"].to_numpy()] * 2),
+        "team_id": team_id,
+        "team_name": np.concatenate([m["home_team_name"].to_numpy(), m["away_team_name"].to_numpy()]),
+        "opponent_id": opp_id,
+        "is_home": np.repeat([True, False], n),
+        "gf": np.concatenate([m["home_score"].to_numpy(), m["away_score"].to_numpy()]),
+        "ga": np.concatenate([m["away_score"].to_numpy(), m["home_score"].to_numpy()]),
+    })
+
+    first_half = goals["period"] == "1T"
+    tm["gf_1t"] = _count_by_match_team(goals, match_id, team_id, first_half)
+    tm["ga_1t"] = _count_by_match_team(goals, match_id, opp_id, first_half)
+    tm["cards_for"] = _count_by_match_team(cards, match_id, team_id)
+    tm["cards_against"] = _count_by_match_team(cards, match_id, opp_id)
+    return tm
+
+
+def add_market_flags(tm: pd.DataFrame) -> pd.DataFrame:
+    total = (tm["gf"] + tm["ga"]).to_numpy()
+    total_1t = (tm["gf_1t"] + tm["ga_1t"]).to_numpy()
+    total_cards = (tm["cards_for"] + tm["cards_against"]).to_numpy()
+
+    flags = {
+        "win": tm["gf"] > tm["ga"],
+        "draw": tm["gf"] == tm["ga"],
+        "loss": tm["gf"] < tm["ga"],
+        "btts": (tm["gf"] > 0) & (tm["ga"] > 0),
+        "scored": tm["gf"] > 0,
+        "clean_sheet": tm["ga"] == 0,
+        "scored_1t": tm["gf_1t"] > 0,
+    }
+    for line in GOAL_LINES:
+        flags[f"over_{line}"] = total > line
+    for line in FIRST_HALF_LINES:
+        flags[f"over_1t_{line}"] = total_1t > line
+    for line in CARD_LINES:
+        flags[f"cards_over_{line}"] = total_cards > line
+
+    return tm.assign(**{k: np.asarray(v) for k, v in flags.items()})
+
+
+# ---------------- Frequenze ----------------
+MARKET_COLUMNS = (
+    ["win", "draw", "loss", "btts", "scored", "clean_sheet", "scored_1t"]
+    + [f"over_{line}" for line in GOAL_LINES]
+    + [f"over_1t_{line}" for line in FIRST_HALF_LINES]
+    + [f"cards_over_{line}" for line in CARD_LINES]
+)
+
+
+def occurrence_table(tm: pd.DataFrame, by: Sequence[str] = ("team_id", "team_name")) -> pd.DataFrame:
+    # frequenza (0..1) di ogni mercato + medie gol/cartellini per squadra
+    grouped = tm.groupby(list(by), sort=True)
+    freq = grouped[MARKET_COLUMNS].mean()
+    avgs = grouped[["gf", "ga", "gf_1t", "ga_1t", "cards_for", "cards_against"]].mean().add_prefix("avg_")
+    out = pd.concat([grouped.size().rename("played"), freq, avgs], axis=1)
+    return out.reset_index()
+
+
+def minute_bucket_table(frames: Dict[str, pd.DataFrame], tm: pd.DataFrame) -> pd.DataFrame:
+    # gol segnati per fascia di minuti, media per partita giocata
+    goals = frames["goals"]
+    played = tm.groupby("team_id").size()
+    if goals.empty:
+        return pd.DataFrame(0.0, index=played.index, columns=list(MINUTE_LABELS))
+
+    # recupero 1T (45+x) resta nella fascia 31-45
+    minute = np.where(goals["period"].to_numpy() == "1T", np.minimum(goals["minute"].to_numpy(), 45),
+                      np.maximum(goals["minute"].to_numpy(), 46))
+    bucket = pd.cut(np.minimum(minute, 90), bins=MINUTE_BINS, labels=MINUTE_LABELS, include_lowest=True)
+    counts = pd.crosstab(goals["team_id"].to_numpy(), bucket).reindex(
+        index=played.index, columns=list(MINUTE_LABELS), fill_value=0
+    )
+    counts.index.name, counts.columns.name = "team_id", None
+    return counts.div(played, axis=0)
+
+
+def compute_markets(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    tm = add_market_flags(team_match_frame(frames))
+    return {
+        "team_match": tm,
+        "overall": occurrence_table(tm),
+        "home": occurrence_table(tm[tm["is_home"]]),
+        "away": occurrence_table(tm[~tm["is_home"]]),
+        "minute_buckets": minute_bucket_table(frames, tm),
+    }
+
+
+def season_markets(bind: Engine | Connection, season_id: int) -> Dict[str, pd.DataFrame]:
+    return compute_markets(load_frames(bind, season_id))
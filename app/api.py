@@ -0,0 +1,191 @@
+# app/api.py
+# API HTTP di sola lettura (async: nessun I/O SQLite blocca l'event loop).
+#
+#   uvicorn app.api:app
+#
+# - paginazione keyset (cursor opaco) invece di OFFSET
+# - ETag = versione dati: If-None-Match uguale => 304 senza toccare l'ORM
+# - cache in-process TTL + LRU sulle risposte già serializzate, chiave = (url, versione)
+from __future__ import annotations
+
+import base64
+import json
+import threading
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .async_queries import (
+    fetch_data_version,
+    fetch_match_detail,
+    fetch_season_matches,
+    fetch_standings,
+    fetch_team_season_players,
+    match_detail_dict,
+    match_dict,
+    standing_dicts,
+)
+from .db import engine
+from .db_async import async_engine, get_async_db
+from .instrumentation import SQL_DEBUG, sql_log, track
+from .models import TeamSeason
+from .schema import ensure_schema_current
+
+CACHE_TTL_SECONDS = 30
+CACHE_MAX_ENTRIES = 2048
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ensure_schema_current(engine)
+
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    # chiude le connessioni aiosqlite (e i loro thread) allo shutdown
+    await async_engine.dispose()
+
+
+app = FastAPI(title="RetBet API", version="1.0", lifespan=lifespan)
+
+@app.middleware("http")
+async def sql_stats(request: Request, call_next):
+    # query SQL della richiesta: Server-Timing (visibile nei devtools del browser) + log in debug
+    with track(f"{request.method} {request.url.path}") as stats:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = f'db;dur={stats.total_ms:.1f};desc="{stats.count} query"'
+    if SQL_DEBUG and stats.count:
+        sql_log.info(stats.summary())
+    return response
+
+
+_cache: TTLCache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+
+
+# ---------------- Cache / ETag ----------------
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Non serializzabile: {type(value).__name__}")
+
+
+async def cached_json(request: Request, db: AsyncSession, build: Callable[[], Awaitable[Any]]) -> Response:
+    version = await fetch_data_version(db)
+    etag = f'"v{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    key = (request.url.path, str(request.query_params), version)
+    with _cache_lock:
+        body = _cache.get(key)
+    if body is None:
+        body = json.dumps(await build(), default=_json_default, separators=(",", ":")).encode()
+        with _cache_lock:
+            _cache[key] = body
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+# ---------------- Cursor keyset ----------------
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# tipi attesi nel cursor: stesse colonne del keyset, datetime viaggia come stringa ISO
+MATCHES_CURSOR = (int, datetime, int)      # (matchday, kickoff, id)
+PLAYERS_CURSOR = (str, str, int)           # (last_name, first_name, id)
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return [_cursor_value(v, t) for v, t in zip(values, types)]
+    except ValueError:   # JSONDecodeError / UnicodeDecodeError / binascii.Error compresi
+        raise HTTPException(status_code=400, detail="cursor non valido")
+
+
+def _cursor_value(value: Any, expected: type) -> Any:
+    if expected is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    # bool è un int per isinstance: un cursor con true/false non è nostro
+    if isinstance(value, expected) and not isinstance(value, bool):
+        return value
+    raise ValueError
+
+
+def _page(rows: List[Any], limit: int, key: Callable[[Any], List[Any]]) -> Dict[str, Any]:
+    # si legge limit+1 righe: se c'è la riga in più esiste la pagina successiva
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {"rows": rows, "next_cursor": encode_cursor(key(rows[-1])) if has_more and rows else None}
+
+
+# ---------------- Endpoint ----------------
+@app.get("/seasons/{season_id}/matches")
+async def season_matches(
+    season_id: int,
+    request: Request,
+    matchday: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def build():
+        after = decode_cursor(cursor, MATCHES_CURSOR) if cursor else None
+        rows = await fetch_season_matches(db, season_id, matchday, after, limit + 1)
+        page = _page(rows, limit, lambda m: [m.matchday, m.kickoff, m.id])
+        return {"items": [match_dict(m) for m in page["rows"]], "next_cursor": page["next_cursor"]}
+
+    return await cached_json(request, db, build)
+
+
+@app.get("/matches/{match_id}")
+async def match_detail(match_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        m = await fetch_match_detail(db, match_id)
+        if m is None:
+            raise HTTPException(status_code=404, detail="partita non trovata")
+        return match_detail_dict(m)
+
+    return await cached_json(request, db, build)
+
+
+@app.get("/team-seasons/{team_season_id}/players")
+async def team_season_players(
+    team_season_id: int,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def build():
+        if await db.get(TeamSeason, team_season_id) is None:
+            raise HTTPException(status_code=404, detail="team-season non trovata")
+        after = decode_cursor(cursor, PLAYERS_CURSOR) if cursor else None
+        rows = await fetch_team_season_players(db, team_season_id, after, limit + 1)
+        page = _page(rows, limit, lambda p: [p.last_name, p.first_name, p.id])
+        return {"items": [p._asdict() for p in page["rows"]], "next_cursor": page["next_cursor"]}
+
+    return await cached_json(request, db, build)
+
+
+@app.get("/seasons/{season_id}/standings")
+async def season_standings(season_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        return {"season_id": season_id, "items": standing_dicts(await fetch_standings(db, season_id))}
+
+    return await cached_json(request, db, build)
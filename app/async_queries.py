@@ -0,0 +1,152 @@
+# app/async_queries.py
+# Query di lettura per l'API. Le select sono costruite una volta sola (funzioni *_stmt)
+# e usate sia dal percorso async (fetch_*) sia da quello sincrono (benchmark, script).
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from .models import DataVersion, LiveMatch, Match, Player, Standing, Team
+from .versioning import DATA
+
+
+# ---------------- Select condivise ----------------
+def season_matches_stmt(
+    season_id: int,
+    matchday: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+) -> Select:
+    # keyset su (matchday, kickoff, id); le partite ancora live hanno un punteggio provvisorio
+    stmt = select(Match).where(Match.season_id == season_id, Match.id.not_in(LiveMatch.open_match_ids()))
+    if matchday is not None:
+        stmt = stmt.where(Match.matchday == matchday)
+    if after is not None:
+        md, kickoff, mid = after
+        if isinstance(kickoff, str):
+            kickoff = datetime.fromisoformat(kickoff)
+        stmt = stmt.where(tuple_(Match.matchday, Match.kickoff, Match.id) > tuple_(md, kickoff, mid))
+    return stmt.order_by(Match.matchday, Match.kickoff, Match.id).limit(limit)
+
+
+def match_detail_stmt(match_id: int) -> Select:
+    return (
+        select(Match)
+        .options(selectinload(Match.goals), selectinload(Match.cards))
+        .where(Match.id == match_id)
+    )
+
+
+def team_season_players_stmt(
+    team_season_id: int,
+    after: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+) -> Select:
+    # keyset su (last_name, first_name, id)
+    stmt = select(
+        Player.id, Player.first_name, Player.last_name, Player.full_name, Player.jersey_number,
+        Player.macro_role, Player.micro_roles, Player.birth_date, Player.country_id,
+    ).where(Player.current_team_season_id == team_season_id)
+    if after is not None:
+        last, first, pid = after
+        stmt = stmt.where(tuple_(Player.last_name, Player.first_name, Player.id) > tuple_(last, first, pid))
+    return stmt.order_by(Player.last_name, Player.first_name, Player.id).limit(limit)
+
+
+def standings_stmt(season_id: int) -> Select:
+    return (
+        select(Standing, Team.name)
+        .join(Team, Standing.team_id == Team.id)
+        .where(Standing.season_id == season_id)
+        .order_by(
+            Standing.points.desc(),
+            (Standing.goals_for - Standing.goals_against).desc(),
+            Standing.goals_for.desc(),
+            Standing.team_id,
+        )
+    )
+
+
+def data_version_stmt(scope: str = DATA) -> Select:
+    return select(DataVersion.version).where(DataVersion.scope == scope)
+
+
+# ---------------- Serializzazione ----------------
+def match_dict(m: Match) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "season_id": m.season_id,
+        "matchday": m.matchday,
+        "kickoff": m.kickoff,
+        "home_team_id": m.home_team_id,
+        "away_team_id": m.away_team_id,
+        "home_team_name": m.home_team_name,
+        "away_team_name": m.away_team_name,
+        "home_score": m.home_score,
+        "away_score": m.away_score,
+        "referee": m.referee,
+    }
+
+
+def match_detail_dict(m: Match) -> Dict[str, Any]:
+    return match_dict(m) | {
+        "goals": [
+            {
+                "id": g.id, "team_id": g.team_id, "scorer_player_id": g.scorer_player_id,
+                "assist_player_id": g.assist_player_id, "minute": g.minute,
+                "period": g.period, "goal_type": g.goal_type,
+            }
+            for g in sorted(m.goals, key=lambda g: (g.minute, g.id))
+        ],
+        "cards": [
+            {
+                "id": c.id, "team_id": c.team_id, "player_id": c.player_id,
+                "minute": c.minute, "period": c.period, "card_type": c.card_type,
+            }
+            for c in sorted(m.cards, key=lambda c: (c.minute, c.id))
+        ],
+    }
+
+
+def standing_dicts(rows) -> List[Dict[str, Any]]:
+    cols = [c.key for c in Standing.__table__.columns if c.key != "season_id"]
+    return [
+        {"position": i, "team_name": name} | {c: getattr(s, c) for c in cols}
+        for i, (s, name) in enumerate(rows, start=1)
+    ]
+
+
+# ---------------- Helper async ----------------
+async def fetch_data_version(db: AsyncSession, scope: str = DATA) -> int:
+    return (await db.scalar(data_version_stmt(scope))) or 0
+
+
+async def fetch_season_matches(
+    db: AsyncSession,
+    season_id: int,
+    matchday: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+) -> List[Match]:
+    return list((await db.scalars(season_matches_stmt(season_id, matchday, after, limit))).all())
+
+
+async def fetch_match_detail(db: AsyncSession, match_id: int) -> Optional[Match]:
+    return (await db.scalars(match_detail_stmt(match_id))).first()
+
+
+async def fetch_team_season_players(
+    db: AsyncSession,
+    team_season_id: int,
+    after: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+):
+    return (await db.execute(team_season_players_stmt(team_season_id, after, limit))).all()
+
+
+async def fetch_standings(db: AsyncSession, season_id: int):
+    return (await db.execute(standings_stmt(season_id))).all()
@@ -0,0 +1,261 @@
+# app/backtest.py
+# Backtest dei mercati di occorrenza, giornata per giornata. Per la giornata G si prevede con i soli
+# dati disponibili prima del suo primo calcio d'inizio e si confronta con quello che è successo
+# (Brier, log-loss, hit rate = quota di previsioni dalla parte giusta di 0.5). Due modelli:
+#   frequency -> frequenza della squadra finora, regolarizzata verso la media di lega
+#   poisson   -> app/poisson.py stimato alla data della giornata (1X2, over, goal/no goal, segna, porta inviolata)
+# Ogni riga squadra-partita (analytics.team_match_frame) è una previsione.
+#
+# Incrementale: dopo ogni giornata si salvano le statistiche cumulative per squadra (BacktestStep.state)
+# e un'impronta dei dati della giornata. Al giro successivo si ricalcolano solo le giornate nuove o
+# cambiate (e quelle dopo, che dipendono da loro), ripartendo dallo stato della giornata precedente.
+# Nessun commit qui: lo fa il chiamante.
+#
+#   python -m app.backtest --season 3 [--rebuild]
+from __future__ import annotations
+
+import argparse
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from .analytics import GOAL_LINES, MARKET_COLUMNS, add_market_flags, load_frames, team_match_frame
+from .models import BacktestScore, BacktestStep, Card, Goal, LiveMatch, Match
+from .poisson import build_fit, predict_fixtures
+
+FREQUENCY = "frequency"
+POISSON = "poisson"
+PRIOR_MATCHES = 5.0      # peso (in partite) della media di lega nella frequenza di una squadra
+EPS = 1e-6               # probabilità tagliate in [EPS, 1-EPS] per la log-loss
+
+STATE_COLUMNS = ["played"] + MARKET_COLUMNS
+
+
+# ---------------- Impronte delle giornate ----------------
+def matchday_fingerprints(db: Session, season_id: int) -> Dict[int, str]:
+    # tre GROUP BY per giornata (partite, gol, cartellini): cambia se cambia un risultato o un evento
+    not_live = Match.id.not_in(LiveMatch.open_match_ids())
+    queries = [
+        select(Match.matchday, func.count(), func.sum(Match.id), func.sum(Match.home_score),
+               func.sum(Match.away_score), func.min(Match.kickoff), func.max(Match.kickoff)),
+    ]
+    for ev in (Goal, Card):
+        queries.append(
+            select(Match.matchday, func.count(), func.sum(ev.id), func.sum(ev.team_id), func.sum(ev.minute),
+                   func.sum(case((ev.period == "1T", 1), else_=0)))
+            .join(Match, ev.match_id == Match.id)
+        )
+    parts: Dict[int, list] = {}
+    for i, q in enumerate(queries):
+        for md, *values in db.execute(q.where(Match.season_id == season_id, not_live).group_by(Match.matchday)):
+            parts.setdefault(md, [None] * len(queries))[i] = tuple(values)
+    return {
+        md: hashlib.sha1(repr(values).encode()).hexdigest()[:16]
+        for md, values in sorted(parts.items())
+        if values[0] is not None
+    }
+
+
+# ---------------- Statistiche cumulative ----------------
+def team_counts(tm: pd.DataFrame) -> pd.DataFrame:
+    # partite giocate + occorrenze di ogni mercato per squadra (indice team_id)
+    flags = tm[["team_id"] + MARKET_COLUMNS].astype({c: np.int64 for c in MARKET_COLUMNS})
+    counts = flags.groupby("team_id").sum()
+    counts.insert(0, "played", tm.groupby("team_id").size())
+    return counts[STATE_COLUMNS]
+
+
+def _add_counts(a: pd.DataFrame, b: pd.DataFrame, sign: int = 1) -> pd.DataFrame:
+    return a.add(sign * b, fill_value=0).astype(np.int64)
+
+
+def _state_to_json(state: pd.DataFrame) -> Dict:
+    return {"columns": STATE_COLUMNS, "teams": {str(t): row.tolist() for t, row in zip(state.index, state.to_numpy())}}
+
+
+def _state_from_json(data: Optional[Dict]) -> Optional[pd.DataFrame]:
+    # None se manca o se è di un'altra versione dei mercati (=> ricalcolo completo)
+    if not data or data.get("columns") != STATE_COLUMNS:
+        return None
+    teams = data["teams"]
+    return pd.DataFrame(
+        [teams[t] for t in teams], index=pd.Index([int(t) for t in teams], name="team_id"),
+        columns=STATE_COLUMNS, dtype=np.int64,
+    )
+
+
+def _empty_state() -> pd.DataFrame:
+    return pd.DataFrame(columns=STATE_COLUMNS, index=pd.Index([], name="team_id"), dtype=np.int64)
+
+
+# ---------------- Previsioni ----------------
+def frequency_probabilities(state: pd.DataFrame, tm: pd.DataFrame) -> Dict[str, np.ndarray]:
+    # (occorrenze squadra + PRIOR_MATCHES * media lega) / (partite squadra + PRIOR_MATCHES)
+    league = state.sum()
+    league_p = (league[MARKET_COLUMNS].to_numpy(float) + 1.0) / (float(league["played"]) + 2.0)
+    counts = state.reindex(tm["team_id"].to_numpy(), fill_value=0)
+    played = counts["played"].to_numpy(float)[:, None]
+    p = (counts[MARKET_COLUMNS].to_numpy(float) + PRIOR_MATCHES * league_p) / (played + PRIOR_MATCHES)
+    return dict(zip(MARKET_COLUMNS, p.T))
+
+
+def _both(pred: pd.DataFrame, col: str) -> np.ndarray:
+    # mercato di partita: stessa probabilità per le due righe squadra-partita
+    return np.concatenate([pred[col].to_numpy()] * 2)
+
+
+def poisson_probabilities(db: Session, season_id: int, cutoff: datetime,
+                          matches: pd.DataFrame) -> Dict[str, np.ndarray]:
+    # righe di team_match_frame: prima le n prospettive casa, poi le n trasferta
+    fit = build_fit(db.connection(), season_id, as_of=cutoff)
+    pred = predict_fixtures(fit, matches["home_team_id"].to_numpy(), matches["away_team_id"].to_numpy())
+    xg_h, xg_a = pred["xg_home"].to_numpy(), pred["xg_away"].to_numpy()
+    out = {
+        "win": np.concatenate([pred["home"].to_numpy(), pred["away"].to_numpy()]),
+        "draw": _both(pred, "draw"),
+        "loss": np.concatenate([pred["away"].to_numpy(), pred["home"].to_numpy()]),
+        "btts": _both(pred, "btts"),
+        "scored": np.concatenate([1 - np.exp(-xg_h), 1 - np.exp(-xg_a)]),
+        "clean_sheet": np.concatenate([np.exp(-xg_a), np.exp(-xg_h)]),
+    }
+    for line in GOAL_LINES:
+        out[f"over_{line}"] = _both(pred, f"over_{line}")
+    return out
+
+
+def score_rows(season_id: int, matchday: int, model: str, probs: Dict[str, np.ndarray],
+               tm: pd.DataFrame) -> List[Dict]:
+    rows = []
+    for market, p in probs.items():
+        y = tm[market].to_numpy(float)
+        p = np.clip(p, EPS, 1 - EPS)
+        rows.append({
+            "season_id": season_id, "matchday": matchday, "model": model, "market": market,
+            "n": len(y),
+            "brier_sum": float(((p - y) ** 2).sum()),
+            "log_loss_sum": float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).sum()),
+            "hits": int(((p >= 0.5) == (y == 1)).sum()),
+        })
+    return rows
+
+
+# ---------------- Passo e stagione ----------------
+def _postponed_counts(db: Session, season_id: int, matchday: int, cutoff: datetime) -> Optional[pd.DataFrame]:
+    # recuperi: partite di giornate precedenti giocate dopo il calcio d'inizio di questa (fuori dallo stato)
+    late = db.execute(
+        select(Match.id, Match.matchday)
+        .where(Match.season_id == season_id, Match.matchday < matchday, Match.kickoff >= cutoff,
+               Match.id.not_in(LiveMatch.open_match_ids()))
+    ).all()
+    if not late:
+        return None
+    frames = load_frames(db.connection(), season_id, sorted({r.matchday for r in late}))
+    tm = add_market_flags(team_match_frame(frames))
+    return team_counts(tm[tm["match_id"].isin([r.id for r in late])])
+
+
+def backtest_step(db: Session, season_id: int, matchday: int, state: pd.DataFrame) -> pd.DataFrame:
+    # previsioni e punteggi della giornata; ritorna lo stato cumulativo aggiornato
+    frames = load_frames(db.connection(), season_id, [matchday])
+    tm = add_market_flags(team_match_frame(frames))
+    cutoff = pd.Timestamp(frames["matches"]["kickoff"].min()).to_pydatetime()
+
+    known = state
+    late = _postponed_counts(db, season_id, matchday, cutoff)
+    if late is not None:
+        known = _add_counts(state, late, sign=-1)
+
+    rows = score_rows(season_id, matchday, FREQUENCY, frequency_probabilities(known, tm), tm)
+    rows += score_rows(season_id, matchday, POISSON,
+                       poisson_probabilities(db, season_id, cutoff, frames["matches"]), tm)
+    db.execute(insert(BacktestScore), rows)
+    return _add_counts(state, team_counts(tm))
+
+
+def run_backtest(db: Session, season_id: int, rebuild: bool = False) -> List[int]:
+    # ricalcola solo le giornate nuove/cambiate (e le successive); ritorna le giornate calcolate
+    fingerprints = matchday_fingerprints(db, season_id)
+    stored = dict(db.execute(
+        select(BacktestStep.matchday, BacktestStep.fingerprint).where(BacktestStep.season_id == season_id)
+    ).all())
+
+    changed = {md for md, fp in fingerprints.items() if stored.get(md) != fp}
+    changed |= stored.keys() - fingerprints.keys()   # giornate sparite
+    if rebuild:
+        changed |= fingerprints.keys() | stored.keys()
+    if not changed:
+        return []
+    start = min(changed)
+
+    state = _state_from_json(db.execute(
+        select(BacktestStep.state)
+        .where(BacktestStep.season_id == season_id, BacktestStep.matchday < start)
+        .order_by(BacktestStep.matchday.desc())
+        .limit(1)
+    ).scalar())
+    if state is None:
+        # niente stato precedente (o salvato con altri mercati): dalla prima giornata
+        state = _empty_state()
+        start = min(changed | fingerprints.keys() | stored.keys())
+
+    for model in (BacktestScore, BacktestStep):
+        db.execute(delete(model).where(model.season_id == season_id, model.matchday >= start))
+
+    done = []
+    for md in [m for m in fingerprints if m >= start]:
+        state = backtest_step(db, season_id, md, state)
+        db.execute(insert(BacktestStep).values(
+            season_id=season_id, matchday=md, fingerprint=fingerprints[md],
+            state=_state_to_json(state), computed_at=datetime.now(),
+        ))
+        done.append(md)
+    return done
+
+
+# ---------------- Riepilogo ----------------
+def backtest_report(db: Session, season_id: int, through_matchday: Optional[int] = None) -> pd.DataFrame:
+    # medie per modello/mercato sulle giornate calcolate (somme salvate => una GROUP BY)
+    stmt = (
+        select(BacktestScore.model, BacktestScore.market, func.sum(BacktestScore.n).label("n"),
+               func.sum(BacktestScore.brier_sum).label("brier"),
+               func.sum(BacktestScore.log_loss_sum).label("log_loss"),
+               func.sum(BacktestScore.hits).label("hits"))
+        .where(BacktestScore.season_id == season_id)
+        .group_by(BacktestScore.model, BacktestScore.market)
+    )
+    if through_matchday is not None:
+        stmt = stmt.where(BacktestScore.matchday <= through_matchday)
+    df = pd.DataFrame(db.execute(stmt).all(), columns=["model", "market", "n", "brier", "log_loss", "hits"])
+    if df.empty:
+        return df.drop(columns="hits").assign(hit_rate=[])
+    df["brier"] /= df["n"]
+    df["log_loss"] /= df["n"]
+    df["hit_rate"] = df.pop("hits") / df["n"]
+    df["market"] = pd.Categorical(df["market"], categories=MARKET_COLUMNS, ordered=True)
+    return df.sort_values(["market", "model"], ignore_index=True).astype({"market": str})
+
+
+if __name__ == "__main__":
+    from .db import SessionLocal, engine
+    from .schema import ensure_schema_current
+
+    parser = argparse.ArgumentParser(description="Backtest incrementale dei mercati, giornata per giornata")
+    parser.add_argument("--season", type=int, required=True, help="id stagione")
+    parser.add_argument("--rebuild", action="store_true", help="ricalcola tutte le giornate")
+    args = parser.parse_args()
+
+    ensure_schema_current(engine)
+    db = SessionLocal()
+    try:
+        done = run_backtest(db, args.season, args.rebuild)
+        db.commit()
+        print(f"Giornate calcolate: {', '.join(map(str, done)) or 'nessuna (già aggiornato)'}")
+        pd.set_option("display.width", 120)
+        print(backtest_report(db, args.season).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    finally:
+        db.close()
@@ -1,15 +1,115 @@
 # app/db.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+# Configurazione engine da variabili d'ambiente:
+#   RETBET_DATABASE_URL        (default sqlite:///./retbet.db; anche postgresql://...)
+#   RETBET_READ_DATABASE_URL   (opzionale: replica di sola lettura, default = DATABASE_URL)
+#   RETBET_SQLITE_MMAP_SIZE    (byte, default 256 MB)
+#   RETBET_SQLITE_CACHE_KB     (KiB per connessione, default 64 MB)
+#   RETBET_SQLITE_BUSY_MS      (attesa sul lock prima di "database is locked", default 5 s)
+#   RETBET_READ_POOL_SIZE / RETBET_WRITE_MAX_OVERFLOW / RETBET_PG_POOL_SIZE
+#   RETBET_SQL_DEBUG / RETBET_SLOW_QUERY_MS / RETBET_SLOW_QUERY_LOG  (vedi app/instrumentation.py)
+import os
+from typing import Dict, Optional
 
-DATABASE_URL = "sqlite:///./retbet.db"
+from sqlalchemy import Select, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # necessario per SQLite + Streamlit
-)
+from .instrumentation import instrument
+
+DATABASE_URL = os.environ.get("RETBET_DATABASE_URL", "sqlite:///./retbet.db")
+READ_DATABASE_URL = os.environ.get("RETBET_READ_DATABASE_URL", DATABASE_URL)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# WAL: i lettori non vengono bloccati da chi scrive (e viceversa);
+# synchronous=NORMAL in WAL è sicuro contro la corruzione, perde al massimo l'ultimo commit su crash OS
+SQLITE_PRAGMAS: Dict[str, object] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": _env_int("RETBET_SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "cache_size": -_env_int("RETBET_SQLITE_CACHE_KB", 64 * 1024),   # negativo = KiB
+    "busy_timeout": _env_int("RETBET_SQLITE_BUSY_MS", 5000),
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_pragmas(dbapi_conn, pragmas: Optional[Dict[str, object]] = None) -> None:
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in (pragmas or SQLITE_PRAGMAS).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def make_engine(url: str, role: str = "write", pragmas: Optional[Dict[str, object]] = None) -> Engine:
+    # role: "write" = pochi writer (SQLite serializza comunque le scritture),
+    #       "read"  = pool di lettori; SessionLocal smista tra i due (RoutingSession)
+    if url.startswith("sqlite"):
+        if role == "write":
+            pool = {"pool_size": 1, "max_overflow": _env_int("RETBET_WRITE_MAX_OVERFLOW", 2)}
+        else:
+            pool = {"pool_size": _env_int("RETBET_READ_POOL_SIZE", 8), "max_overflow": 8}
+        eng = create_engine(
+            url,
+            connect_args={"check_same_thread": False},  # necessario per SQLite + Streamlit
+            pool_timeout=30,
+            **pool,
+        )
+        event.listen(eng, "connect", lambda conn, _rec: apply_sqlite_pragmas(conn, pragmas))
+        return instrument(eng)
+
+    # profilo PostgreSQL
+    size = _env_int("RETBET_PG_POOL_SIZE", 10)
+    return instrument(create_engine(
+        url,
+        pool_size=size if role == "read" else max(2, size // 2),
+        max_overflow=size,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    ))
+
+
+engine = make_engine(DATABASE_URL, role="write")
+read_engine = make_engine(READ_DATABASE_URL, role="read")
+
+_WROTE = "retbet_wrote"
+
+
+class RoutingSession(Session):
+    # SELECT sul pool dei lettori; flush, insert/update/delete e connection() sul writer.
+    # Dopo la prima scrittura anche le SELECT della stessa transazione vanno sul writer
+    # (devono vedere le righe non ancora committate).
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if isinstance(clause, Select) and not self._flushing and not self.info.get(_WROTE):
+            return read_engine
+        if clause is not None:
+            self.info[_WROTE] = True
+        return engine
+
+    def connection(self, *args, **kw):
+        self.info[_WROTE] = True
+        return super().connection(*args, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flushed(session: Session, _ctx) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_WROTE, None)
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autoflush=False, autocommit=False)
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 class Base(DeclarativeBase):
     pass
@@ -0,0 +1,34 @@
+# app/db_async.py
+# Accesso asincrono (SQLAlchemy asyncio + aiosqlite) per servizi HTTP con molti lettori
+# concorrenti. Stesso Base e stessi modelli del percorso sincrono in app/db.py.
+from typing import AsyncIterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .db import READ_DATABASE_URL, apply_sqlite_pragmas
+from .instrumentation import instrument
+
+
+def to_async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+# l'accesso async è usato solo in lettura (API): punta alla replica se configurata
+ASYNC_DATABASE_URL = to_async_url(READ_DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    event.listen(async_engine.sync_engine, "connect", lambda conn, _rec: apply_sqlite_pragmas(conn))
+instrument(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,254 @@
+# app/export.py
+# Snapshot colonnare (Parquet, opzionalmente anche Arrow IPC) di matches / goals /
+# cards / players, partizionato per competizione e stagione:
+#
+#   <out>/matches/competition_id=1/season_id=3/part-0.parquet
+#
+# Le partizioni sono riscritte solo se il loro contenuto è cambiato rispetto
+# all'ultimo export (hash in <out>/_manifest.json). I job offline leggono lo
+# snapshot (memory-mapped) invece di interrogare retbet.db.
+#
+#   python -m app.export ./snapshot [--ipc]
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import func, select
+from sqlalchemy import types as sa_types
+from sqlalchemy.engine import Engine
+
+from .models import Card, Goal, LiveMatch, Match, Player, Season, TeamSeason
+
+MANIFEST = "_manifest.json"
+PARTITION_COLS = ("competition_id", "season_id")
+# giocatori senza TeamSeason corrente
+UNASSIGNED = 0
+
+# chiave di riga per tabella (ordinamento stabile dentro la partizione)
+ROW_KEYS = {"matches": "match_id", "goals": "goal_id", "cards": "card_id", "players": "player_id"}
+
+
+@dataclass
+class ExportReport:
+    written: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.written)} partizioni scritte, {self.unchanged} invariate, "
+            f"{len(self.removed)} rimosse"
+        )
+
+
+# ---------------- Estrazione ----------------
+def _queries() -> Dict[str, object]:
+    matches = (
+        select(
+            Season.competition_id, Match.season_id, Match.id.label("match_id"), Match.matchday,
+            Match.kickoff, Match.home_team_id, Match.away_team_id, Match.home_team_name,
+            Match.away_team_name, Match.home_score, Match.away_score, Match.referee, Match.extras,
+        )
+        .join(Season, Match.season_id == Season.id)
+        # partite live: 0-0 provvisorio, entrano nello snapshot a fine partita
+        .where(Match.id.not_in(LiveMatch.open_match_ids()))
+    )
+    goals = (
+        select(
+            Season.competition_id, Match.season_id, Goal.id.label("goal_id"), Goal.match_id,
+            Goal.team_id, Goal.scorer_player_id, Goal.assist_player_id, Goal.minute, Goal.period,
+            Goal.goal_type, Goal.extras,
+        )
+        .join(Match, Goal.match_id == Match.id)
+        .join(Season, Match.season_id == Season.id)
+    )
+    cards = (
+        select(
+            Season.competition_id, Match.season_id, Card.id.label("card_id"), Card.match_id,
+            Card.team_id, Card.player_id, Card.minute, Card.period, Card.card_type, Card.extras,
+        )
+        .join(Match, Card.match_id == Match.id)
+        .join(Season, Match.season_id == Season.id)
+    )
+    players = (
+        select(
+            func.coalesce(Season.competition_id, UNASSIGNED).label("competition_id"),
+            func.coalesce(TeamSeason.season_id, UNASSIGNED).label("season_id"),
+            Player.id.label("player_id"), Player.first_name, Player.last_name, Player.full_name,
+            Player.country_id, Player.birth_date, Player.age_years, Player.macro_role,
+            Player.micro_roles, Player.jersey_number, TeamSeason.team_id,
+            Player.current_team_season_id, Player.extras,
+        )
+        .outerjoin(TeamSeason, Player.current_team_season_id == TeamSeason.id)
+        .outerjoin(Season, TeamSeason.season_id == Season.id)
+    )
+    return {"matches": matches, "goals": goals, "cards": cards, "players": players}
+
+
+# tipi Arrow fissi dai tipi delle colonne: read_sql senza dtype renderebbe double gli id nullable
+_ARROW_TYPES = (
+    (sa_types.Boolean, pa.bool_()),
+    (sa_types.Integer, pa.int64()),
+    (sa_types.Float, pa.float64()),
+    (sa_types.DateTime, pa.timestamp("us")),
+    (sa_types.Date, pa.date32()),
+    (sa_types.JSON, pa.string()),      # serializzato da _to_json_text
+    (sa_types.String, pa.string()),
+)
+
+
+def _arrow_schema(stmt) -> pa.Schema:
+    fields = []
+    for col in stmt.selected_columns:
+        if col.name in PARTITION_COLS:
+            continue
+        arrow_type = next((t for sa_type, t in _ARROW_TYPES if isinstance(col.type, sa_type)), None)
+        if arrow_type is None:
+            raise TypeError(f"{col.name}: tipo {col.type!r} senza tipo Arrow")
+        fields.append(pa.field(col.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _to_json_text(df: pd.DataFrame) -> pd.DataFrame:
+    # colonne JSON (extras, micro_roles) come testo: schema Arrow stabile
+    for col in ("extras", "micro_roles"):
+        if col in df.columns:
+            df[col] = [json.dumps(v, sort_keys=True) if v is not None else None for v in df[col]]
+    return df
+
+
+def _fingerprint(df: pd.DataFrame, schema: pa.Schema) -> str:
+    # hash del contenuto (ordine righe incluso: si hashano gli hash di riga in sequenza)
+    # e dello schema: se cambiano i tipi le partizioni vanno riscritte
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(schema.to_string().encode())
+    return f"{len(df)}:{digest.hexdigest()[:16]}"
+
+
+def _partition_dir(out: Path, table: str, competition_id: int, season_id: int) -> Path:
+    return out / table / f"competition_id={competition_id}" / f"season_id={season_id}"
+
+
+def _write_atomic(table: pa.Table, path: Path, ipc: bool) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    tmp = path / "part-0.parquet.tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path / "part-0.parquet")
+
+    if ipc:
+        # Arrow IPC non compresso: lettura zero-copy via memory map
+        tmp = path / "part-0.arrow.tmp"
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path / "part-0.arrow")
+    else:
+        # read_table preferisce .arrow: una copia di un export precedente sarebbe vecchia
+        (path / "part-0.arrow").unlink(missing_ok=True)
+
+
+# ---------------- Export ----------------
+def export_snapshot(engine: Engine, out_dir: str | Path, ipc: bool = False) -> ExportReport:
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / MANIFEST
+    old_manifest: Dict[str, Dict[str, str]] = (
+        json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    )
+    manifest: Dict[str, Dict[str, str]] = {}
+    report = ExportReport()
+
+    with engine.connect() as conn:
+        for name, stmt in _queries().items():
+            schema = _arrow_schema(stmt)
+            df = _to_json_text(pd.read_sql(stmt, conn))
+            df = df.sort_values(list(PARTITION_COLS) + [ROW_KEYS[name]], kind="stable")
+
+            manifest[name] = {}
+            for (comp_id, season_id), part in df.groupby(list(PARTITION_COLS), sort=True):
+                key = f"{comp_id}/{season_id}"
+                part = part.drop(columns=list(PARTITION_COLS)).reset_index(drop=True)
+                fp = _fingerprint(part, schema)
+                manifest[name][key] = fp
+
+                target = _partition_dir(out, name, comp_id, season_id)
+                up_to_date = (target / "part-0.parquet").exists() and (
+                    not ipc or (target / "part-0.arrow").exists()
+                )
+                if up_to_date and old_manifest.get(name, {}).get(key) == fp:
+                    report.unchanged += 1
+                    continue
+                _write_atomic(pa.Table.from_pandas(part, schema=schema, preserve_index=False), target, ipc)
+                report.written.append(f"{name}/{key}")
+
+            # partizioni sparite dal DB (es. stagione cancellata)
+            for key in set(old_manifest.get(name, {})) - set(manifest[name]):
+                comp_id, season_id = key.split("/")
+                shutil.rmtree(_partition_dir(out, name, comp_id, season_id), ignore_errors=True)
+                report.removed.append(f"{name}/{key}")
+
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, manifest_path)
+    return report
+
+
+# ---------------- Lettura ----------------
+def open_dataset(snapshot_dir: str | Path, table: str) -> ds.Dataset:
+    base = Path(snapshot_dir) / table
+    return ds.dataset(
+        [str(p) for p in sorted(base.glob("*/*/part-0.parquet"))],
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("competition_id", pa.int64()), ("season_id", pa.int64())]), flavor="hive"
+        ),
+        partition_base_dir=str(base),
+    )
+
+
+def read_table(
+    snapshot_dir: str | Path,
+    table: str,
+    competition_id: Optional[int] = None,
+    season_id: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+) -> pa.Table:
+    # ipc disponibile => memory map zero-copy, altrimenti Parquet memory-mapped
+    if competition_id is not None and season_id is not None:
+        path = _partition_dir(Path(snapshot_dir), table, competition_id, season_id)
+        if (path / "part-0.arrow").exists():
+            source = pa.memory_map(str(path / "part-0.arrow"), "r")
+            result = pa.ipc.open_file(source).read_all()
+            return result.select(columns) if columns else result
+        return pq.read_table(path / "part-0.parquet", columns=columns, memory_map=True)
+
+    dataset = open_dataset(snapshot_dir, table)
+    flt = None
+    if competition_id is not None:
+        flt = ds.field("competition_id") == competition_id
+    if season_id is not None:
+        cond = ds.field("season_id") == season_id
+        flt = cond if flt is None else flt & cond
+    return dataset.to_table(columns=columns, filter=flt)
+
+
+if __name__ == "__main__":
+    from .db import engine
+
+    parser = argparse.ArgumentParser(description="Snapshot Parquet partizionato per competizione/stagione")
+    parser.add_argument("out_dir", help="cartella di destinazione")
+    parser.add_argument("--ipc", action="store_true", help="scrivi anche Arrow IPC per letture zero-copy")
+    args = parser.parse_args()
+
+    print(f"Export completato: {export_snapshot(engine, args.out_dir, ipc=args.ipc)}")
@@ -0,0 +1,75 @@
+# app/extras.py
+# Attributi "promossi" da extras (JSON): colonna generata dal DB + indice, così i filtri
+# ("gol con xg > 0.3", "cartellini rivisti al VAR") sono SQL indicizzato invece di
+# deserializzare il JSON di ogni riga in Python.
+#
+# Si dichiarano nel modello con promoted(...):
+#   xg: Mapped[Optional[float]] = promoted("xg", Float)
+# - SQLite: colonna VIRTUAL (calcolata in lettura, il valore sta solo nell'indice)
+# - PostgreSQL: colonna STORED
+# Un valore del tipo sbagliato (es. xg = "n/a") diventa NULL, non un errore di insert.
+# Una nuova colonna promossa arriva sui DB esistenti con una migrazione: nell'add_column
+# usare sa.Computed(extras_value(...)) come in migrations/versions/0002 (l'autogenerate scrive
+# l'espressione SQLite). Il DB calcola il valore anche per le righe già presenti, niente backfill.
+from __future__ import annotations
+
+from sqlalchemy import Boolean, Computed, Float, Integer, String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+PROMOTED_KEY = "extras_key"
+
+# tipo SQLAlchemy -> (tipi json_type SQLite ammessi, tipi json_typeof PG ammessi, cast PG)
+_JSON_TYPES = {
+    Float: (("integer", "real"), ("number",), "double precision"),
+    Integer: (("integer",), ("number",), "integer"),
+    Boolean: (("true", "false"), ("boolean",), "boolean"),
+    String: (("text",), ("string",), "text"),
+}
+
+
+class extras_value(ColumnElement):
+    # extras[key] tipizzato, NULL se manca o è di un altro tipo
+    _traverse_internals = [("key", InternalTraversal.dp_string), ("type", InternalTraversal.dp_type)]
+    inherit_cache = True
+
+    def __init__(self, key: str, type_):
+        self.key = key
+        self.type = type_() if isinstance(type_, type) else type_
+
+    @property
+    def _json_types(self):
+        return _JSON_TYPES[type(self.type)]
+
+
+@compiles(extras_value)  # default: rendering dell'autogenerate
+@compiles(extras_value, "sqlite")
+def _extras_value_sqlite(element, compiler, **kw):
+    sqlite_types, _, _ = element._json_types
+    path = f"'$.{element.key}'"
+    allowed = ", ".join(f"'{t}'" for t in sqlite_types)
+    return f"CASE WHEN json_type(extras, {path}) IN ({allowed}) THEN json_extract(extras, {path}) END"
+
+
+@compiles(extras_value, "postgresql")
+def _extras_value_pg(element, compiler, **kw):
+    _, pg_types, cast = element._json_types
+    allowed = ", ".join(f"'{t}'" for t in pg_types)
+    return (
+        f"CASE WHEN json_typeof(extras -> '{element.key}') IN ({allowed}) "
+        f"THEN CAST(extras ->> '{element.key}' AS {cast}) END"
+    )
+
+
+def promoted(key: str, type_, index: bool = True):
+    # colonna generata da extras[key], indicizzata (ix_<tabella>_<colonna>)
+    return mapped_column(
+        type_,
+        Computed(extras_value(key, type_)),
+        nullable=True,
+        index=index,
+        info={PROMOTED_KEY: key},
+    )
+
@@ -0,0 +1,265 @@
+# app/importer.py
+# Import massivo di una stagione (partite + gol + cartellini) da CSV / JSONL / Parquet.
+#
+# fixtures: match_ref, matchday, kickoff, home_team, away_team, [referee]
+# events:   match_ref, event ("goal"|"card"), team, player, [assist], minute, period, type
+#           - team = squadra del giocatore (come in ui/match_entry.py)
+#           - type = goal_type ("open_play","penalty","free_kick","own_goal")
+#                    oppure card_type ("yellow","red","second_yellow")
+#
+# match_ref è salvato su matches (univoco per stagione): le partite già presenti vengono saltate.
+# Ogni batch è una transazione: se l'import si interrompe i batch già salvati restano, e
+# rilanciando lo stesso file si riprende da dove si era fermato.
+from __future__ import annotations
+
+import time
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .match_service import MatchDraft, insert_matches
+from .models import Competition, Match, Player, Season, Team, TeamSeason
+
+
+@dataclass
+class ImportReport:
+    matches: int = 0
+    skipped: int = 0          # match_ref già importati
+    goals: int = 0
+    cards: int = 0
+    unresolved_players: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.matches + self.goals + self.cards
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.matches} partite ({self.skipped} già presenti), {self.goals} gol, {self.cards} cartellini "
+            f"({self.unresolved_players} giocatori non risolti) "
+            f"in {self.seconds:.2f}s · {self.rows_per_second:,.0f} righe/s"
+        )
+
+
+# ---------------- Lettura file ----------------
+def read_records(path: str | Path) -> List[Dict]:
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    elif suffix in (".jsonl", ".ndjson"):
+        df = pd.read_json(path, lines=True, dtype=False)
+    elif suffix in (".parquet", ".pq"):
+        df = pd.read_parquet(path)
+    else:
+        raise ValueError(f"Formato non supportato: {path.name} (usa .csv, .jsonl o .parquet)")
+
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.to_dict("records")
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _norm_name(value: str) -> str:
+    # "Leão " -> "leao": match tollerante su accenti/maiuscole/spazi
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.lower().split())
+
+
+# ---------------- Risoluzione nomi -> id (una volta per batch) ----------------
+class NameResolver:
+    def __init__(self, db: Session, season: Season):
+        self.db = db
+        self.season = season
+        self.teams: Dict[str, int] = {}
+        self.team_seasons: Dict[int, int] = {}
+        # (team_id, nome) -> player_id, e nome -> player_id (solo se univoco)
+        self.players_by_team: Dict[tuple, int] = {}
+        self.players_by_name: Dict[str, Optional[int]] = {}
+        self._load()
+
+    def _load(self):
+        for team_id, name in self.db.execute(select(Team.id, Team.name)):
+            self.teams[_norm_name(name)] = team_id
+
+        rows = self.db.execute(
+            select(TeamSeason.id, TeamSeason.team_id).where(TeamSeason.season_id == self.season.id)
+        )
+        for ts_id, team_id in rows:
+            self.team_seasons[team_id] = ts_id
+        ts_to_team = {ts_id: team_id for team_id, ts_id in self.team_seasons.items()}
+
+        rows = self.db.execute(
+            select(
+                Player.id, Player.first_name, Player.last_name, Player.full_name,
+                Player.current_team_season_id,
+            )
+        )
+        for pid, first, last, full, ts_id in rows:
+            keys = {_norm_name(f"{last} {first}"), _norm_name(f"{first} {last}"), _norm_name(last)}
+            if full:
+                keys.add(_norm_name(full))
+            team_id = ts_to_team.get(ts_id)
+            for key in keys:
+                if team_id is not None:
+                    self.players_by_team.setdefault((team_id, key), pid)
+                # nome ambiguo su più giocatori => None
+                if key in self.players_by_name and self.players_by_name[key] != pid:
+                    self.players_by_name[key] = None
+                else:
+                    self.players_by_name[key] = pid
+
+    def team(self, name: str) -> int:
+        key = _norm_name(name)
+        team_id = self.teams.get(key)
+        if team_id is None:
+            team_id = self.db.scalar(insert(Team).values(name=name.strip()).returning(Team.id))
+            self.teams[key] = team_id
+        if team_id not in self.team_seasons:
+            self.team_seasons[team_id] = self.db.scalar(
+                insert(TeamSeason)
+                .values(team_id=team_id, season_id=self.season.id)
+                .returning(TeamSeason.id)
+            )
+        return team_id
+
+    def player(self, name: Optional[str], team_id: Optional[int]) -> Optional[int]:
+        if not name:
+            return None
+        key = _norm_name(name)
+        pid = self.players_by_team.get((team_id, key))
+        if pid is None:
+            pid = self.players_by_name.get(key)
+        return pid
+
+
+def resolve_season(db: Session, competition_name: str, season_name: str) -> Season:
+    comp = db.query(Competition).filter_by(name=competition_name.strip()).first()
+    if not comp:
+        raise ValueError(f"Competizione non trovata: {competition_name!r} (creala prima dalla UI)")
+
+    season = db.query(Season).filter_by(competition_id=comp.id, name=season_name.strip()).first()
+    if not season:
+        season = Season(competition_id=comp.id, name=season_name.strip())
+        db.add(season)
+        db.flush()
+    return season
+
+
+# ---------------- Import ----------------
+def _parse_kickoff(value):
+    ts = pd.to_datetime(value)
+    return ts.to_pydatetime().replace(tzinfo=None)
+
+
+def _group_events(events: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    grouped: Dict[str, List[Dict]] = {}
+    for ev in events:
+        grouped.setdefault(_clean(ev["match_ref"]), []).append(ev)
+    return grouped
+
+
+def import_season(
+    db: Session,
+    competition_name: str,
+    season_name: str,
+    fixtures: List[Dict],
+    events: Optional[List[Dict]] = None,
+    batch_size: int = 500,
+) -> ImportReport:
+    report = ImportReport()
+    started = time.perf_counter()
+
+    season = resolve_season(db, competition_name, season_name)
+    resolver = NameResolver(db, season)
+    events_by_match = _group_events(events or [])
+    # partite già importate (anche da un import interrotto a metà)
+    seen = set(db.scalars(
+        select(Match.match_ref).where(Match.season_id == season.id, Match.match_ref.is_not(None))
+    ))
+
+    for start in range(0, len(fixtures), batch_size):
+        drafts: List[MatchDraft] = []
+
+        for fx in fixtures[start:start + batch_size]:
+            ref = _clean(fx.get("match_ref"))
+            if ref is None:
+                raise ValueError(f"Partita di giornata {fx.get('matchday')}: match_ref mancante")
+            if ref in seen:
+                report.skipped += 1
+                continue
+            seen.add(ref)
+            home_name = _clean(fx["home_team"])
+            away_name = _clean(fx["away_team"])
+            if not home_name or not away_name:
+                raise ValueError(f"Partita {ref}: squadre mancanti")
+            draft = MatchDraft(
+                season_id=season.id,
+                matchday=int(fx["matchday"]),
+                kickoff=_parse_kickoff(fx["kickoff"]),
+                home_team_id=resolver.team(home_name),
+                away_team_id=resolver.team(away_name),
+                home_team_name=home_name,
+                away_team_name=away_name,
+                referee=_clean(fx.get("referee")),
+                ref=ref,
+                match_ref=ref,
+            )
+
+            for ev in events_by_match.get(ref, []):
+                kind = (_clean(ev.get("event")) or "").lower()
+                ev_team = _clean(ev.get("team"))
+                if not ev_team:
+                    raise ValueError(f"Partita {ref}: evento senza squadra")
+                player_team_id = resolver.team(ev_team)
+                player_id = resolver.player(_clean(ev.get("player")), player_team_id)
+                if _clean(ev.get("player")) and player_id is None:
+                    report.unresolved_players += 1
+
+                minute = int(ev["minute"])
+                common = {
+                    "player_team_id": player_team_id,
+                    "minute": minute,
+                    "period": _clean(ev.get("period")) or ("1T" if minute <= 45 else "2T"),
+                }
+                if kind == "goal":
+                    draft.goals.append(common | {
+                        "scorer_player_id": player_id,
+                        "assist_player_id": resolver.player(_clean(ev.get("assist")), player_team_id),
+                        "goal_type": _clean(ev.get("type")) or "open_play",
+                    })
+                elif kind == "card":
+                    draft.cards.append(common | {"player_id": player_id, "card_type": _clean(ev.get("type"))})
+                else:
+                    raise ValueError(f"Partita {ref}: evento sconosciuto {kind!r}")
+
+            drafts.append(draft)
+
+        # un'unica transazione per batch: match + eventi con executemany + aggregati
+        # (validazione di tutto il batch prima di scrivere, vedi app/match_service.py)
+        insert_matches(db, drafts)
+        db.commit()
+
+        report.matches += len(drafts)
+        report.goals += sum(len(d.goals) for d in drafts)
+        report.cards += sum(len(d.cards) for d in drafts)
+
+    db.commit()
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,160 @@
+# app/instrumentation.py
+# Strumentazione SQL: listener sugli engine che contano statement e tempi per "scope"
+# (un rerun Streamlit, una richiesta API, un blocco di script) e scrivono le query lente su log.
+#
+#   RETBET_SQL_DEBUG=1            raccoglie le statistiche e mostra il pannello debug nelle pagine
+#   RETBET_SLOW_QUERY_MS=200      soglia del log query lente (0 = disattivato)
+#   RETBET_SLOW_QUERY_LOG=path    file del log (default: stderr)
+#
+# Lo scope corrente è un ContextVar (track()); senza scope esplicito si usa uno scope
+# per thread: Streamlit esegue callback e script di un rerun nello stesso thread,
+# quindi anche le query dei callback (on_click) finiscono nel rerun giusto.
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_DEBUG = os.environ.get("RETBET_SQL_DEBUG", "").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("RETBET_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.environ.get("RETBET_SLOW_QUERY_LOG")
+
+slow_log = logging.getLogger("retbet.sql.slow")
+sql_log = logging.getLogger("retbet.sql")
+
+_START_KEY = "retbet_query_start"
+_MAX_SQL_CHARS = 2000
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass
+class QueryStats:
+    label: str = ""
+    count: int = 0
+    total_ms: float = 0.0
+    statements: Dict[str, StatementStats] = field(default_factory=dict)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        s = self.statements.get(statement)
+        if s is None:
+            s = self.statements[statement] = StatementStats()
+        s.count += 1
+        s.total_ms += elapsed_ms
+        s.max_ms = max(s.max_ms, elapsed_ms)
+
+    def top(self, n: int = 10, by: str = "total_ms") -> List[Tuple[str, StatementStats]]:
+        # by="count" mette in cima le raffiche N+1 (stessa SELECT ripetuta)
+        return sorted(self.statements.items(), key=lambda kv: getattr(kv[1], by), reverse=True)[:n]
+
+
+    def summary(self, n: int = 3) -> str:
+        top = "; ".join(
+            f"{s.count}x {s.total_ms:.1f}ms {' '.join(sql.split())[:120]}" for sql, s in self.top(n, by="count")
+        )
+        return f"{self.label}: {self.count} query, {self.total_ms:.1f} ms | {top}"
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("retbet_query_stats", default=None)
+_thread = threading.local()
+
+
+def current_stats() -> QueryStats:
+    stats = _current.get()
+    if stats is not None:
+        return stats
+    stats = getattr(_thread, "stats", None)
+    if stats is None:
+        stats = _thread.stats = QueryStats(label=threading.current_thread().name)
+    return stats
+
+
+def finish_thread_stats(label: str = "") -> QueryStats:
+    # chiude lo scope del thread (fine rerun) e ne apre uno nuovo
+    stats = getattr(_thread, "stats", None) or QueryStats(label=threading.current_thread().name)
+    if label:
+        stats.label = label
+    _thread.stats = None
+    return stats
+
+
+@contextmanager
+def track(label: str) -> Iterator[QueryStats]:
+    stats = QueryStats(label=label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# ---------------- Listener ----------------
+def _before_cursor_execute(conn, _cursor, _statement, _params, _context, _executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, params, _context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    if SQL_DEBUG or _current.get() is not None:
+        current_stats().record(statement, elapsed_ms)
+
+    if SLOW_QUERY_MS and elapsed_ms >= SLOW_QUERY_MS:
+        slow_log.warning(
+            "%.1f ms%s | %s | params=%.300r",
+            elapsed_ms, " (executemany)" if executemany else "",
+            " ".join(statement.split())[:_MAX_SQL_CHARS], params,
+        )
+
+
+def _handle_error(context):
+    # statement fallito: after_cursor_execute non arriva, si scarta il tempo di partenza
+    conn = context.connection
+    if conn is not None and conn.info.get(_START_KEY):
+        conn.info[_START_KEY].pop()
+
+
+def instrument(engine: Engine) -> Engine:
+    # idempotente: un engine (o il sync_engine di un AsyncEngine) viene agganciato una volta sola
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    return engine
+
+
+def configure_slow_log(path: Optional[str] = SLOW_QUERY_LOG) -> None:
+    if slow_log.handlers:
+        return
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_log.addHandler(handler)
+    slow_log.setLevel(logging.WARNING)
+    slow_log.propagate = False
+
+    if SQL_DEBUG and not sql_log.handlers:
+        sql_log.addHandler(logging.StreamHandler())
+        sql_log.setLevel(logging.INFO)
+        sql_log.propagate = False
+
+
+configure_slow_log()
@@ -0,0 +1,271 @@
+# app/live.py
+# Modalità live: la partita viene creata al calcio d'inizio (LiveMatch status="live", 0-0 su matches),
+# ogni gol/cartellino è scritto subito in un log append-only (MatchEvent) e il punteggio corrente
+# è aggiornato di +1 nello stesso commit. Chi segue la partita legge solo gli eventi dopo
+# l'ultimo seq già visto. A fine partita il log diventa Goal/Card + classifica + statistiche
+# in un'unica transazione (app/match_service.py).
+#
+# Correzioni: un evento non si cancella, si aggiunge un evento "retract" che lo annulla.
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .match_service import (
+    MatchDraft,
+    MatchValidationError,
+    match_row,
+    validate_draft,
+    validate_event,
+    write_match_events,
+)
+from .models import LiveMatch, Match, MatchEvent
+from .scoring import goal_team_id
+
+LIVE = "live"
+FINAL = "final"
+
+
+class LiveMatchClosed(ValueError):
+    pass
+
+
+class LiveState(NamedTuple):
+    match_id: int
+    status: str
+    last_seq: int
+    home_score: int
+    away_score: int
+    season_id: int
+    matchday: int
+    kickoff: datetime
+    home_team_id: int
+    away_team_id: int
+    home_team_name: str
+    away_team_name: str
+
+
+class LiveEvent(NamedTuple):
+    seq: int
+    kind: str
+    player_team_id: Optional[int]
+    player_id: Optional[int]
+    assist_player_id: Optional[int]
+    minute: Optional[int]
+    period: Optional[str]
+    event_type: Optional[str]
+    retracts_seq: Optional[int]
+
+
+_STATE_COLUMNS = (
+    LiveMatch.match_id, LiveMatch.status, LiveMatch.last_seq, LiveMatch.home_score, LiveMatch.away_score,
+    Match.season_id, Match.matchday, Match.kickoff, Match.home_team_id, Match.away_team_id,
+    Match.home_team_name, Match.away_team_name,
+)
+_EVENT_COLUMNS = (
+    MatchEvent.seq, MatchEvent.kind, MatchEvent.player_team_id, MatchEvent.player_id,
+    MatchEvent.assist_player_id, MatchEvent.minute, MatchEvent.period, MatchEvent.event_type,
+    MatchEvent.retracts_seq,
+)
+
+
+# ---------------- Letture (una SELECT ciascuna) ----------------
+def live_state(db: Session, match_id: int) -> Optional[LiveState]:
+    row = db.execute(
+        select(*_STATE_COLUMNS).join(Match, Match.id == LiveMatch.match_id).where(LiveMatch.match_id == match_id)
+    ).first()
+    return LiveState(*row) if row else None
+
+
+def open_live_matches(db: Session) -> List[LiveState]:
+    rows = db.execute(
+        select(*_STATE_COLUMNS)
+        .join(Match, Match.id == LiveMatch.match_id)
+        .where(LiveMatch.status == LIVE)
+        .order_by(Match.kickoff, Match.id)
+    )
+    return [LiveState(*r) for r in rows]
+
+
+def events_since(db: Session, match_id: int, seq: int = 0) -> List[LiveEvent]:
+    # range scan sulla chiave primaria (match_id, seq)
+    rows = db.execute(
+        select(*_EVENT_COLUMNS)
+        .where(MatchEvent.match_id == match_id, MatchEvent.seq > seq)
+        .order_by(MatchEvent.seq)
+    )
+    return [LiveEvent(*r) for r in rows]
+
+
+def effective_events(events: List[LiveEvent]) -> Tuple[List[Dict], List[Dict]]:
+    # log -> (goals, cards) nella forma di MatchDraft, senza gli eventi annullati
+    retracted = {e.retracts_seq for e in events if e.kind == "retract"}
+    goals, cards = [], []
+    for e in events:
+        if e.seq in retracted:
+            continue
+        if e.kind == "goal":
+            goals.append({
+                "seq": e.seq, "player_team_id": e.player_team_id, "scorer_player_id": e.player_id,
+                "assist_player_id": e.assist_player_id, "minute": e.minute, "period": e.period,
+                "goal_type": e.event_type,
+            })
+        elif e.kind == "card":
+            cards.append({
+                "seq": e.seq, "player_team_id": e.player_team_id, "player_id": e.player_id,
+                "minute": e.minute, "period": e.period, "card_type": e.event_type,
+            })
+    return goals, cards
+
+
+# ---------------- Scritture ----------------
+def start_live_match(db: Session, draft: MatchDraft) -> int:
+    # draft senza eventi: partita a 0-0 + riga live, un commit (classifica solo a fine partita)
+    draft.goals, draft.cards = [], []
+    errors = validate_draft(draft)
+    if errors:
+        raise MatchValidationError(errors)
+    try:
+        match_id = db.scalar(insert(Match).values(**match_row(draft)).returning(Match.id))
+        db.execute(insert(LiveMatch).values(match_id=match_id, status=LIVE, started_at=datetime.now()))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return match_id
+
+
+def _score_delta(state: LiveState, kind: str, player_team_id: int, goal_type: Optional[str], sign: int = 1):
+    if kind != "goal":
+        return 0, 0
+    team_id = goal_team_id(player_team_id, goal_type, state.home_team_id, state.away_team_id)
+    return sign * (team_id == state.home_team_id), sign * (team_id == state.away_team_id)
+
+
+def _append(
+    db: Session, state: LiveState, row: Dict, dh: int, da: int,
+    check: Optional[Callable[[Session], None]] = None,
+) -> LiveState:
+    # 1) UPDATE ... RETURNING: prende il seq successivo e aggiorna il punteggio (solo se ancora live)
+    # 2) check opzionale, già con il lock di scrittura: nessun altro writer può appendere nel frattempo
+    # 3) INSERT dell'evento. Un commit, nessuna rilettura del log.
+    try:
+        res = db.execute(
+            update(LiveMatch)
+            .where(LiveMatch.match_id == state.match_id, LiveMatch.status == LIVE)
+            .values(
+                last_seq=LiveMatch.last_seq + 1,
+                home_score=LiveMatch.home_score + dh,
+                away_score=LiveMatch.away_score + da,
+            )
+            .returning(LiveMatch.last_seq, LiveMatch.home_score, LiveMatch.away_score)
+        ).first()
+        if res is None:
+            raise LiveMatchClosed(f"Partita {state.match_id} non è (più) live")
+        seq, home_score, away_score = res
+        if check is not None:
+            check(db)
+        db.execute(insert(MatchEvent).values(
+            match_id=state.match_id, seq=seq, created_at=datetime.now(), **row,
+        ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return state._replace(last_seq=seq, home_score=home_score, away_score=away_score)
+
+
+def append_goal(db: Session, state: LiveState, goal: Dict) -> LiveState:
+    # goal nella forma di MatchDraft.goals
+    errors = validate_event("goal", goal, {state.home_team_id, state.away_team_id})
+    if errors:
+        raise MatchValidationError(errors)
+    dh, da = _score_delta(state, "goal", goal["player_team_id"], goal["goal_type"])
+    return _append(db, state, {
+        "kind": "goal",
+        "player_team_id": goal["player_team_id"],
+        "player_id": goal.get("scorer_player_id"),
+        "assist_player_id": goal.get("assist_player_id"),
+        "minute": goal["minute"],
+        "period": goal["period"],
+        "event_type": goal["goal_type"],
+    }, dh, da)
+
+
+def append_card(db: Session, state: LiveState, card: Dict) -> LiveState:
+    errors = validate_event("card", card, {state.home_team_id, state.away_team_id})
+    if errors:
+        raise MatchValidationError(errors)
+    return _append(db, state, {
+        "kind": "card",
+        "player_team_id": card["player_team_id"],
+        "player_id": card.get("player_id"),
+        "minute": card["minute"],
+        "period": card["period"],
+        "event_type": card["card_type"],
+    }, 0, 0)
+
+
+def retract_event(db: Session, state: LiveState, seq: int) -> LiveState:
+    target = db.execute(
+        select(*_EVENT_COLUMNS).where(MatchEvent.match_id == state.match_id, MatchEvent.seq == seq)
+    ).first()
+    if target is None or target.kind not in ("goal", "card"):
+        raise MatchValidationError([f"Evento {seq} non annullabile"])
+    dh, da = _score_delta(state, target.kind, target.player_team_id, target.event_type, sign=-1)
+
+    def not_yet_retracted(tx: Session) -> None:
+        # dentro la transazione del writer, dopo l'UPDATE: due "annulla" concorrenti non passano entrambi
+        already = tx.scalar(
+            select(MatchEvent.seq).where(
+                MatchEvent.match_id == state.match_id, MatchEvent.kind == "retract", MatchEvent.retracts_seq == seq,
+            )
+        )
+        if already is not None:
+            raise MatchValidationError([f"Evento {seq} già annullato"])
+
+    try:
+        return _append(db, state, {"kind": "retract", "retracts_seq": seq}, dh, da, check=not_yet_retracted)
+    except IntegrityError:
+        # ux_match_events_retract: l'altro annullamento ha vinto
+        raise MatchValidationError([f"Evento {seq} già annullato"])
+
+
+def finalize_live_match(db: Session, match_id: int) -> Tuple[int, int]:
+    # chiude la partita: log -> Goal/Card, punteggio definitivo, classifica e statistiche. Un commit.
+    try:
+        closed = db.execute(
+            update(LiveMatch)
+            .where(LiveMatch.match_id == match_id, LiveMatch.status == LIVE)
+            .values(status=FINAL, finished_at=datetime.now())
+            .returning(LiveMatch.match_id)
+        ).first()
+        if closed is None:
+            raise LiveMatchClosed(f"Partita {match_id} non è (più) live")
+
+        m = db.execute(
+            select(Match.season_id, Match.matchday, Match.kickoff, Match.home_team_id, Match.away_team_id,
+                   Match.home_team_name, Match.away_team_name, Match.referee)
+            .where(Match.id == match_id)
+        ).one()
+        goals, cards = effective_events(events_since(db, match_id))
+        draft = MatchDraft(**m._asdict(), goals=goals, cards=cards, ref=str(match_id))
+        errors = validate_draft(draft)
+        if errors:
+            raise MatchValidationError(errors)
+
+        row = match_row(draft)
+        db.execute(
+            update(Match).where(Match.id == match_id)
+            .values(home_score=row["home_score"], away_score=row["away_score"])
+        )
+        write_match_events(db, [match_id], [draft], [row])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return row["home_score"], row["away_score"]
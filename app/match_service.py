@@ -0,0 +1,174 @@
+# app/match_service.py
+# Scrittura di una partita completa (match + gol + cartellini + classifica + statistiche giocatori)
+# in un'unica transazione: o tutto o niente, un solo commit (un solo fsync).
+# Usato dalla UI (ui/match_entry.py) e dall'import massivo (app/importer.py).
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .models import Card, Goal, Match
+from .player_stats import apply_events
+from .scoring import compute_live_score, goal_team_id
+from .standings import apply_match_results
+
+GOAL_TYPES = {"open_play", "penalty", "free_kick", "own_goal"}
+CARD_TYPES = {"yellow", "red", "second_yellow"}
+PERIODS = {"1T", "2T"}
+MAX_MINUTE = 130
+
+
+class MatchValidationError(ValueError):
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+@dataclass
+class MatchDraft:
+    # eventi nella stessa forma di st.session_state.goals in ui/match_entry.py:
+    #   goals: player_team_id, scorer_player_id, assist_player_id, minute, period, goal_type
+    #   cards: player_team_id, player_id, minute, period, card_type
+    # player_team_id = squadra del giocatore (per l'autogol il gol va all'avversaria)
+    season_id: int
+    matchday: int
+    kickoff: datetime
+    home_team_id: int
+    away_team_id: int
+    home_team_name: str = ""
+    away_team_name: str = ""
+    referee: Optional[str] = None
+    goals: List[Dict] = field(default_factory=list)
+    cards: List[Dict] = field(default_factory=list)
+    ref: Optional[str] = None  # riferimento esterno (es. match_ref dell'import) per i messaggi
+    match_ref: Optional[str] = None  # salvato su matches: chiave del reimport (app/importer.py)
+
+    def score(self) -> Tuple[int, int]:
+        return compute_live_score(self.goals, self.home_team_id, self.away_team_id)
+
+
+def validate_event(kind: str, ev: Dict, sides: Set[int], where: str = "") -> List[str]:
+    # kind: "goal" | "card"
+    types, type_key = (GOAL_TYPES, "goal_type") if kind == "goal" else (CARD_TYPES, "card_type")
+    errors = []
+    if ev.get("player_team_id") not in sides:
+        errors.append(f"{where}squadra non in campo")
+    if ev.get(type_key) not in types:
+        errors.append(f"{where}tipo non valido {ev.get(type_key)!r}")
+    if ev.get("period") not in PERIODS:
+        errors.append(f"{where}periodo non valido {ev.get('period')!r}")
+    minute = ev.get("minute")
+    if not isinstance(minute, int) or not 0 <= minute <= MAX_MINUTE:
+        errors.append(f"{where}minuto non valido {minute!r}")
+    return errors
+
+
+def validate_draft(draft: MatchDraft) -> List[str]:
+    where = f"Partita {draft.ref}: " if draft.ref else ""
+    errors = []
+    if not draft.season_id:
+        errors.append(f"{where}stagione mancante")
+    if not draft.home_team_id or not draft.away_team_id:
+        errors.append(f"{where}squadre mancanti")
+    elif draft.home_team_id == draft.away_team_id:
+        errors.append(f"{where}casa e trasferta coincidono")
+
+    sides = {draft.home_team_id, draft.away_team_id}
+    for i, g in enumerate(draft.goals, start=1):
+        errors += validate_event("goal", g, sides, f"{where}gol {i}: ")
+    for i, c in enumerate(draft.cards, start=1):
+        errors += validate_event("card", c, sides, f"{where}cartellino {i}: ")
+    return errors
+
+
+def match_row(draft: MatchDraft) -> Dict:
+    home_score, away_score = draft.score()
+    return {
+        "season_id": draft.season_id,
+        "matchday": draft.matchday,
+        "kickoff": draft.kickoff,
+        "home_team_id": draft.home_team_id,
+        "away_team_id": draft.away_team_id,
+        "home_team_name": draft.home_team_name,
+        "away_team_name": draft.away_team_name,
+        "referee": draft.referee,
+        "match_ref": draft.match_ref,
+        "home_score": home_score,
+        "away_score": away_score,
+    }
+
+
+def insert_matches(db: Session, drafts: Sequence[MatchDraft]) -> List[int]:
+    # nessun commit: lo fa il chiamante (save_match, oppure l'import a fine batch)
+    errors = [e for d in drafts for e in validate_draft(d)]
+    if errors:
+        raise MatchValidationError(errors)
+    if not drafts:
+        return []
+
+    match_rows = [match_row(d) for d in drafts]
+    match_ids = db.scalars(
+        insert(Match).returning(Match.id, sort_by_parameter_order=True),
+        match_rows,
+    ).all()
+
+    write_match_events(db, match_ids, drafts, match_rows)
+    return match_ids
+
+
+def write_match_events(
+    db: Session,
+    match_ids: Sequence[int],
+    drafts: Sequence[MatchDraft],
+    match_rows: List[Dict],
+) -> None:
+    # gol e cartellini (executemany) + classifica e statistiche giocatori, per partite già inserite
+    goal_rows, card_rows = [], []
+    for mid, d in zip(match_ids, drafts):
+        for g in d.goals:
+            goal_rows.append({
+                "match_id": mid,
+                "team_id": goal_team_id(g["player_team_id"], g["goal_type"], d.home_team_id, d.away_team_id),
+                "scorer_player_id": g.get("scorer_player_id"),
+                "assist_player_id": g.get("assist_player_id"),
+                "minute": g["minute"],
+                "period": g["period"],
+                "goal_type": g["goal_type"],
+            })
+        for c in d.cards:
+            card_rows.append({
+                "match_id": mid,
+                "team_id": c["player_team_id"],
+                "player_id": c.get("player_id"),
+                "minute": c["minute"],
+                "period": c["period"],
+                "card_type": c["card_type"],
+            })
+    if goal_rows:
+        db.execute(insert(Goal), goal_rows)
+    if card_rows:
+        db.execute(insert(Card), card_rows)
+
+    # aggregati nella stessa transazione
+    apply_match_results(db, match_rows)
+    for season_id in {d.season_id for d in drafts}:
+        season_mids = {mid for mid, d in zip(match_ids, drafts) if d.season_id == season_id}
+        apply_events(
+            db, season_id,
+            goals=[g for g in goal_rows if g["match_id"] in season_mids],
+            cards=[c for c in card_rows if c["match_id"] in season_mids],
+        )
+
+
+def save_match(db: Session, draft: MatchDraft) -> int:
+    try:
+        (match_id,) = insert_matches(db, [draft])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return match_id
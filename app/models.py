@@ -11,13 +11,17 @@ from sqlalchemy import (
     Date,
     ForeignKey,
     UniqueConstraint,
+    Index,
     JSON,
+    Boolean,
+    Float,
 )
-from sqlalchemy import Date, UniqueConstraint
+from sqlalchemy import Date, UniqueConstraint, select, text
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
+from .extras import promoted
 
 
 # -----------------------------
@@ -95,6 +99,10 @@ class Player(Base):
 
     current_team_season: Mapped["TeamSeason | None"] = relationship()
 
+    __table_args__ = (
+        # rosa di una squadra/stagione già ordinata per cognome, nome
+        Index("ix_players_team_season_name", "current_team_season_id", "last_name", "first_name"),
+    )
 
 
 # -----------------------------
@@ -113,7 +121,11 @@ class Match(Base):
     away_team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), nullable=False)
 
     referee: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # riferimento della partita nel file importato (app/importer.py); NULL per le partite inserite a mano
+    match_ref: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     extras: Mapped[Dict] = mapped_column(JSON, default=dict)  # ✅ callable
+    # promossi da extras (colonne generate + indice, vedi app/extras.py)
+    stadium: Mapped[Optional[str]] = promoted("stadium", String)
 
     # campi denormalizzati + risultato
     home_team_name: Mapped[str] = mapped_column(String, nullable=False, default="")
@@ -138,6 +150,17 @@ class Match(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        # giornata di una stagione (liste, standings, backtest)
+        Index("ix_matches_season_matchday", "season_id", "matchday", "kickoff"),
+        # scontri diretti / partite in casa di una squadra
+        Index("ix_matches_home_away", "home_team_id", "away_team_id"),
+        # partite in trasferta di una squadra
+        Index("ix_matches_away_season", "away_team_id", "season_id"),
+        # reimport dello stesso file: una partita per (stagione, match_ref)
+        Index("ux_matches_season_ref", "season_id", "match_ref", unique=True),
+    )
+
 
 class Goal(Base):
     __tablename__ = "goals"
@@ -155,6 +178,8 @@ class Goal(Base):
     goal_type: Mapped[str] = mapped_column(String, nullable=False)   # "open_play","penalty","free_kick","own_goal"
 
     extras: Mapped[Dict] = mapped_column(JSON, default=dict)  # ✅ callable
+    xg: Mapped[Optional[float]] = promoted("xg", Float)
+    body_part: Mapped[Optional[str]] = promoted("body_part", String)   # "right_foot","left_foot","head",...
 
     match: Mapped["Match"] = relationship("Match", back_populates="goals")
     team: Mapped["Team"] = relationship()
@@ -162,6 +187,12 @@ class Goal(Base):
     scorer: Mapped[Optional["Player"]] = relationship("Player", foreign_keys=[scorer_player_id])
     assist: Mapped[Optional["Player"]] = relationship("Player", foreign_keys=[assist_player_id])
 
+    __table_args__ = (
+        Index("ix_goals_match", "match_id", "minute"),
+        Index("ix_goals_scorer", "scorer_player_id"),
+        Index("ix_goals_assist", "assist_player_id"),
+    )
+
 
 class Card(Base):
     __tablename__ = "cards"
@@ -177,11 +208,17 @@ class Card(Base):
     card_type: Mapped[str] = mapped_column(String, nullable=False)  # "yellow","red","second_yellow"
 
     extras: Mapped[Dict] = mapped_column(JSON, default=dict)  # ✅ callable
+    var_reviewed: Mapped[Optional[bool]] = promoted("var_reviewed", Boolean)
 
     match: Mapped["Match"] = relationship("Match", back_populates="cards")
     team: Mapped["Team"] = relationship()
     player: Mapped[Optional["Player"]] = relationship()
 
+    __table_args__ = (
+        Index("ix_cards_match", "match_id", "minute"),
+        Index("ix_cards_player", "player_id"),
+    )
+
 
 class TeamSeason(Base):
     __tablename__ = "team_seasons"
@@ -196,4 +233,175 @@ class TeamSeason(Base):
 
     __table_args__ = (
         UniqueConstraint("team_id", "season_id", name="uq_team_season"),
+        # squadre di una stagione (uq_team_season parte da team_id)
+        Index("ix_team_seasons_season", "season_id"),
+    )
+
+
+# -----------------------------
+# Aggregati materializzati
+# -----------------------------
+class Standing(Base):
+    __tablename__ = "standings"
+
+    season_id: Mapped[int] = mapped_column(ForeignKey("seasons.id"), primary_key=True)
+    team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), primary_key=True)
+
+    played: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    won: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    drawn: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lost: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    goals_for: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    goals_against: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    points: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    home_played: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    home_won: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    home_drawn: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    home_lost: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    home_goals_for: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    home_goals_against: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    away_played: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    away_won: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    away_drawn: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    away_lost: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    away_goals_for: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    away_goals_against: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    team: Mapped["Team"] = relationship()
+    season: Mapped["Season"] = relationship()
+
+    __table_args__ = (
+        Index("ix_standings_season_points", "season_id", "points"),
+    )
+
+
+class PlayerSeasonStat(Base):
+    __tablename__ = "player_season_stats"
+
+    player_id: Mapped[int] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), primary_key=True)
+    season_id: Mapped[int] = mapped_column(ForeignKey("seasons.id"), primary_key=True)
+
+    goals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)        # autogol esclusi
+    assists: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    penalties: Mapped[int] = mapped_column(Integer, nullable=False, default=0)    # rigori segnati (inclusi in goals)
+    own_goals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    goals_1t: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    goals_2t: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    yellow_cards: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    second_yellow_cards: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    red_cards: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cards_1t: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cards_2t: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    player: Mapped["Player"] = relationship()
+    season: Mapped["Season"] = relationship()
+
+    __table_args__ = (
+        # classifiche marcatori / disciplina
+        Index("ix_player_stats_season_goals", "season_id", "goals"),
+        Index("ix_player_stats_season_assists", "season_id", "assists"),
+    )
+
+
+# -----------------------------
+# Live: partita in corso + log eventi append-only
+# -----------------------------
+class LiveMatch(Base):
+    __tablename__ = "live_matches"
+
+    match_id: Mapped[int] = mapped_column(ForeignKey("matches.id", ondelete="CASCADE"), primary_key=True)
+
+    status: Mapped[str] = mapped_column(String, nullable=False, default="live")   # "live","final"
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # punteggio corrente, aggiornato evento per evento (matches.*_score solo a fine partita)
+    home_score: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    away_score: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    match: Mapped["Match"] = relationship()
+
+    __table_args__ = (
+        Index("ix_live_matches_status", "status"),
+    )
+
+    @classmethod
+    def open_match_ids(cls):
+        # partite live non ancora chiuse: fuori da classifiche e analisi (0-0 provvisorio su matches)
+        return select(cls.match_id).where(cls.status == "live")
+
+
+class MatchEvent(Base):
+    __tablename__ = "match_events"
+
+    # (match_id, seq): ordine di inserimento e lettura "eventi dopo seq N" sulla chiave primaria
+    match_id: Mapped[int] = mapped_column(ForeignKey("matches.id", ondelete="CASCADE"), primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    kind: Mapped[str] = mapped_column(String, nullable=False)      # "goal","card","retract"
+    player_team_id: Mapped[Optional[int]] = mapped_column(ForeignKey("teams.id"), nullable=True)
+    player_id: Mapped[Optional[int]] = mapped_column(ForeignKey("players.id"), nullable=True)
+    assist_player_id: Mapped[Optional[int]] = mapped_column(ForeignKey("players.id"), nullable=True)
+    minute: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    period: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    event_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # goal_type / card_type
+    retracts_seq: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # solo kind="retract"
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # un evento si annulla una volta sola (anche con due "annulla" concorrenti)
+        Index(
+            "ux_match_events_retract", "match_id", "retracts_seq", unique=True,
+            sqlite_where=text("kind = 'retract'"), postgresql_where=text("kind = 'retract'"),
+        ),
     )
+
+
+# -----------------------------
+# Backtest per giornata (app/backtest.py)
+# -----------------------------
+class BacktestStep(Base):
+    __tablename__ = "backtest_steps"
+
+    season_id: Mapped[int] = mapped_column(ForeignKey("seasons.id"), primary_key=True)
+    matchday: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # impronta dei dati della giornata: se cambia, la giornata (e le successive) si ricalcolano
+    fingerprint: Mapped[str] = mapped_column(String, nullable=False)
+    # statistiche cumulative per squadra dopo questa giornata (punto di ripartenza della successiva)
+    state: Mapped[Dict] = mapped_column(JSON, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class BacktestScore(Base):
+    __tablename__ = "backtest_scores"
+
+    season_id: Mapped[int] = mapped_column(ForeignKey("seasons.id"), primary_key=True)
+    matchday: Mapped[int] = mapped_column(Integer, primary_key=True)
+    model: Mapped[str] = mapped_column(String, primary_key=True)     # "frequency","poisson"
+    market: Mapped[str] = mapped_column(String, primary_key=True)    # colonne di analytics.MARKET_COLUMNS
+
+    # somme (non medie): il riepilogo di più giornate è una SUM
+    n: Mapped[int] = mapped_column(Integer, nullable=False)
+    brier_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    log_loss_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+# -----------------------------
+# Versioni dati (cache / ETag)
+# -----------------------------
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    scope: Mapped[str] = mapped_column(String, primary_key=True)   # "data", "refdata"
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# listener di sessione che incrementano i contatori al commit
+from . import versioning  # noqa: E402,F401
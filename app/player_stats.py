@@ -0,0 +1,173 @@
+# app/player_stats.py
+# Statistiche materializzate giocatore/stagione (gol, assist, rigori, autogol,
+# cartellini, split 1T/2T). Aggiornate in modo incrementale quando si scrivono
+# gol e cartellini (nessun commit qui), ricostruibili con:
+#
+#   python -m app.player_stats --rebuild [--season ID]
+from __future__ import annotations
+
+import argparse
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, joinedload
+
+from .aggregates import increment_rows
+from .models import Card, Goal, Match, PlayerSeasonStat
+
+CARD_COLUMNS = {
+    "yellow": "yellow_cards",
+    "second_yellow": "second_yellow_cards",
+    "red": "red_cards",
+}
+
+# peso per la classifica disciplinare
+DISCIPLINE_POINTS = {"yellow_cards": 1, "second_yellow_cards": 2, "red_cards": 3}
+
+
+def _period_col(prefix: str, period: Optional[str]) -> Optional[str]:
+    if period == "1T":
+        return f"{prefix}_1t"
+    if period == "2T":
+        return f"{prefix}_2t"
+    return None
+
+
+def player_stat_deltas(
+    season_id: int,
+    goals: Iterable[Mapping] = (),
+    cards: Iterable[Mapping] = (),
+    sign: int = 1,
+) -> List[Dict]:
+    # goals: scorer_player_id, assist_player_id, goal_type, period
+    # cards: player_id, card_type, period
+    rows: List[Dict] = []
+
+    def add(player_id, **cols):
+        if player_id is not None:
+            rows.append({"player_id": player_id, "season_id": season_id}
+                        | {c: v * sign for c, v in cols.items()})
+
+    for g in goals:
+        if g["goal_type"] == "own_goal":
+            add(g["scorer_player_id"], own_goals=1)
+            continue
+        cols = {"goals": 1}
+        if g["goal_type"] == "penalty":
+            cols["penalties"] = 1
+        period_col = _period_col("goals", g.get("period"))
+        if period_col:
+            cols[period_col] = 1
+        add(g["scorer_player_id"], **cols)
+        add(g.get("assist_player_id"), assists=1)
+
+    for c in cards:
+        cols = {CARD_COLUMNS[c["card_type"]]: 1}
+        period_col = _period_col("cards", c.get("period"))
+        if period_col:
+            cols[period_col] = 1
+        add(c["player_id"], **cols)
+
+    return rows
+
+
+def apply_events(
+    db: Session,
+    season_id: int,
+    goals: Iterable[Mapping] = (),
+    cards: Iterable[Mapping] = (),
+    sign: int = 1,
+) -> None:
+    rows = player_stat_deltas(season_id, goals, cards, sign)
+    increment_rows(db, PlayerSeasonStat, ("player_id", "season_id"), rows)
+
+
+def rebuild_player_stats(db: Session, season_id: Optional[int] = None) -> int:
+    goals_q = select(
+        Match.season_id, Goal.scorer_player_id, Goal.assist_player_id, Goal.goal_type, Goal.period
+    ).join(Match, Goal.match_id == Match.id)
+    cards_q = select(
+        Match.season_id, Card.player_id, Card.card_type, Card.period
+    ).join(Match, Card.match_id == Match.id)
+    purge = delete(PlayerSeasonStat)
+    if season_id is not None:
+        goals_q = goals_q.where(Match.season_id == season_id)
+        cards_q = cards_q.where(Match.season_id == season_id)
+        purge = purge.where(PlayerSeasonStat.season_id == season_id)
+
+    # prima il DELETE (come rebuild_standings): le letture seguenti girano sul writer, nella stessa
+    # transazione, e una partita salvata nel frattempo non resta fuori dal ricalcolo
+    db.execute(purge)
+    by_season: Dict[int, Dict[str, List[Dict]]] = {}
+    n = 0
+    for row in db.execute(goals_q):
+        by_season.setdefault(row.season_id, {"goals": [], "cards": []})["goals"].append(row._asdict())
+        n += 1
+    for row in db.execute(cards_q):
+        by_season.setdefault(row.season_id, {"goals": [], "cards": []})["cards"].append(row._asdict())
+        n += 1
+
+    for sid, events in by_season.items():
+        apply_events(db, sid, events["goals"], events["cards"])
+    return n
+
+
+# ---------------- Classifiche ----------------
+def top_scorers(db: Session, season_id: int, limit: int = 20) -> List[PlayerSeasonStat]:
+    return (
+        db.query(PlayerSeasonStat)
+        .options(joinedload(PlayerSeasonStat.player))
+        .filter(PlayerSeasonStat.season_id == season_id, PlayerSeasonStat.goals > 0)
+        .order_by(
+            PlayerSeasonStat.goals.desc(),
+            PlayerSeasonStat.penalties.asc(),
+            PlayerSeasonStat.assists.desc(),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def top_assists(db: Session, season_id: int, limit: int = 20) -> List[PlayerSeasonStat]:
+    return (
+        db.query(PlayerSeasonStat)
+        .options(joinedload(PlayerSeasonStat.player))
+        .filter(PlayerSeasonStat.season_id == season_id, PlayerSeasonStat.assists > 0)
+        .order_by(PlayerSeasonStat.assists.desc(), PlayerSeasonStat.goals.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def discipline_ranking(db: Session, season_id: int, limit: int = 20) -> List[PlayerSeasonStat]:
+    points = sum(getattr(PlayerSeasonStat, col) * w for col, w in DISCIPLINE_POINTS.items())
+    return (
+        db.query(PlayerSeasonStat)
+        .options(joinedload(PlayerSeasonStat.player))
+        .filter(PlayerSeasonStat.season_id == season_id, points > 0)
+        .order_by(points.desc(), PlayerSeasonStat.red_cards.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+if __name__ == "__main__":
+    from .db import SessionLocal, engine
+    from .schema import ensure_schema_current
+
+    parser = argparse.ArgumentParser(description="Statistiche giocatore/stagione materializzate")
+    parser.add_argument("--rebuild", action="store_true", help="ricalcola da zero da gol e cartellini")
+    parser.add_argument("--season", type=int, default=None, help="solo questa stagione (id)")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.error("niente da fare: usa --rebuild")
+
+    ensure_schema_current(engine)
+    db = SessionLocal()
+    try:
+        n = rebuild_player_stats(db, args.season)
+        db.commit()
+        print(f"Statistiche giocatori ricostruite da {n} eventi")
+    finally:
+        db.close()
@@ -0,0 +1,272 @@
+# app/poisson.py
+# Modello Poisson dei gol attesi (forze attacco/difesa per squadra, fattore campo):
+#   log λ_casa      = μ + casa + att[home] - dif[away]
+#   log λ_trasferta = μ        + att[away] - dif[home]
+# Stimato per stagione con IRLS vettoriale (NumPy, due righe per partita) e pesi a
+# decadimento temporale (emivita HALF_LIFE_DAYS). I gol da autogol non dicono niente
+# sull'attacco di chi li riceve: si tolgono dal fit (righe Goal) e si riaggiungono
+# come tasso medio di lega.
+#
+# Dal fit: matrice dei risultati esatti, 1X2, over/under, goal/no goal per qualunque
+# partita. I parametri sono in cache per (stagione, versione dati, as_of): una giornata
+# intera è un'operazione su matrici, non un nuovo fit.
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from math import lgamma
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+
+from .analytics import GOAL_LINES
+from .models import Goal, LiveMatch, Match, TeamSeason
+from .versioning import DATA, current_version
+
+HALF_LIFE_DAYS = 120.0
+MAX_GOALS = 10           # matrice risultati 0..MAX_GOALS per squadra
+SHRINKAGE = 2.0          # ridge su att/dif: poche partite => squadre vicine alla media
+PRIOR_GOALS = 1.35       # gol medi per squadra a partita senza dati
+PRIOR_HOME = 0.2         # log del vantaggio casa senza dati
+MAX_ITER = 50
+TOL = 1e-8
+FIT_CACHE_SIZE = 64
+
+_LOG_FACTORIAL = np.array([lgamma(k + 1) for k in range(MAX_GOALS + 1)])
+
+
+@dataclass(frozen=True)
+class PoissonFit:
+    season_id: int
+    version: int
+    as_of: Optional[datetime]
+    team_ids: np.ndarray        # ordinati; attack/defence allineati
+    attack: np.ndarray
+    defence: np.ndarray
+    intercept: float            # μ
+    home_advantage: float       # in scala log
+    own_goal_rate: float        # autogol a favore, per squadra a partita
+    n_matches: int
+
+    def team_index(self, team_ids) -> np.ndarray:
+        # squadre sconosciute (neopromosse senza partite) => forza media (indice -1 => 0)
+        team_ids = np.asarray(team_ids)
+        if len(self.team_ids) == 0:
+            return np.full(len(team_ids), -1)
+        pos = np.minimum(np.searchsorted(self.team_ids, team_ids), len(self.team_ids) - 1)
+        return np.where(self.team_ids[pos] == team_ids, pos, -1)
+
+    def expected_goals(self, home_ids, away_ids) -> Tuple[np.ndarray, np.ndarray]:
+        att = np.append(self.attack, 0.0)     # indice -1 => 0.0
+        dfc = np.append(self.defence, 0.0)
+        h, a = self.team_index(home_ids), self.team_index(away_ids)
+        lam_home = np.exp(self.intercept + self.home_advantage + att[h] - dfc[a]) + self.own_goal_rate
+        lam_away = np.exp(self.intercept + att[a] - dfc[h]) + self.own_goal_rate
+        return lam_home, lam_away
+
+
+# ---------------- Dati ----------------
+def fit_rows_select(season_id: int, as_of: Optional[datetime] = None):
+    # partite concluse prima di as_of + autogol a favore per (partita, squadra)
+    own_goals = (
+        select(Goal.match_id, Goal.team_id, func.count().label("n"))
+        .join(Match, Goal.match_id == Match.id)
+        .where(Match.season_id == season_id, Goal.goal_type == "own_goal")
+        .group_by(Goal.match_id, Goal.team_id)
+        .subquery()
+    )
+    og_home, og_away = own_goals.alias("og_home"), own_goals.alias("og_away")
+    stmt = (
+        select(
+            Match.kickoff, Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score,
+            func.coalesce(og_home.c.n, 0), func.coalesce(og_away.c.n, 0),
+        )
+        .outerjoin(og_home, (og_home.c.match_id == Match.id) & (og_home.c.team_id == Match.home_team_id))
+        .outerjoin(og_away, (og_away.c.match_id == Match.id) & (og_away.c.team_id == Match.away_team_id))
+        .where(Match.season_id == season_id, Match.id.not_in(LiveMatch.open_match_ids()))
+    )
+    if as_of is not None:
+        stmt = stmt.where(Match.kickoff < as_of)
+    return stmt
+
+
+def _load_rows(conn: Connection, season_id: int, as_of: Optional[datetime]):
+    rows = conn.execute(fit_rows_select(season_id, as_of)).all()
+    teams = conn.execute(select(TeamSeason.team_id).where(TeamSeason.season_id == season_id)).scalars().all()
+    return rows, teams
+
+
+# ---------------- Fit ----------------
+def fit_poisson(
+    kickoff: np.ndarray,
+    home_ids: np.ndarray,
+    away_ids: np.ndarray,
+    home_goals: np.ndarray,
+    away_goals: np.ndarray,
+    team_ids: np.ndarray,
+    ref_time: Optional[np.datetime64] = None,
+    half_life_days: float = HALF_LIFE_DAYS,
+) -> Tuple[float, float, np.ndarray, np.ndarray]:
+    # IRLS su GLM Poisson con ridge verso il prior; ritorna (μ, casa, att, dif)
+    n_teams = len(team_ids)
+    n_params = 2 + 2 * n_teams
+    beta = np.zeros(n_params)
+    beta[0], beta[1] = np.log(PRIOR_GOALS), PRIOR_HOME
+    prior = beta.copy()
+
+    # ridge: debole su μ/casa, SHRINKAGE su att/dif (le rende anche identificabili)
+    ridge = np.full(n_params, SHRINKAGE)
+    ridge[:2] = 0.1
+    if len(kickoff) == 0:
+        return beta[0], beta[1], beta[2:2 + n_teams], beta[2 + n_teams:]
+
+    h = np.searchsorted(team_ids, home_ids)
+    a = np.searchsorted(team_ids, away_ids)
+    n = len(h)
+
+    # due righe per partita: gol casa, gol trasferta
+    rows = np.arange(2 * n)
+    X = np.zeros((2 * n, n_params))
+    X[:, 0] = 1.0
+    X[:n, 1] = 1.0
+    X[rows[:n], 2 + h] = 1.0
+    X[rows[:n], 2 + n_teams + a] = -1.0
+    X[rows[n:], 2 + a] = 1.0
+    X[rows[n:], 2 + n_teams + h] = -1.0
+    y = np.concatenate([home_goals, away_goals]).astype(float)
+
+    kickoff = kickoff.astype("datetime64[s]")
+    ref = kickoff.max() if ref_time is None else np.datetime64(ref_time, "s")
+    age_days = (ref - kickoff).astype("timedelta64[s]").astype(float) / 86400.0
+    w = np.tile(0.5 ** (np.maximum(age_days, 0.0) / half_life_days), 2)
+
+    for _ in range(MAX_ITER):
+        eta = X @ beta
+        mu = np.exp(eta)
+        z = eta + (y - mu) / mu
+        wm = w * mu
+        lhs = (X.T * wm) @ X + np.diag(ridge)
+        rhs = (X.T * wm) @ z + ridge * prior
+        new_beta = np.linalg.solve(lhs, rhs)
+        if np.max(np.abs(new_beta - beta)) < TOL:
+            beta = new_beta
+            break
+        beta = new_beta
+
+    return beta[0], beta[1], beta[2:2 + n_teams], beta[2 + n_teams:]
+
+
+def build_fit(bind: Engine | Connection, season_id: int, as_of: Optional[datetime] = None,
+              version: Optional[int] = None) -> PoissonFit:
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return build_fit(conn, season_id, as_of, version)
+
+    if version is None:
+        version = current_version(bind, DATA)
+    rows, season_teams = _load_rows(bind, season_id, as_of)
+    cols = list(zip(*rows)) if rows else [[]] * 7
+    kickoff = np.array(cols[0], dtype="datetime64[s]")
+    home_ids, away_ids = np.array(cols[1], dtype=np.int64), np.array(cols[2], dtype=np.int64)
+    og_home, og_away = np.array(cols[5], dtype=np.int64), np.array(cols[6], dtype=np.int64)
+    # autogol fuori dal fit (vedi intestazione)
+    home_goals = np.array(cols[3], dtype=np.int64) - og_home
+    away_goals = np.array(cols[4], dtype=np.int64) - og_away
+
+    team_ids = np.unique(np.concatenate([np.array(season_teams, dtype=np.int64), home_ids, away_ids]))
+    ref_time = np.datetime64(as_of, "s") if as_of is not None else None
+    mu, home, att, dfc = fit_poisson(kickoff, home_ids, away_ids, home_goals, away_goals, team_ids, ref_time)
+    own_goal_rate = float((og_home.sum() + og_away.sum()) / (2 * len(rows))) if rows else 0.0
+
+    return PoissonFit(
+        season_id=season_id, version=version, as_of=as_of, team_ids=team_ids,
+        attack=att, defence=dfc, intercept=float(mu), home_advantage=float(home),
+        own_goal_rate=own_goal_rate, n_matches=len(rows),
+    )
+
+
+_cache: LRUCache = LRUCache(maxsize=FIT_CACHE_SIZE)
+_lock = threading.Lock()
+
+
+def get_fit(bind: Engine | Connection, season_id: int, as_of: Optional[datetime] = None) -> PoissonFit:
+    # una SELECT sulla versione dati; rifit solo se qualcuno ha scritto
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return get_fit(conn, season_id, as_of)
+    version = current_version(bind, DATA)
+    key = (season_id, version, as_of)
+    with _lock:
+        fit = _cache.get(key)
+    if fit is None:
+        fit = build_fit(bind, season_id, as_of, version)
+        with _lock:
+            _cache[key] = fit
+    return fit
+
+
+# ---------------- Probabilità ----------------
+def score_matrix(lam_home: np.ndarray, lam_away: np.ndarray, max_goals: int = MAX_GOALS) -> np.ndarray:
+    # (n, max_goals+1, max_goals+1): [i, x, y] = P(casa x, trasferta y); la coda oltre max_goals
+    # (~1e-4 con λ alti) è ridistribuita normalizzando, così i mercati sommano a 1
+    k = np.arange(max_goals + 1)
+    log_fact = _LOG_FACTORIAL[: max_goals + 1]
+    lam_home, lam_away = np.atleast_1d(lam_home), np.atleast_1d(lam_away)
+    p_home = np.exp(k * np.log(lam_home)[:, None] - lam_home[:, None] - log_fact)
+    p_away = np.exp(k * np.log(lam_away)[:, None] - lam_away[:, None] - log_fact)
+    matrix = p_home[:, :, None] * p_away[:, None, :]
+    return matrix / matrix.sum(axis=(1, 2), keepdims=True)
+
+
+def market_probabilities(matrix: np.ndarray, lines: Sequence[float] = GOAL_LINES) -> Dict[str, np.ndarray]:
+    g = matrix.shape[-1]
+    diff = np.subtract.outer(np.arange(g), np.arange(g))
+    total = np.add.outer(np.arange(g), np.arange(g))
+    out = {
+        "home": (matrix * (diff > 0)).sum(axis=(1, 2)),
+        "draw": (matrix * (diff == 0)).sum(axis=(1, 2)),
+        "away": (matrix * (diff < 0)).sum(axis=(1, 2)),
+        # goal/no goal: entrambe a segno = 1 - P(casa 0) - P(trasferta 0) + P(0-0)
+        "btts": 1.0 - matrix[:, 0, :].sum(axis=1) - matrix[:, :, 0].sum(axis=1) + matrix[:, 0, 0],
+    }
+    for line in lines:
+        over = (matrix * (total > line)).sum(axis=(1, 2))
+        out[f"over_{line}"] = over
+        out[f"under_{line}"] = 1.0 - over
+    return out
+
+
+def predict_fixtures(fit: PoissonFit, home_ids: Sequence[int], away_ids: Sequence[int]) -> pd.DataFrame:
+    # una riga per partita: gol attesi + mercati (tutto vettoriale)
+    lam_home, lam_away = fit.expected_goals(home_ids, away_ids)
+    markets = market_probabilities(score_matrix(lam_home, lam_away))
+    return pd.DataFrame({
+        "home_team_id": np.asarray(home_ids), "away_team_id": np.asarray(away_ids),
+        "xg_home": lam_home, "xg_away": lam_away, **markets,
+    })
+
+
+def predict_matchday(bind: Engine | Connection, season_id: int, matchday: int) -> pd.DataFrame:
+    # partite della giornata con il fit "prima del calcio d'inizio" (solo partite precedenti)
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return predict_matchday(conn, season_id, matchday)
+    fixtures = bind.execute(
+        select(Match.id, Match.kickoff, Match.home_team_id, Match.away_team_id,
+               Match.home_team_name, Match.away_team_name)
+        .where(Match.season_id == season_id, Match.matchday == matchday)
+        .order_by(Match.kickoff, Match.id)
+    ).all()
+    if not fixtures:
+        return pd.DataFrame()
+    fit = get_fit(bind, season_id, as_of=min(f.kickoff for f in fixtures))
+    out = predict_fixtures(fit, [f.home_team_id for f in fixtures], [f.away_team_id for f in fixtures])
+    out.insert(0, "match_id", [f.id for f in fixtures])
+    out.insert(3, "home_team_name", [f.home_team_name for f in fixtures])
+    out.insert(4, "away_team_name", [f.away_team_name for f in fixtures])
+    return out
@@ -0,0 +1,178 @@
+# app/queries.py
+# Query di lettura condivise dalle pagine UI.
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Query, Session, joinedload
+
+from .models import Player, Team, TeamSeason
+from .readmodels import RosterRow, roster_select
+from .search import has_search_index, search_hits
+
+
+# ---------------- Rosa giocatori ----------------
+def _roster_options():
+    # Player -> TeamSeason -> (Team, Season) + Country in un'unica SELECT con JOIN
+    return (
+        joinedload(Player.current_team_season).joinedload(TeamSeason.team),
+        joinedload(Player.current_team_season).joinedload(TeamSeason.season),
+        joinedload(Player.country),
+    )
+
+
+def roster_query(
+    db: Session,
+    team_season_id: Optional[int] = None,
+    search: Optional[str] = None,
+) -> Query:
+    q = db.query(Player).options(*_roster_options())
+    if team_season_id is not None:
+        q = q.filter(Player.current_team_season_id == team_season_id)
+
+    if search and search.strip():
+        if has_search_index(db.get_bind()):
+            # indice FTS5: prefisso + accenti ignorati, ordinato per rilevanza
+            hits = search_hits(search)
+            if hits is None:
+                return q.filter(False)
+            q = q.join(hits, hits.c.player_id == Player.id)
+            return q.order_by(hits.c.rank, Player.last_name, Player.first_name, Player.id)
+
+        s = f"%{search.strip()}%"
+        q = q.filter(
+            (Player.last_name.ilike(s)) |
+            (Player.first_name.ilike(s)) |
+            (Player.full_name.ilike(s))
+        )
+    return q.order_by(Player.last_name, Player.first_name, Player.id)
+
+
+def load_roster(
+    db: Session,
+    team_season_id: Optional[int] = None,
+    search: Optional[str] = None,
+) -> List[Player]:
+    return roster_query(db, team_season_id, search).all()
+
+
+def roster_page(
+    db: Session,
+    team_season_id: Optional[int] = None,
+    search: Optional[str] = None,
+    after: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+) -> List[RosterRow]:
+    # una pagina della griglia: solo colonne (niente oggetti ORM), keyset su (last_name, first_name, id)
+    # con la ricerca l'ordine resta alfabetico: la rilevanza non è compatibile col keyset
+    stmt = roster_select()
+    if team_season_id is not None:
+        stmt = stmt.where(Player.current_team_season_id == team_season_id)
+
+    if search and search.strip():
+        if has_search_index(db.get_bind()):
+            hits = search_hits(search)
+            if hits is None:
+                return []
+            stmt = stmt.join(hits, hits.c.player_id == Player.id)
+        else:
+            s = f"%{search.strip()}%"
+            stmt = stmt.where(
+                (Player.last_name.ilike(s)) |
+                (Player.first_name.ilike(s)) |
+                (Player.full_name.ilike(s))
+            )
+
+    if after is not None:
+        last, first, pid = after
+        stmt = stmt.where(tuple_(Player.last_name, Player.first_name, Player.id) > tuple_(last, first, pid))
+    return [RosterRow(*r) for r in db.execute(
+        stmt.order_by(Player.last_name, Player.first_name, Player.id).limit(limit))]
+
+
+def get_player_with_roster(db: Session, player_id: int) -> Optional[Player]:
+    return db.query(Player).options(*_roster_options()).filter(Player.id == player_id).first()
+
+
+CARD_ICONS = {"yellow": "🟨", "second_yellow": "🟨🟥", "red": "🟥"}
+
+
+# ---------------- Nomi per id (cache per sessione) ----------------
+def resolve_display_names(
+    db: Session,
+    player_ids: Iterable[Optional[int]],
+    team_ids: Iterable[Optional[int]],
+    cache: Dict[str, Dict[int, str]],
+) -> Dict[str, Dict[int, str]]:
+    # cache = {"players": {id: "Cognome Nome"}, "teams": {id: nome}}
+    # interroga il DB solo per gli id non ancora in cache: una SELECT per entità
+    players = cache.setdefault("players", {})
+    teams = cache.setdefault("teams", {})
+
+    missing_players = {pid for pid in player_ids if pid is not None and pid not in players}
+    if missing_players:
+        rows = db.execute(
+            select(Player.id, Player.last_name, Player.first_name).where(Player.id.in_(missing_players))
+        )
+        for pid, last, first in rows:
+            players[pid] = f"{last} {first}"
+
+    missing_teams = {tid for tid in team_ids if tid is not None and tid not in teams}
+    if missing_teams:
+        rows = db.execute(select(Team.id, Team.name).where(Team.id.in_(missing_teams)))
+        for tid, name in rows:
+            teams[tid] = name
+
+    return cache
+
+
+def goal_table_rows(
+    db: Session,
+    goals: List[Mapping],
+    cache: Dict[str, Dict[int, str]],
+) -> List[Dict]:
+    resolve_display_names(
+        db,
+        player_ids=[g["scorer_player_id"] for g in goals] + [g["assist_player_id"] for g in goals],
+        team_ids=[g["player_team_id"] for g in goals],
+        cache=cache,
+    )
+    players, teams = cache["players"], cache["teams"]
+
+    return [
+        {
+            "Squadra giocatore": teams.get(g["player_team_id"]),
+            "Marcatore": players.get(g["scorer_player_id"]),
+            "Assist": players.get(g["assist_player_id"]) if g["assist_player_id"] else None,
+            "Min": g["minute"],
+            "Periodo": g["period"],
+            "Tipo": "⚽" if g["goal_type"] != "own_goal" else "🔁 OG",
+        }
+        for g in goals
+    ]
+
+
+def card_table_rows(
+    db: Session,
+    cards: List[Mapping],
+    cache: Dict[str, Dict[int, str]],
+) -> List[Dict]:
+    resolve_display_names(
+        db,
+        player_ids=[c["player_id"] for c in cards],
+        team_ids=[c["player_team_id"] for c in cards],
+        cache=cache,
+    )
+    players, teams = cache["players"], cache["teams"]
+
+    return [
+        {
+            "Squadra": teams.get(c["player_team_id"]),
+            "Giocatore": players.get(c["player_id"]) if c["player_id"] else None,
+            "Min": c["minute"],
+            "Periodo": c["period"],
+            "Tipo": CARD_ICONS.get(c["card_type"], c["card_type"]),
+        }
+        for c in cards
+    ]
@@ -0,0 +1,107 @@
+# app/query_plans.py
+# Controllo di regressione sugli indici: EXPLAIN QUERY PLAN delle query "calde"
+# su un DB vuoto creato dalle migrazioni (come in produzione).
+# Fallisce se una query scorre una tabella intera, anche lungo un indice
+# ("SCAN x USING [COVERING] INDEX" = tutto l'indice): l'unico SCAN ammesso è la virtual table FTS.
+# Gli stessi controlli girano in tests/test_query_plans.py e in bench/suite.py.
+#
+#   python -m app.query_plans
+from __future__ import annotations
+
+import re
+import sys
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, func, or_, select, text
+from sqlalchemy.engine import Engine
+
+from .models import Card, Goal, LiveMatch, Match, MatchEvent, Player, Team, TeamSeason
+from .poisson import fit_rows_select
+from .schema import upgrade_schema
+from .search import SEARCH_TABLE, search_hits
+
+
+def hot_queries() -> Dict[str, object]:
+    hits = search_hits("leao")
+    return {
+        "roster per team-season": (
+            select(Player)
+            .where(Player.current_team_season_id == 1)
+            .order_by(Player.last_name, Player.first_name)
+        ),
+        "ricerca giocatori (FTS)": (
+            select(Player).join(hits, hits.c.player_id == Player.id).order_by(hits.c.rank)
+        ),
+        "nomi giocatori per id": select(Player.id, Player.last_name).where(Player.id.in_([1, 2, 3])),
+        "nomi squadre per id": select(Team.id, Team.name).where(Team.id.in_([1, 2])),
+        "squadre di una stagione": select(TeamSeason).where(TeamSeason.season_id == 1),
+        "partite di una giornata": (
+            select(Match).where(Match.season_id == 1, Match.matchday == 3).order_by(Match.kickoff)
+        ),
+        "partite di una stagione": select(Match).where(Match.season_id == 1).order_by(Match.matchday),
+        "partite di una squadra": (
+            select(Match).where(or_(Match.home_team_id == 1, Match.away_team_id == 1))
+        ),
+        "scontri diretti": select(Match).where(Match.home_team_id == 1, Match.away_team_id == 2),
+        "gol di una partita": select(Goal).where(Goal.match_id == 1).order_by(Goal.minute),
+        "cartellini di una partita": select(Card).where(Card.match_id == 1).order_by(Card.minute),
+        "gol di un giocatore": select(func.count()).select_from(Goal).where(Goal.scorer_player_id == 1),
+        "assist di un giocatore": select(func.count()).select_from(Goal).where(Goal.assist_player_id == 1),
+        "cartellini di un giocatore": select(Card).where(Card.player_id == 1),
+        "gol di una stagione": (
+            select(Goal).join(Match, Goal.match_id == Match.id).where(Match.season_id == 1)
+        ),
+        "eventi live dopo seq": (
+            select(MatchEvent).where(MatchEvent.match_id == 1, MatchEvent.seq > 5).order_by(MatchEvent.seq)
+        ),
+        "partite live aperte": select(LiveMatch).where(LiveMatch.status == "live"),
+        # attributi promossi da extras (app/extras.py)
+        "gol con xg alto": select(Goal.id, Goal.match_id).where(Goal.xg > 0.3),
+        "cartellini rivisti al VAR": select(Card.id, Card.match_id).where(Card.var_reviewed.is_(True)),
+        "partite per stadio": select(Match.id).where(Match.stadium == "San Siro"),
+        "dati modello Poisson": fit_rows_select(1),
+    }
+
+
+# "SCAN matches", "SCAN matches USING INDEX ix" (SQLite < 3.36: "SCAN TABLE matches ...")
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_SCAN_ALLOWED = {SEARCH_TABLE}
+
+
+def explain(engine: Engine, stmt) -> List[str]:
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    # tabelle scorse per intero in un piano
+    scans = (_FULL_SCAN.match(step.strip()) for step in plan)
+    return [m.group(1) for m in scans if m and m.group(1) not in _SCAN_ALLOWED]
+
+
+def empty_engine() -> Engine:
+    engine = create_engine("sqlite://")
+    upgrade_schema(engine)
+    return engine
+
+
+def check_query_plans(engine: Engine | None = None) -> List[Tuple[str, List[str]]]:
+    engine = engine or empty_engine()
+    failures = []
+    for name, stmt in hot_queries().items():
+        plan = explain(engine, stmt)
+        if full_scans(plan):
+            failures.append((name, plan))
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_query_plans()
+    for name, plan in failures:
+        print(f"FULL SCAN: {name}")
+        for step in plan:
+            print(f"    {step}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(hot_queries())} query senza full scan")
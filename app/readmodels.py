@@ -0,0 +1,154 @@
+# app/readmodels.py
+# Read model per selectbox ed elenchi: NamedTuple con le sole colonne mostrate, caricate con
+# SELECT di colonne (niente oggetti ORM: niente identity map, stato di instrumentation,
+# extras JSON deserializzato). Per modificare un record si passa dall'ORM con l'id.
+# bench/bench_readmodels.py confronta memoria e latenza con il percorso ORM.
+from __future__ import annotations
+
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from .models import Competition, Country, Player, Season, Team, TeamSeason
+from .search import has_search_index, search_hits
+
+
+# ---------------- Dati di riferimento (cache in app/refdata.py) ----------------
+class CountryRow(NamedTuple):
+    id: int
+    name: str
+    code: str
+
+
+class CompetitionRow(NamedTuple):
+    id: int
+    name: str
+    country_id: int
+    division: int
+
+
+class SeasonRow(NamedTuple):
+    id: int
+    competition_id: int
+    name: str
+
+
+class TeamRow(NamedTuple):
+    id: int
+    name: str
+
+
+class TeamSeasonRow(NamedTuple):
+    id: int
+    team_id: int
+    season_id: int
+    team_name: str
+
+
+def country_rows(db: Session) -> List[CountryRow]:
+    return [CountryRow(*r) for r in db.execute(
+        select(Country.id, Country.name, Country.code).order_by(Country.name))]
+
+
+def competition_rows(db: Session) -> List[CompetitionRow]:
+    return [CompetitionRow(*r) for r in db.execute(
+        select(Competition.id, Competition.name, Competition.country_id, Competition.division)
+        .order_by(Competition.name))]
+
+
+def season_rows(db: Session) -> List[SeasonRow]:
+    return [SeasonRow(*r) for r in db.execute(
+        select(Season.id, Season.competition_id, Season.name).order_by(Season.name))]
+
+
+def team_rows(db: Session) -> List[TeamRow]:
+    return [TeamRow(*r) for r in db.execute(select(Team.id, Team.name).order_by(Team.name))]
+
+
+def team_season_rows(db: Session) -> List[TeamSeasonRow]:
+    return [TeamSeasonRow(*r) for r in db.execute(
+        select(TeamSeason.id, TeamSeason.team_id, TeamSeason.season_id, Team.name)
+        .join(Team, TeamSeason.team_id == Team.id)
+        .order_by(Team.name))]
+
+
+# ---------------- Giocatori ----------------
+class PlayerOption(NamedTuple):
+    # voce di una selectbox (marcatore, assist, cartellino)
+    id: int
+    last_name: str
+    first_name: str
+    jersey_number: Optional[int]
+
+    @property
+    def label(self) -> str:
+        return f"{self.last_name} {self.first_name} (#{self.jersey_number or '-'})"
+
+
+def player_options(db: Session, team_season_id: int) -> List[PlayerOption]:
+    # ix_players_team_season_name: ricerca per team-season già ordinata per nome
+    return [PlayerOption(*r) for r in db.execute(
+        select(Player.id, Player.last_name, Player.first_name, Player.jersey_number)
+        .where(Player.current_team_season_id == team_season_id)
+        .order_by(Player.last_name, Player.first_name, Player.id))]
+
+
+class RosterRow(NamedTuple):
+    id: int
+    last_name: str
+    first_name: str
+    full_name: Optional[str]
+    jersey_number: Optional[int]
+    birth_date: Optional[date]
+    age_years: Optional[int]
+    macro_role: Optional[str]
+    micro_roles: List[str]
+    team_name: Optional[str]
+    season_name: Optional[str]
+    country_code: Optional[str]
+
+
+def roster_select() -> Select:
+    # colonne di RosterRow, nello stesso ordine; squadra/stagione/paese con outer join
+    return (
+        select(
+            Player.id, Player.last_name, Player.first_name, Player.full_name, Player.jersey_number,
+            Player.birth_date, Player.age_years, Player.macro_role, Player.micro_roles,
+            Team.name.label("team_name"), Season.name.label("season_name"),
+            Country.code.label("country_code"),
+        )
+        .outerjoin(TeamSeason, Player.current_team_season_id == TeamSeason.id)
+        .outerjoin(Team, TeamSeason.team_id == Team.id)
+        .outerjoin(Season, TeamSeason.season_id == Season.id)
+        .outerjoin(Country, Player.country_id == Country.id)
+    )
+
+
+def roster_rows(
+    db: Session,
+    team_season_id: Optional[int] = None,
+    search: Optional[str] = None,
+) -> List[RosterRow]:
+    # elenco completo (stesso ordine di queries.load_roster): per nome, o per rilevanza con la ricerca
+    stmt = roster_select()
+    if team_season_id is not None:
+        stmt = stmt.where(Player.current_team_season_id == team_season_id)
+
+    order = (Player.last_name, Player.first_name, Player.id)
+    if search and search.strip():
+        if has_search_index(db.get_bind()):
+            hits = search_hits(search)
+            if hits is None:
+                return []
+            stmt = stmt.join(hits, hits.c.player_id == Player.id)
+            order = (hits.c.rank,) + order
+        else:
+            s = f"%{search.strip()}%"
+            stmt = stmt.where(
+                (Player.last_name.ilike(s)) |
+                (Player.first_name.ilike(s)) |
+                (Player.full_name.ilike(s))
+            )
+    return [RosterRow(*r) for r in db.execute(stmt.order_by(*order))]
@@ -0,0 +1,88 @@
+# app/refdata.py
+# Cache di processo (condivisa tra tutte le sessioni Streamlit) dei dati di riferimento:
+# Country, Competition, Season, Team, TeamSeason. Righe leggere (NamedTuple di app/readmodels.py),
+# non oggetti ORM attaccati a una sessione. Invalidata dal contatore "refdata" di app/versioning.py,
+# che viene incrementato al commit di qualunque scrittura su queste tabelle
+# (get_or_create, get_or_create_country, creazione competizione/stagione/TeamSeason...).
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .readmodels import (
+    CompetitionRow,
+    CountryRow,
+    SeasonRow,
+    TeamRow,
+    TeamSeasonRow,
+    competition_rows,
+    country_rows,
+    season_rows,
+    team_rows,
+    team_season_rows,
+)
+from .versioning import REFDATA, current_version
+
+
+@dataclass(frozen=True)
+class RefData:
+    version: int
+    countries: List[CountryRow]          # ordinati per nome
+    competitions: List[CompetitionRow]   # ordinati per nome
+    seasons: List[SeasonRow]             # ordinati per nome
+    teams: List[TeamRow]                 # ordinati per nome
+    team_seasons: List[TeamSeasonRow]    # ordinati per nome squadra
+
+    countries_by_id: Dict[int, CountryRow] = field(default_factory=dict)
+    competitions_by_id: Dict[int, CompetitionRow] = field(default_factory=dict)
+    seasons_by_id: Dict[int, SeasonRow] = field(default_factory=dict)
+    teams_by_id: Dict[int, TeamRow] = field(default_factory=dict)
+    team_seasons_by_id: Dict[int, TeamSeasonRow] = field(default_factory=dict)
+
+    def seasons_of(self, competition_id: Optional[int]) -> List[SeasonRow]:
+        return [s for s in self.seasons if s.competition_id == competition_id]
+
+    def team_seasons_of(self, season_id: Optional[int]) -> List[TeamSeasonRow]:
+        return [ts for ts in self.team_seasons if ts.season_id == season_id]
+
+
+def load_refdata(db: Session, version: int) -> RefData:
+    countries = country_rows(db)
+    competitions = competition_rows(db)
+    seasons = season_rows(db)
+    teams = team_rows(db)
+    team_seasons = team_season_rows(db)
+
+    return RefData(
+        version=version,
+        countries=countries,
+        competitions=competitions,
+        seasons=seasons,
+        teams=teams,
+        team_seasons=team_seasons,
+        countries_by_id={r.id: r for r in countries},
+        competitions_by_id={r.id: r for r in competitions},
+        seasons_by_id={r.id: r for r in seasons},
+        teams_by_id={r.id: r for r in teams},
+        team_seasons_by_id={r.id: r for r in team_seasons},
+    )
+
+
+_lock = threading.Lock()
+_cached: Optional[RefData] = None
+
+
+def get_refdata(db: Session) -> RefData:
+    # una SELECT sul contatore per rerun; ricarica solo se qualcuno ha scritto
+    global _cached
+    version = current_version(db, REFDATA)
+    cached = _cached
+    if cached is not None and cached.version == version:
+        return cached
+    with _lock:
+        if _cached is None or _cached.version != version:
+            _cached = load_refdata(db, version)
+        return _cached
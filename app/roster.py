@@ -0,0 +1,87 @@
+# app/roster.py
+# Scrittura delle modifiche fatte nella griglia giocatori: tutte le celle modificate
+# e tutte le eliminazioni in un'unica transazione (o tutto o niente).
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import pandas as pd
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from .models import Player
+
+# colonne modificabili dalla griglia (le altre sono derivate o di sola lettura)
+EDITABLE_COLUMNS = ("last_name", "first_name", "full_name", "jersey_number", "birth_date", "macro_role", "micro_roles")
+
+
+def compute_age_years(birth: date | None) -> int | None:
+    if not birth:
+        return None
+    today = date.today()
+    years = today.year - birth.year
+    if (today.month, today.day) < (birth.month, birth.day):
+        years -= 1
+    return years
+
+
+def _as_date(pid: int, value: Any) -> Optional[date]:
+    # st.data_editor restituisce una stringa ("2000-01-01") se la colonna era tutta vuota
+    if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return pd.to_datetime(value).date()
+    except (ValueError, TypeError):
+        raise ValueError(f"Player ID={pid}: data di nascita non valida ({value!r}).") from None
+
+
+def roster_update_rows(updates: Mapping[int, Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    # {player_id: {colonna: valore}} -> righe per l'UPDATE bulk per chiave primaria;
+    # solleva ValueError se una modifica non è valida (niente scritture parziali)
+    rows = []
+    for pid, changes in updates.items():
+        row: Dict[str, Any] = {"id": int(pid)}
+        for col, value in changes.items():
+            if col not in EDITABLE_COLUMNS:
+                raise ValueError(f"Colonna non modificabile: {col}")
+            if col in ("last_name", "first_name"):
+                value = (value or "").strip()
+                if not value:
+                    raise ValueError(f"Player ID={pid}: nome e cognome sono obbligatori.")
+            elif col == "full_name":
+                value = (value or "").strip() or None
+            elif col == "jersey_number":
+                value = int(value) if value is not None else None
+            elif col == "micro_roles":
+                value = list(value or [])
+            elif col == "birth_date":
+                value = _as_date(pid, value)
+                row["age_years"] = compute_age_years(value)
+            row[col] = value
+        rows.append(row)
+    return rows
+
+
+def apply_roster_edits(
+    db: Session,
+    updates: Optional[Mapping[int, Mapping[str, Any]]] = None,
+    delete_ids: Iterable[int] = (),
+) -> None:
+    # una sola transazione: UPDATE executemany per chiave primaria + DELETE ... IN (...).
+    # Su errore (es. IntegrityError per un giocatore con gol/cartellini) rollback di tutto.
+    delete_ids = sorted({int(pid) for pid in delete_ids})
+    rows = [r for r in roster_update_rows(updates or {}) if r["id"] not in delete_ids]
+    try:
+        if rows:
+            db.execute(update(Player), rows)
+        if delete_ids:
+            db.execute(delete(Player).where(Player.id.in_(delete_ids)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
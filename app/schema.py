@@ -0,0 +1,160 @@
+# app/schema.py
+# Versione dello schema: migrazioni Alembic in migrations/ (alembic.ini nella root).
+# All'avvio di un processo si confronta la revisione salvata nel DB (una SELECT su
+# alembic_version) con la head delle migrazioni (letta dai file, senza importare Alembic):
+# se coincidono non si riflette nessuna tabella. Altrimenti si applicano le migrazioni.
+#
+# DB senza revisione (create_all, niente alembic_version o tabella vuota): se lo schema coincide
+# già con i modelli vengono marcati alla head, altrimenti alla baseline e portati avanti dalla
+# migrazione di catch-up. Su SQLite la migrazione gira in un'unica transazione (anche i DDL).
+from __future__ import annotations
+
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+ROOT = Path(__file__).resolve().parents[1]
+MIGRATIONS_DIR = ROOT / "migrations"
+BASELINE_REVISION = "0001"
+
+_REVISION = re.compile(r"^revision(?::[^=]*)?\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision(?::[^=]*)?\s*=\s*(.+)$", re.M)
+
+_head: Optional[str] = None
+
+
+def head_revision() -> str:
+    # revisione che nessun'altra ha come down_revision
+    global _head
+    if _head is None:
+        revisions, parents = set(), set()
+        for path in (MIGRATIONS_DIR / "versions").glob("*.py"):
+            source = path.read_text(encoding="utf-8")
+            rev = _REVISION.search(source)
+            if rev is None:
+                continue
+            revisions.add(rev.group(1))
+            down = _DOWN_REVISION.search(source)
+            if down:
+                parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down.group(1)))
+        heads = revisions - parents
+        if len(heads) != 1:
+            raise RuntimeError(f"Migrazioni: attesa una sola head, trovate {sorted(heads)}")
+        _head = heads.pop()
+    return _head
+
+
+def _version_row(conn: Connection) -> Optional[str]:
+    if not conn.dialect.has_table(conn, "alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def current_revision(bind: Engine | Connection) -> Optional[str]:
+    # None se il DB non ha (ancora) una revisione in alembic_version
+    engine = bind if isinstance(bind, Engine) else bind.engine
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        return None
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    from alembic.config import Config
+
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    if connection is not None:
+        cfg.attributes["connection"] = connection
+    return cfg
+
+
+def _matches_models(conn: Connection) -> bool:
+    # schema già identico ai modelli (es. create_all recente, bench/synth.py): niente da migrare
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+
+    from .models import Base
+    from .search import SEARCH_TABLE
+
+    def include_object(obj, name, type_, reflected, compare_to):
+        # come migrations/env.py: indice FTS5 fuori dal confronto
+        return not (type_ == "table" and reflected and name.startswith(SEARCH_TABLE))
+
+    ctx = MigrationContext.configure(conn, opts={"include_object": include_object})
+    return not compare_metadata(ctx, Base.metadata)
+
+
+@contextmanager
+def _migration_connection(engine: Engine) -> Iterator[Connection]:
+    # tutto o niente: pysqlite fa commit implicito prima di ogni DDL, quindi su SQLite
+    # BEGIN esplicito (DDL transazionale) e una migrazione fallita non lascia mezzo schema
+    with engine.connect() as conn:
+        dbapi_conn = conn.connection.driver_connection
+        sqlite = engine.dialect.name == "sqlite"
+        if sqlite:
+            previous = dbapi_conn.isolation_level
+            dbapi_conn.isolation_level = None
+            conn.begin()
+            # un listener "begin" dell'engine (es. bench/suite.py) può aver già aperto la transazione
+            if not dbapi_conn.in_transaction:
+                conn.exec_driver_sql("BEGIN")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if sqlite:
+                dbapi_conn.isolation_level = previous
+
+
+def _backfill_derived(conn: Connection) -> None:
+    # classifiche e statistiche giocatori sono derivate dalle partite: su un DB che ne ha già,
+    # 0002 le crea vuote (e gli aggiornamenti incrementali sommerebbero su zero) => ricalcolo,
+    # nella stessa transazione della migrazione
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+
+    from .models import Match, PlayerSeasonStat, Standing
+    from .player_stats import rebuild_player_stats
+    from .standings import rebuild_standings
+
+    with Session(bind=conn) as db:
+        if db.scalar(select(Match.id).limit(1)) is None:
+            return
+        if db.scalar(select(Standing.team_id).limit(1)) is None:
+            rebuild_standings(db)
+        if db.scalar(select(PlayerSeasonStat.player_id).limit(1)) is None:
+            rebuild_player_stats(db)
+        db.flush()
+
+
+def upgrade_schema(engine: Engine, revision: str = "head") -> Optional[str]:
+    from alembic import command
+    from sqlalchemy import inspect
+
+    with _migration_connection(engine) as conn:
+        cfg = alembic_config(conn)
+        # nessuna riga in alembic_version (anche tabella vuota lasciata da un vecchio errore)
+        if _version_row(conn) is None and inspect(conn).has_table("players"):
+            command.stamp(cfg, "head" if _matches_models(conn) else BASELINE_REVISION)
+        command.upgrade(cfg, revision)
+        if _version_row(conn) == head_revision():
+            _backfill_derived(conn)
+    return current_revision(engine)
+
+
+def ensure_schema_current(engine: Engine) -> bool:
+    # True se sono state applicate migrazioni
+    if current_revision(engine) == head_revision():
+        return False
+    upgrade_schema(engine)
+    return True
@@ -0,0 +1,22 @@
+# app/scoring.py
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+
+
+def goal_team_id(player_team_id: int, goal_type: str, home_id: int, away_id: int) -> int:
+    # autogol => gol alla squadra avversaria
+    if goal_type == "own_goal":
+        return home_id if player_team_id == away_id else away_id
+    return player_team_id
+
+
+def compute_live_score(goals: Iterable[Mapping], home_id: int, away_id: int) -> tuple[int, int]:
+    hs, as_ = 0, 0
+    for g in goals:
+        team_id = goal_team_id(g["player_team_id"], g["goal_type"], home_id, away_id)
+        if team_id == home_id:
+            hs += 1
+        elif team_id == away_id:
+            as_ += 1
+    return hs, as_
@@ -0,0 +1,126 @@
+# app/search.py
+# Indice di ricerca giocatori: tabella FTS5 "ombra" su players (solo SQLite).
+# - unicode61 remove_diacritics 2 => "Leao" trova "Leão"
+# - prefix index 2/3 caratteri  => "laut" trova "Lautaro" senza scan
+# - trigger su insert/update/delete => sempre allineata a players
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from sqlalchemy import DDL, Integer, column, event, select, table, text
+from sqlalchemy.engine import Connection, Engine
+
+from .models import Player
+
+SEARCH_TABLE = "player_search"
+
+_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        last_name, first_name, full_name,
+        content='players', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3'
+    )
+    """,
+    # ranking: il cognome pesa più del nome, il nome completo meno di entrambi
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0)')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS players_search_ai AFTER INSERT ON players BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, last_name, first_name, full_name)
+        VALUES (new.id, new.last_name, new.first_name, new.full_name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS players_search_ad AFTER DELETE ON players BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, last_name, first_name, full_name)
+        VALUES ('delete', old.id, old.last_name, old.first_name, old.full_name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS players_search_au
+    AFTER UPDATE OF last_name, first_name, full_name ON players BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, last_name, first_name, full_name)
+        VALUES ('delete', old.id, old.last_name, old.first_name, old.full_name);
+        INSERT INTO {SEARCH_TABLE}(rowid, last_name, first_name, full_name)
+        VALUES (new.id, new.last_name, new.first_name, new.full_name);
+    END
+    """,
+]
+
+# DB nuovi: l'indice nasce insieme alla tabella players
+for _stmt in _DDL:
+    event.listen(Player.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+
+_search_table = table(SEARCH_TABLE, column("rowid", Integer), column("rank"))
+_available: dict = {}
+
+
+def ensure_search_index(bind: Engine | Connection) -> bool:
+    # DB esistenti: crea tabella + trigger se mancano e popola l'indice una volta
+    engine = bind if isinstance(bind, Engine) else bind.engine
+    if engine.dialect.name != "sqlite":
+        _available[engine] = False
+        return False
+
+    with engine.begin() as conn:
+        create_search_index(conn)
+
+    _available[engine] = True
+    return True
+
+
+def create_search_index(conn: Connection) -> bool:
+    # nella transazione del chiamante (anche da una migrazione); False se c'era già
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    if exists:
+        return False
+    for stmt in _DDL:
+        conn.execute(text(stmt))
+    rebuild_search_index(conn)
+    return True
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+def has_search_index(bind: Engine | Connection) -> bool:
+    engine = bind if isinstance(bind, Engine) else bind.engine
+    if engine not in _available:
+        if engine.dialect.name != "sqlite":
+            _available[engine] = False
+        else:
+            with engine.connect() as conn:
+                _available[engine] = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": SEARCH_TABLE},
+                ).first() is not None
+    return _available[engine]
+
+
+def fts_query(term: str) -> Optional[str]:
+    # "Leão raf" -> '"Leão"* "raf"*' (AND implicito, match per prefisso)
+    tokens = re.findall(r"\w+", term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{tok}"*' for tok in tokens)
+
+
+def search_hits(term: str, limit: Optional[int] = None):
+    # subquery (player_id, rank) ordinabile per rilevanza (rank più basso = migliore)
+    expr = fts_query(term)
+    if expr is None:
+        return None
+    stmt = (
+        select(_search_table.c.rowid.label("player_id"), _search_table.c.rank.label("rank"))
+        .where(text(f"{SEARCH_TABLE} MATCH :fts_q").bindparams(fts_q=expr))
+        .order_by(_search_table.c.rank)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt.subquery("hits")
@@ -0,0 +1,78 @@
+# app/session.py
+# Ciclo di vita delle sessioni DB per le pagine Streamlit.
+# - engine: uno per processo (app/db.py è importato una sola volta)
+# - schema: revisione Alembic controllata una volta all'avvio del processo (app/schema.py),
+#   non a ogni rerun
+# - sessione: una per rerun e per utente (st.session_state è per browser session),
+#   chiusa a fine rerun; se il rerun è interrotto (st.stop / st.rerun / eccezione)
+#   la chiude il rerun successivo prima di aprirne una nuova
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, MutableMapping
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from .db import SessionLocal, engine
+from .instrumentation import SQL_DEBUG, finish_thread_stats
+from .schema import ensure_schema_current
+
+_RERUN_KEY = "_db_session"
+SQL_HISTORY_KEY = "_sql_history"
+SQL_HISTORY_SIZE = 20
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            ensure_schema_current(engine)
+            _schema_ready = True
+
+
+@contextmanager
+def session_scope(factory: sessionmaker = SessionLocal) -> Iterator[Session]:
+    # script / job: commit se tutto va bene, rollback su errore, close sempre
+    db = factory()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def open_rerun_session(state: MutableMapping) -> Session:
+    # sessione lasciata aperta da un rerun interrotto da un'eccezione
+    _close_session(state)
+    db = SessionLocal()
+    state[_RERUN_KEY] = db
+    return db
+
+
+def _close_session(state: MutableMapping) -> None:
+    # close() annulla la transazione aperta e restituisce la connessione al pool;
+    # la sessione resta riutilizzabile dai callback del rerun successivo
+    db = state.pop(_RERUN_KEY, None)
+    if db is not None:
+        db.close()
+
+
+def close_rerun_session(state: MutableMapping) -> None:
+    _close_session(state)
+    if SQL_DEBUG:
+        # statistiche SQL del rerun (callback compresi) per il pannello debug
+        stats = finish_thread_stats(label=time.strftime("%H:%M:%S"))
+        if stats.count:
+            history = state.setdefault(SQL_HISTORY_KEY, deque(maxlen=SQL_HISTORY_SIZE))
+            history.append(stats)
@@ -0,0 +1,239 @@
+# app/simulation.py
+# Simulazione Monte Carlo del resto della stagione: punti attuali dalle partite giocate,
+# partite rimanenti = coppie (casa, trasferta) del girone all'italiana andata/ritorno non ancora
+# giocate, gol simulati con il modello Poisson (app/poisson.py). Ne escono probabilità di
+# scudetto, Europa, retrocessione, posizione finale e punti attesi per squadra.
+#
+# Ogni batch simula BATCH_SIZE stagioni in un colpo (matrici (stagioni, partite) e prodotti con
+# matrici one-hot partita->squadra); i batch girano su un pool di processi. Il seme di ogni batch
+# viene da SeedSequence(seed).spawn: stesso seed => stesso risultato, con qualunque numero di worker.
+# Con tol, ci si ferma al primo giro di ROUND_BATCHES batch in cui l'errore standard di tutte le
+# probabilità è sotto tol.
+#
+#   python -m app.simulation --season 3 --sims 200000 [--workers 4] [--seed 42] [--tol 0.002]
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, union
+from sqlalchemy.engine import Connection, Engine
+
+from .models import LiveMatch, Match, Team, TeamSeason
+from .poisson import get_fit
+from .standings import POINTS_DRAW, POINTS_WIN
+
+N_SIMS = 100_000
+BATCH_SIZE = 2_500
+ROUND_BATCHES = 8        # batch per controllo di convergenza (fisso: non dipende dai worker)
+EUROPE_SPOTS = 6
+RELEGATION_SPOTS = 3
+
+
+@dataclass(frozen=True)
+class SeasonState:
+    # classifica attuale + partite rimanenti, indici nella lista team_ids (ordinata)
+    season_id: int
+    team_ids: np.ndarray
+    team_names: list
+    points: np.ndarray
+    goal_diff: np.ndarray
+    goals_for: np.ndarray
+    fixtures_home: np.ndarray
+    fixtures_away: np.ndarray
+    lam_home: np.ndarray
+    lam_away: np.ndarray
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    table: pd.DataFrame          # una riga per squadra, ordinata per punti attesi
+    positions: np.ndarray        # (squadre, posizioni): P(squadra i chiude in posizione j)
+    n_sims: int
+    converged: bool
+    max_stderr: float
+
+
+# ---------------- Stato della stagione ----------------
+def season_state(bind: Engine | Connection, season_id: int) -> SeasonState:
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return season_state(conn, season_id)
+
+    closed = (Match.season_id == season_id, Match.id.not_in(LiveMatch.open_match_ids()))
+    # squadre iscritte + squadre delle partite giocate (come build_fit): una partita con una squadra
+    # senza TeamSeason non deve finire sull'indice della vicina in searchsorted
+    season_teams = union(
+        select(TeamSeason.team_id).where(TeamSeason.season_id == season_id),
+        select(Match.home_team_id).where(*closed),
+        select(Match.away_team_id).where(*closed),
+    ).subquery()
+    teams = bind.execute(
+        select(Team.id.label("team_id"), Team.name)
+        .where(Team.id.in_(select(season_teams.c[0])))
+        .order_by(Team.id)
+    ).all()
+    played = bind.execute(
+        select(Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score).where(*closed)
+    ).all()
+
+    team_ids = np.array([t.team_id for t in teams], dtype=np.int64)
+    n = len(team_ids)
+    cols = list(zip(*played)) if played else [[]] * 4
+    h = np.searchsorted(team_ids, np.array(cols[0], dtype=np.int64))
+    a = np.searchsorted(team_ids, np.array(cols[1], dtype=np.int64))
+    hs, as_ = np.array(cols[2], dtype=np.int64), np.array(cols[3], dtype=np.int64)
+
+    home_pts, away_pts = _points(hs, as_)
+    points = np.bincount(h, home_pts, n) + np.bincount(a, away_pts, n)
+    goals_for = np.bincount(h, hs, n) + np.bincount(a, as_, n)
+    goals_against = np.bincount(h, as_, n) + np.bincount(a, hs, n)
+
+    # andata e ritorno: ogni coppia ordinata (casa, trasferta) non ancora giocata
+    todo = ~np.eye(n, dtype=bool)
+    todo[h, a] = False
+    fixtures_home, fixtures_away = np.nonzero(todo)
+
+    fit = get_fit(bind, season_id)
+    lam_home, lam_away = fit.expected_goals(team_ids[fixtures_home], team_ids[fixtures_away])
+    return SeasonState(
+        season_id=season_id, team_ids=team_ids, team_names=[t.name for t in teams],
+        points=points.astype(np.int64), goal_diff=(goals_for - goals_against).astype(np.int64),
+        goals_for=goals_for.astype(np.int64), fixtures_home=fixtures_home, fixtures_away=fixtures_away,
+        lam_home=lam_home, lam_away=lam_away,
+    )
+
+
+def _points(home_goals: np.ndarray, away_goals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    home = np.where(home_goals > away_goals, POINTS_WIN, np.where(home_goals == away_goals, POINTS_DRAW, 0))
+    away = np.where(away_goals > home_goals, POINTS_WIN, np.where(home_goals == away_goals, POINTS_DRAW, 0))
+    return home, away
+
+
+# ---------------- Batch (gira nei processi del pool) ----------------
+def simulate_batch(state: SeasonState, seed: np.random.SeedSequence, size: int = BATCH_SIZE):
+    # -> (conteggi posizioni (squadre, posizioni), somma punti finali per squadra)
+    rng = np.random.default_rng(seed)
+    n = len(state.team_ids)
+    home_onehot = np.zeros((len(state.fixtures_home), n))
+    away_onehot = np.zeros((len(state.fixtures_away), n))
+    home_onehot[np.arange(len(state.fixtures_home)), state.fixtures_home] = 1.0
+    away_onehot[np.arange(len(state.fixtures_away)), state.fixtures_away] = 1.0
+
+    gh = rng.poisson(state.lam_home, size=(size, len(state.lam_home)))
+    ga = rng.poisson(state.lam_away, size=(size, len(state.lam_away)))
+    home_pts, away_pts = _points(gh, ga)
+
+    points = state.points + home_pts @ home_onehot + away_pts @ away_onehot
+    goal_diff = state.goal_diff + (gh - ga) @ (home_onehot - away_onehot)
+    goals_for = state.goals_for + gh @ home_onehot + ga @ away_onehot
+
+    # criteri di load_standings: punti, differenza reti, gol fatti, team_id (sort stabile)
+    key = (points * 4096 + goal_diff + 2048) * 4096 + goals_for
+    order = np.argsort(-key, axis=1, kind="stable")
+    position = np.empty_like(order)
+    np.put_along_axis(position, order, np.broadcast_to(np.arange(n), order.shape), axis=1)
+
+    counts = (position[:, :, None] == np.arange(n)).sum(axis=0)
+    return counts, points.sum(axis=0)
+
+
+def _run_batch(task):
+    return simulate_batch(*task)
+
+
+# ---------------- Simulazione ----------------
+def simulate_season(
+    bind: Engine | Connection,
+    season_id: int,
+    n_sims: int = N_SIMS,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    tol: Optional[float] = None,
+    europe_spots: int = EUROPE_SPOTS,
+    relegation_spots: int = RELEGATION_SPOTS,
+) -> SimulationResult:
+    state = season_state(bind, season_id)
+    n = len(state.team_ids)
+    # batch pieni + resto: si simulano esattamente n_sims stagioni
+    full, rest = divmod(max(n_sims, 1), BATCH_SIZE)
+    sizes = [BATCH_SIZE] * full + ([rest] if rest else [])
+    n_batches = len(sizes)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    workers = workers or os.cpu_count() or 1
+
+    counts = np.zeros((n, n), dtype=np.int64)
+    points_sum = np.zeros(n)
+    done, converged, max_stderr = 0, False, float("nan")
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for start in range(0, n_batches, ROUND_BATCHES):
+            tasks = [(state, s, size) for s, size in zip(seeds[start:start + ROUND_BATCHES],
+                                                         sizes[start:start + ROUND_BATCHES])]
+            results = pool.map(_run_batch, tasks) if pool else map(_run_batch, tasks)
+            for (c, p), (_, _, size) in zip(results, tasks):
+                counts += c
+                points_sum += p
+                done += size
+
+            probs = _summary_probs(counts / done, europe_spots, relegation_spots)
+            max_stderr = float(np.sqrt(probs * (1 - probs) / done).max()) if n else 0.0
+            if tol is not None and max_stderr < tol:
+                converged = True
+                break
+    finally:
+        if pool:
+            pool.shutdown()
+
+    positions = counts / done
+    title, europe, relegation = _summary_probs(positions, europe_spots, relegation_spots)
+    table = pd.DataFrame({
+        "team_id": state.team_ids,
+        "team_name": state.team_names,
+        "points": state.points,
+        "expected_points": points_sum / done,
+        "title": title,
+        "europe": europe,
+        "relegation": relegation,
+    }).sort_values(["expected_points", "title"], ascending=False, ignore_index=True)
+    return SimulationResult(table=table, positions=positions, n_sims=done, converged=converged,
+                            max_stderr=max_stderr)
+
+
+def _summary_probs(positions: np.ndarray, europe_spots: int, relegation_spots: int) -> np.ndarray:
+    # (3, squadre): scudetto, Europa (prime europe_spots), retrocessione (ultime relegation_spots)
+    n = positions.shape[1]
+    return np.stack([
+        positions[:, 0] if n else positions.sum(axis=1),
+        positions[:, :min(europe_spots, n)].sum(axis=1),
+        positions[:, max(n - relegation_spots, 0):].sum(axis=1),
+    ])
+
+
+if __name__ == "__main__":
+    from .db import engine
+    from .schema import ensure_schema_current
+
+    parser = argparse.ArgumentParser(description="Monte Carlo del resto della stagione")
+    parser.add_argument("--season", type=int, required=True, help="id stagione")
+    parser.add_argument("--sims", type=int, default=N_SIMS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processi (default: tutti i core)")
+    parser.add_argument("--tol", type=float, default=None, help="stop anticipato: errore standard massimo")
+    parser.add_argument("--europe", type=int, default=EUROPE_SPOTS, help="posti Europa")
+    parser.add_argument("--relegation", type=int, default=RELEGATION_SPOTS, help="posti retrocessione")
+    args = parser.parse_args()
+
+    ensure_schema_current(engine)
+    res = simulate_season(engine, args.season, args.sims, args.seed, args.workers, args.tol,
+                          args.europe, args.relegation)
+    pd.set_option("display.width", 120)
+    print(res.table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    status = "convergente" if res.converged else "tutte le simulazioni"
+    print(f"\n{res.n_sims} simulazioni ({status}), errore standard max {res.max_stderr:.4f}")
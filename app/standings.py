@@ -0,0 +1,134 @@
+# app/standings.py
+# Classifica materializzata per stagione/squadra.
+# Aggiornata in modo incrementale nella stessa transazione che salva la partita
+# (nessun commit qui: lo fa il chiamante), ricostruibile da zero con:
+#
+#   python -m app.standings --rebuild [--season ID]
+from __future__ import annotations
+
+import argparse
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, joinedload
+
+from .aggregates import increment_rows
+from .models import LiveMatch, Match, Standing
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+
+
+def _side(prefix: str, gf: int, ga: int) -> Dict[str, int]:
+    won, drawn, lost = int(gf > ga), int(gf == ga), int(gf < ga)
+    return {
+        "played": 1,
+        "won": won,
+        "drawn": drawn,
+        "lost": lost,
+        "goals_for": gf,
+        "goals_against": ga,
+        "points": POINTS_WIN * won + POINTS_DRAW * drawn,
+        f"{prefix}_played": 1,
+        f"{prefix}_won": won,
+        f"{prefix}_drawn": drawn,
+        f"{prefix}_lost": lost,
+        f"{prefix}_goals_for": gf,
+        f"{prefix}_goals_against": ga,
+    }
+
+
+def standing_deltas(
+    season_id: int,
+    home_team_id: int,
+    away_team_id: int,
+    home_score: int,
+    away_score: int,
+    sign: int = 1,
+) -> List[Dict]:
+    # sign=-1 per stornare un risultato (es. correzione punteggio)
+    rows = [
+        {"season_id": season_id, "team_id": home_team_id} | _side("home", home_score, away_score),
+        {"season_id": season_id, "team_id": away_team_id} | _side("away", away_score, home_score),
+    ]
+    if sign != 1:
+        for row in rows:
+            for col, value in row.items():
+                if col not in ("season_id", "team_id"):
+                    row[col] = value * sign
+    return rows
+
+
+def apply_match_results(db: Session, matches: List[Dict], sign: int = 1) -> None:
+    # matches: dict con season_id, home_team_id, away_team_id, home_score, away_score
+    rows = []
+    for m in matches:
+        rows.extend(standing_deltas(
+            m["season_id"], m["home_team_id"], m["away_team_id"],
+            m["home_score"], m["away_score"], sign,
+        ))
+    increment_rows(db, Standing, ("season_id", "team_id"), rows)
+
+
+def apply_match_result(db: Session, match: Match, sign: int = 1) -> None:
+    apply_match_results(db, [{
+        "season_id": match.season_id,
+        "home_team_id": match.home_team_id,
+        "away_team_id": match.away_team_id,
+        "home_score": match.home_score,
+        "away_score": match.away_score,
+    }], sign)
+
+
+def rebuild_standings(db: Session, season_id: Optional[int] = None) -> int:
+    # riparazione: ricalcolo completo dai punteggi denormalizzati su matches
+    # le partite live entrano in classifica solo a fine partita (finalize_live_match)
+    stmt = select(
+        Match.season_id, Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score
+    ).where(Match.id.not_in(LiveMatch.open_match_ids()))
+    purge = delete(Standing)
+    if season_id is not None:
+        stmt = stmt.where(Match.season_id == season_id)
+        purge = purge.where(Standing.season_id == season_id)
+
+    db.execute(purge)
+    matches = [row._asdict() for row in db.execute(stmt)]
+    apply_match_results(db, matches)
+    return len(matches)
+
+
+def load_standings(db: Session, season_id: int) -> List[Standing]:
+    return (
+        db.query(Standing)
+        .options(joinedload(Standing.team))   # s.team.name senza una query per riga
+        .filter(Standing.season_id == season_id)
+        .order_by(
+            Standing.points.desc(),
+            (Standing.goals_for - Standing.goals_against).desc(),
+            Standing.goals_for.desc(),
+            Standing.team_id,
+        )
+        .all()
+    )
+
+
+if __name__ == "__main__":
+    from .db import SessionLocal, engine
+    from .schema import ensure_schema_current
+
+    parser = argparse.ArgumentParser(description="Classifiche materializzate")
+    parser.add_argument("--rebuild", action="store_true", help="ricalcola da zero dalle partite")
+    parser.add_argument("--season", type=int, default=None, help="solo questa stagione (id)")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.error("niente da fare: usa --rebuild")
+
+    ensure_schema_current(engine)
+    db = SessionLocal()
+    try:
+        n = rebuild_standings(db, args.season)
+        db.commit()
+        print(f"Classifiche ricostruite da {n} partite")
+    finally:
+        db.close()
@@ -0,0 +1,100 @@
+# app/versioning.py
+# Contatori di versione dei dati, incrementati al commit di ogni sessione che ha scritto.
+#   "data"    -> qualunque scrittura
+#   "refdata" -> Country / Competition / Season / Team / TeamSeason
+# LiveMatch / MatchEvent non incrementano nulla: chi segue una partita live usa last_seq,
+# e un evento live non deve invalidare le cache dell'API (né costare un UPDATE in più).
+# Neanche BacktestStep / BacktestScore: sono risultati derivati, non dati.
+# Le cache (API, dati di riferimento) usano la versione come chiave: nessuna
+# invalidazione esplicita, basta leggere un intero.
+from __future__ import annotations
+
+from typing import Set
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .models import (
+    BacktestScore,
+    BacktestStep,
+    Competition,
+    Country,
+    DataVersion,
+    LiveMatch,
+    MatchEvent,
+    Season,
+    Team,
+    TeamSeason,
+)
+
+DATA = "data"
+REFDATA = "refdata"
+
+REFDATA_MODELS = (Country, Competition, Season, Team, TeamSeason)
+_REFDATA_TABLES = {m.__table__ for m in REFDATA_MODELS}
+_LIVE_TABLES = {LiveMatch.__table__, MatchEvent.__table__}
+_DERIVED_TABLES = {BacktestStep.__table__, BacktestScore.__table__}
+
+_PENDING = "_data_version_scopes"
+
+
+def _scopes_for(table) -> Set[str]:
+    if table is DataVersion.__table__ or table in _LIVE_TABLES or table in _DERIVED_TABLES:
+        return set()
+    if table in _REFDATA_TABLES:
+        return {DATA, REFDATA}
+    return {DATA}
+
+
+def _mark(session: Session, scopes: Set[str]) -> None:
+    if scopes:
+        session.info.setdefault(_PENDING, set()).update(scopes)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context) -> None:
+    scopes: Set[str] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(type(obj), "__table__", None)
+        if table is not None:
+            scopes |= _scopes_for(table)
+    _mark(session, scopes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(state: ORMExecuteState) -> None:
+    # insert()/update()/delete() eseguiti via session.execute (bulk, upsert aggregati)
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    _mark(state.session, _scopes_for(table) if table is not None else {DATA})
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session: Session) -> None:
+    # il flush finale del commit avviene dopo questo evento: anticipalo
+    session.flush()
+    scopes = session.info.pop(_PENDING, None)
+    if scopes:
+        # Connection.execute: non passa dagli eventi ORM (niente ricorsione)
+        bump(session.connection(), scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def bump(conn: Connection, scopes: Set[str]) -> None:
+    for scope in sorted(scopes):
+        result = conn.execute(
+            update(DataVersion).where(DataVersion.scope == scope).values(version=DataVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(DataVersion).values(scope=scope, version=1))
+
+
+def current_version(bind: Session | Connection, scope: str = DATA) -> int:
+    value = bind.execute(select(DataVersion.version).where(DataVersion.scope == scope)).scalar()
+    return value or 0
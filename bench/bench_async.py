@@ -0,0 +1,131 @@
+# bench/bench_async.py
+# Richieste/secondo delle query dell'API sotto carico concorrente:
+# percorso sincrono (thread pool, come gli endpoint "def" di FastAPI) vs asyncio + aiosqlite.
+#
+#   python -m bench.bench_async --db ./bench.db --concurrency 32 --requests 2000
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.async_queries import (
+    data_version_stmt,
+    match_detail_stmt,
+    season_matches_stmt,
+    standings_stmt,
+)
+from app.models import Base, Competition, Country, Goal, Match, Season, Team
+from app.standings import rebuild_standings
+
+
+def seed(url: str, seasons: int = 3) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        if db.scalar(select(func.count()).select_from(Match)):
+            return
+        rng = random.Random(42)
+        db.execute(insert(Country).values(name="Italy", code="ITA"))
+        db.execute(insert(Competition).values(name="Serie A", country_id=1, division=1))
+        db.execute(insert(Team), [{"name": f"Team {i:02d}"} for i in range(1, 21)])
+        for s in range(1, seasons + 1):
+            db.execute(insert(Season).values(competition_id=1, name=f"{2020 + s}-{2021 + s}"))
+            start = datetime(2020 + s, 8, 20)
+            rows = [
+                {
+                    "season_id": s, "matchday": md, "kickoff": start + timedelta(days=7 * md, hours=i),
+                    "home_team_id": h, "away_team_id": a,
+                    "home_team_name": f"Team {h:02d}", "away_team_name": f"Team {a:02d}",
+                    "home_score": rng.randint(0, 4), "away_score": rng.randint(0, 3),
+                }
+                for md in range(1, 39)
+                for i, (h, a) in enumerate(rng.sample([(h, a) for h in range(1, 21) for a in range(1, 21) if h != a], 10))
+            ]
+            ids = db.scalars(insert(Match).returning(Match.id, sort_by_parameter_order=True), rows).all()
+            db.execute(insert(Goal), [
+                {"match_id": mid, "team_id": r["home_team_id"], "minute": 10 + g, "period": "1T", "goal_type": "open_play"}
+                for mid, r in zip(ids, rows) for g in range(r["home_score"])
+            ])
+        rebuild_standings(db)
+        db.commit()
+    engine.dispose()
+
+
+def workload(n: int, seasons: int, matches: int):
+    rng = random.Random(7)
+    ops = []
+    for _ in range(n):
+        kind = rng.choice(("matches", "detail", "standings"))
+        if kind == "matches":
+            ops.append(season_matches_stmt(rng.randint(1, seasons), rng.randint(1, 38), limit=50))
+        elif kind == "detail":
+            ops.append(match_detail_stmt(rng.randint(1, matches)))
+        else:
+            ops.append(standings_stmt(rng.randint(1, seasons)))
+    return ops
+
+
+def run_sync(url: str, ops, concurrency: int) -> float:
+    engine = create_engine(url, pool_size=concurrency, connect_args={"check_same_thread": False})
+    factory = sessionmaker(bind=engine)
+
+    def one(stmt):
+        with factory() as db:
+            db.scalar(data_version_stmt())
+            db.execute(stmt).unique().all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, ops))
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return len(ops) / elapsed
+
+
+async def run_async(url: str, ops, concurrency: int) -> float:
+    engine = create_async_engine(url, pool_size=concurrency)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(stmt):
+        async with sem, factory() as db:
+            await db.scalar(data_version_stmt())
+            (await db.execute(stmt)).unique().all()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(stmt) for stmt in ops))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return len(ops) / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async sotto carico concorrente")
+    parser.add_argument("--db", default="./bench.db")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    sync_url = f"sqlite:///{args.db}"
+    seed(sync_url)
+    engine = create_engine(sync_url)
+    with Session(engine) as db:
+        seasons = db.scalar(select(func.count()).select_from(Season))
+        matches = db.scalar(select(func.count()).select_from(Match))
+    engine.dispose()
+
+    ops = workload(args.requests, seasons, matches)
+    sync_rps = run_sync(sync_url, ops, args.concurrency)
+    async_rps = asyncio.run(run_async(f"sqlite+aiosqlite:///{args.db}", ops, args.concurrency))
+
+    print(f"richieste: {args.requests}, concorrenza: {args.concurrency}")
+    print(f"sync  (thread pool): {sync_rps:8.0f} req/s")
+    print(f"async (aiosqlite)  : {async_rps:8.0f} req/s")
@@ -0,0 +1,118 @@
+# bench/bench_readmodels.py
+# Selectbox ed elenchi: oggetti ORM attaccati alla sessione vs read model (app/readmodels.py).
+# Per ogni caso: mediana della latenza (sessione nuova a ogni giro, come un rerun) e memoria
+# trattenuta dal risultato finché la sessione è aperta (tracemalloc).
+# Senza --db (o con un file che non esiste) genera un DB sintetico grande con bench/synth.py.
+#
+#   python -m bench.bench_readmodels --db ./bench_large.db --competitions 4 --seasons 5
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import make_engine
+from app.models import Country, Player, Team, TeamSeason
+from app.queries import load_roster
+from app.readmodels import country_rows, player_options, roster_rows, team_rows
+from bench.synth import generate
+
+Loader = Callable[[Session], list]
+
+
+def cases(team_season_id: int) -> Dict[str, Tuple[Loader, Loader]]:
+    # nome -> (percorso ORM, read model)
+    return {
+        "paesi (selectbox)": (
+            lambda db: db.scalars(select(Country).order_by(Country.name)).all(),
+            country_rows,
+        ),
+        "squadre (selectbox)": (
+            lambda db: db.scalars(select(Team).order_by(Team.name)).all(),
+            team_rows,
+        ),
+        "giocatori di una squadra": (
+            lambda db: db.scalars(
+                select(Player)
+                .where(Player.current_team_season_id == team_season_id)
+                .order_by(Player.last_name, Player.first_name)
+            ).all(),
+            lambda db: player_options(db, team_season_id),
+        ),
+        "elenco giocatori completo": (
+            lambda db: load_roster(db),
+            roster_rows,
+        ),
+    }
+
+
+def latency_ms(engine, load: Loader, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            load(db)
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def retained_bytes(engine, load: Loader) -> Tuple[int, int]:
+    # memoria ancora allocata dopo il caricamento, con risultato e sessione vivi
+    with Session(engine) as db:
+        load(db)  # connessione e statement già in cache, fuori dalla misura
+        db.expunge_all()
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        rows = load(db)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return after - before, len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ORM vs read model per selectbox ed elenchi")
+    parser.add_argument("--db", default="./bench_large.db")
+    parser.add_argument("--competitions", type=int, default=4, help="solo se il DB va generato")
+    parser.add_argument("--seasons", type=int, default=5, help="solo se il DB va generato")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = make_engine(f"sqlite:///{args.db}")
+    if not os.path.exists(args.db) or os.path.getsize(args.db) == 0:
+        counts = generate(engine, args.competitions, args.seasons)
+        print("DB generato: " + " · ".join(f"{k}={v}" for k, v in counts.items()))
+
+    with Session(engine) as db:
+        # la team-season con la rosa più numerosa
+        team_season_id = db.scalar(
+            select(TeamSeason.id)
+            .join(Player, Player.current_team_season_id == TeamSeason.id)
+            .group_by(TeamSeason.id)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+
+    print(f"{'caso':<28} {'righe':>6} {'ORM ms':>8} {'DTO ms':>8} {'ORM KiB':>9} {'DTO KiB':>9} {'B/riga ORM':>11} {'B/riga DTO':>11}")
+    for name, (orm_load, dto_load) in cases(team_season_id).items():
+        orm_ms = latency_ms(engine, orm_load, args.runs)
+        dto_ms = latency_ms(engine, dto_load, args.runs)
+        orm_mem, n = retained_bytes(engine, orm_load)
+        dto_mem, _ = retained_bytes(engine, dto_load)
+        print(
+            f"{name:<28} {n:>6} {orm_ms:>8.2f} {dto_ms:>8.2f} {orm_mem / 1024:>9.1f} {dto_mem / 1024:>9.1f} "
+            f"{orm_mem // max(n, 1):>11} {dto_mem // max(n, 1):>11}"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
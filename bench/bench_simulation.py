@@ -0,0 +1,76 @@
+# bench/bench_simulation.py
+# Monte Carlo del resto della stagione (app/simulation.py): loop Python per partita e per
+# simulazione (estrapolato da poche simulazioni) vs batch NumPy, con 1 e N processi.
+# Senza --db (o con un file che non esiste) genera un DB sintetico e cancella le ultime
+# --remaining giornate della prima stagione, così restano partite da simulare.
+#
+#   python -m bench.bench_simulation --db ./bench_sim.db --sims 100000 --workers 4
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db import make_engine
+from app.models import Card, Goal, Match
+from app.simulation import EUROPE_SPOTS, season_state, simulate_season
+from bench.synth import generate
+
+
+def naive_sims_per_second(state, n: int, seed: int = 0) -> float:
+    # il ciclo "ovvio": una partita alla volta, classifica ordinata con sorted()
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for _ in range(n):
+        points, gd, gf = list(state.points), list(state.goal_diff), list(state.goals_for)
+        for h, a, lh, la in zip(state.fixtures_home, state.fixtures_away, state.lam_home, state.lam_away):
+            x, y = rng.poisson(lh), rng.poisson(la)
+            points[h] += 3 if x > y else 1 if x == y else 0
+            points[a] += 3 if y > x else 1 if x == y else 0
+            gd[h] += x - y
+            gd[a] += y - x
+            gf[h] += x
+            gf[a] += y
+        ranking = sorted(range(len(points)), key=lambda i: (-points[i], -gd[i], -gf[i], i))
+        _ = ranking[:EUROPE_SPOTS]
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo stagione: loop Python vs batch NumPy + processi")
+    parser.add_argument("--db", default="./bench_sim.db")
+    parser.add_argument("--remaining", type=int, default=9, help="giornate da simulare (solo se il DB va generato)")
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--naive-sims", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    engine = make_engine(f"sqlite:///{args.db}")
+    if not os.path.exists(args.db) or os.path.getsize(args.db) == 0:
+        generate(engine, 1, 1)
+        with Session(engine) as db:
+            last = db.scalar(select(func.max(Match.matchday)).where(Match.season_id == 1))
+            ids = select(Match.id).where(Match.season_id == 1, Match.matchday > last - args.remaining)
+            db.execute(delete(Goal).where(Goal.match_id.in_(ids)))
+            db.execute(delete(Card).where(Card.match_id.in_(ids)))
+            db.execute(delete(Match).where(Match.id.in_(ids)))
+            db.commit()
+
+    state = season_state(engine, 1)
+    print(f"{len(state.team_ids)} squadre, {len(state.fixtures_home)} partite da simulare, {args.sims} simulazioni")
+
+    rate = naive_sims_per_second(state, args.naive_sims)
+    print(f"{'loop Python (stima)':<24} {args.sims / rate:>8.2f} s")
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        simulate_season(engine, 1, args.sims, workers=workers)
+        print(f"{f'NumPy, {workers} processi':<24} {time.perf_counter() - start:>8.2f} s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
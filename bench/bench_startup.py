@@ -0,0 +1,59 @@
+# bench/bench_startup.py
+# Controllo schema all'avvio di un processo (prima pagina Streamlit, API, script):
+# create_all + indice di ricerca (riflette ogni tabella) vs revisione Alembic (una SELECT).
+# Ogni giro usa un engine nuovo, come un processo appena partito.
+#
+#   python -m bench.bench_startup --db ./bench.db --runs 30
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from app.db import make_engine
+from app.models import Base
+from app.schema import ensure_schema_current, head_revision
+from app.search import ensure_search_index
+
+
+def create_all_check(engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+
+
+def revision_check(engine) -> None:
+    ensure_schema_current(engine)
+
+
+CHECKS = {
+    "create_all": create_all_check,
+    "revisione Alembic": revision_check,
+}
+
+
+def measure(url: str, check, runs: int):
+    times = []
+    for _ in range(runs):
+        engine = make_engine(url)
+        start = time.perf_counter()
+        check(engine)
+        times.append((time.perf_counter() - start) * 1000)
+        engine.dispose()
+    return statistics.median(times), max(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo del controllo schema all'avvio")
+    parser.add_argument("--db", default="./bench.db")
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{args.db}"
+    # porta il DB alla head una volta, poi misura solo il controllo
+    revision_check(make_engine(url))
+    head_revision()
+
+    print(f"{'controllo':<20} {'mediana ms':>10} {'max ms':>8}")
+    for name, check in CHECKS.items():
+        median, worst = measure(url, check, args.runs)
+        print(f"{name:<20} {median:>10.2f} {worst:>8.2f}")
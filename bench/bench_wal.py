@@ -0,0 +1,118 @@
+# bench/bench_wal.py
+# Latenza di lettura mentre un writer salva partite in continuo:
+# journal rollback (default SQLite) vs profilo di produzione (WAL + pragmas di app/db.py).
+#
+#   python -m bench.bench_wal --seconds 5 --readers 4
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.async_queries import season_matches_stmt, standings_stmt
+from app.db import SQLITE_PRAGMAS, make_engine
+from app.models import Goal, Match
+from bench.bench_async import seed
+
+PROFILES = {
+    "rollback journal": {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000},
+    "WAL (produzione)": SQLITE_PRAGMAS,
+}
+
+
+def run_profile(path: str, pragmas, seconds: float, readers: int):
+    url = f"sqlite:///{path}"
+    writer = make_engine(url, role="write", pragmas=pragmas)
+    reader = make_engine(url, role="read", pragmas=pragmas)
+    WriteSession = sessionmaker(bind=writer)
+    ReadSession = sessionmaker(bind=reader)
+
+    stop = threading.Event()
+    latencies: list[float] = []
+    errors = {"read": 0}
+    writes = {"n": 0}
+    lock = threading.Lock()
+
+    def write_loop():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            with WriteSession() as db:
+                # salvataggio "tipo": match + 3 gol + aggiornamento punteggio, un commit
+                mid = db.scalar(insert(Match).values(
+                    season_id=1, matchday=38, kickoff=datetime(2030, 1, 1), home_team_id=1,
+                    away_team_id=2, home_team_name="Team 01", away_team_name="Team 02",
+                ).returning(Match.id))
+                db.execute(insert(Goal), [
+                    {"match_id": mid, "team_id": 1, "minute": m, "period": "1T", "goal_type": "open_play"}
+                    for m in (5, 20, 40)
+                ])
+                db.execute(update(Match).where(Match.id == mid).values(home_score=3))
+                db.commit()
+            writes["n"] += 1
+
+    def read_loop(k: int):
+        stmts = [standings_stmt(1), season_matches_stmt(1, (k % 38) + 1)]
+        j = 0
+        while not stop.is_set():
+            j += 1
+            started = time.perf_counter()
+            try:
+                with ReadSession() as db:
+                    db.execute(stmts[j % 2]).all()
+            except OperationalError:
+                with lock:
+                    errors["read"] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=write_loop)] + [
+        threading.Thread(target=read_loop, args=(k,)) for k in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    writer.dispose()
+    reader.dispose()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else float("nan")
+    return {
+        "reads": len(latencies),
+        "read_errors": errors["read"],
+        "writes": writes["n"],
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": latencies[-1] if latencies else float("nan"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latenza letture con scritture concorrenti")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'profilo':<18} {'letture':>8} {'errori':>7} {'scritture':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, pragmas in PROFILES.items():
+            path = os.path.join(tmp, f"{name.split()[0]}.db")
+            seed(f"sqlite:///{path}", seasons=1)
+            r = run_profile(path, pragmas, args.seconds, args.readers)
+            print(
+                f"{name:<18} {r['reads']:>8} {r['read_errors']:>7} {r['writes']:>9} "
+                f"{r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['max']:>8.2f}"
+            )
@@ -0,0 +1,364 @@
+# bench/suite.py
+# Benchmark dei percorsi caldi su un DB sintetico (bench/synth.py): tempi (mediana, p95) e numero
+# di query per operazione. Il baseline salvato permette di vedere le regressioni.
+#
+#   python -m bench.suite --db ./bench.db                       # genera il DB se manca e stampa i risultati
+#   python -m bench.suite --db ./bench.db --save bench/baseline.json
+#   python -m bench.suite --db ./bench.db --compare bench/baseline.json   # exit 1 su regressione
+#
+# Prima dei tempi controlla i piani delle query calde (app/query_plans.py): un full scan => exit 1.
+#
+# Le operazioni che scrivono girano dentro una transazione esterna annullata alla fine
+# (i commit diventano savepoint): il DB resta identico tra un run e l'altro.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.analytics import season_markets
+from app.db import make_engine
+from app.models import Goal, Match, Player, Season, TeamSeason
+from app.match_service import MatchDraft, save_match
+from app.player_stats import discipline_ranking, top_scorers
+from app.poisson import build_fit
+from app.queries import goal_table_rows, load_roster, roster_page
+from app.query_plans import check_query_plans
+from app.refdata import load_refdata
+from app.schema import ensure_schema_current
+from app.standings import load_standings, rebuild_standings
+
+from .synth import generate
+
+DEFAULT_TOLERANCE = 0.25   # +25% sulla mediana = regressione
+MIN_DELTA_MS = 0.5         # sotto il mezzo millisecondo è rumore
+
+
+# controllo transazioni aggiunto dal benchmark (vedi enable_savepoints), escluso dal conteggio
+_TX_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryCounter:
+    # conta le esecuzioni sul cursore DBAPI (un executemany conta 1)
+    def __init__(self, engine: Engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, _conn, _cursor, statement, *_args):
+        if not statement.startswith(_TX_CONTROL):
+            self.count += 1
+
+
+class Context:
+    def __init__(self, engine: Engine, seed: int):
+        self.engine = engine
+        self.rng = random.Random(seed)
+        with Session(engine) as db:
+            self.season_ids = db.scalars(select(Season.id)).all()
+            self.team_season_ids = db.scalars(select(TeamSeason.id)).all()
+            self.last_names = db.scalars(select(Player.last_name).distinct()).all()
+            # partite con almeno 4 gol: la tabella gol di match_entry
+            self.goal_match_ids = db.scalars(
+                select(Goal.match_id).group_by(Goal.match_id).having(func.count() >= 4)
+            ).all()
+
+    def goals_of(self, db: Session, match_id: int) -> List[Dict]:
+        # stessa forma di st.session_state.goals in ui/match_entry.py
+        home_id, away_id = db.execute(
+            select(Match.home_team_id, Match.away_team_id).where(Match.id == match_id)
+        ).one()
+        rows = db.execute(
+            select(Goal.scorer_player_id, Goal.assist_player_id, Goal.team_id, Goal.minute, Goal.period, Goal.goal_type)
+            .where(Goal.match_id == match_id)
+        )
+        return [
+            {"scorer_player_id": s, "assist_player_id": a,
+             # autogol: il giocatore è della squadra che subisce
+             "player_team_id": (home_id if t == away_id else away_id) if gt == "own_goal" else t,
+             "minute": m, "period": p, "goal_type": gt}
+            for s, a, t, m, p, gt in rows
+        ]
+
+
+def enable_savepoints(engine: Engine) -> None:
+    # pysqlite gestisce BEGIN da sé e un RELEASE SAVEPOINT finirebbe per fare commit:
+    # transazioni esplicite, così la transazione esterna si può davvero annullare
+    @event.listens_for(engine, "connect")
+    def _no_implicit_begin(dbapi_conn, _rec):
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _explicit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+@contextmanager
+def rolled_back_session(engine: Engine) -> Iterator[Session]:
+    conn = engine.connect()
+    trans = conn.begin()
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        trans.rollback()
+        conn.close()
+
+
+# ---------------- Casi ----------------
+def case_roster_listing(ctx: Context) -> Callable[[], None]:
+    ts_id = ctx.rng.choice(ctx.team_season_ids)
+
+    def run():
+        with Session(ctx.engine) as db:
+            players = load_roster(db, team_season_id=ts_id)
+            for p in players:  # come la UI: squadra, stagione e paese per riga
+                (p.current_team_season.team.name, p.current_team_season.season.name,
+                 p.country.code if p.country else None)
+    return run
+
+
+def case_roster_page(ctx: Context) -> Callable[[], None]:
+    def run():
+        with Session(ctx.engine) as db:
+            roster_page(db, team_season_id=None, limit=51)
+    return run
+
+
+def case_player_search(ctx: Context) -> Callable[[], None]:
+    term = ctx.rng.choice(ctx.last_names)[:4]
+
+    def run():
+        with Session(ctx.engine) as db:
+            load_roster(db, search=term)
+    return run
+
+
+def case_goal_table_cold(ctx: Context) -> Callable[[], None]:
+    with Session(ctx.engine) as db:
+        goals = ctx.goals_of(db, ctx.rng.choice(ctx.goal_match_ids))
+
+    def run():
+        with Session(ctx.engine) as db:
+            goal_table_rows(db, goals, {})
+    return run
+
+
+def case_goal_table_warm(ctx: Context) -> Callable[[], None]:
+    with Session(ctx.engine) as db:
+        goals = ctx.goals_of(db, ctx.rng.choice(ctx.goal_match_ids))
+        cache: Dict = {}
+        goal_table_rows(db, goals, cache)
+
+    def run():
+        with Session(ctx.engine) as db:
+            goal_table_rows(db, goals, cache)
+    return run
+
+
+def case_match_save(ctx: Context) -> Callable[[], None]:
+    # percorso "Salva partita" di ui/match_entry.py (app/match_service.py)
+    with Session(ctx.engine) as db:
+        src = db.get(Match, ctx.rng.choice(ctx.goal_match_ids))
+        template = {c: getattr(src, c) for c in (
+            "season_id", "matchday", "home_team_id", "away_team_id", "home_team_name", "away_team_name")}
+        goals = ctx.goals_of(db, src.id)
+
+    def run():
+        with rolled_back_session(ctx.engine) as db:
+            save_match(db, MatchDraft(**template, kickoff=datetime(2030, 1, 1), goals=goals))
+    return run
+
+
+def case_standings(ctx: Context) -> Callable[[], None]:
+    season_id = ctx.rng.choice(ctx.season_ids)
+
+    def run():
+        with Session(ctx.engine) as db:
+            [s.team.name for s in load_standings(db, season_id)]
+    return run
+
+
+def case_top_scorers(ctx: Context) -> Callable[[], None]:
+    season_id = ctx.rng.choice(ctx.season_ids)
+
+    def run():
+        with Session(ctx.engine) as db:
+            top_scorers(db, season_id)
+            discipline_ranking(db, season_id)
+    return run
+
+
+def case_season_markets(ctx: Context) -> Callable[[], None]:
+    season_id = ctx.rng.choice(ctx.season_ids)
+
+    def run():
+        with ctx.engine.connect() as conn:
+            season_markets(conn, season_id)
+    return run
+
+
+def case_poisson_fit(ctx: Context) -> Callable[[], None]:
+    # fit senza cache (la cache per versione dati lo rende gratuito tra un salvataggio e l'altro)
+    season_id = ctx.rng.choice(ctx.season_ids)
+
+    def run():
+        with ctx.engine.connect() as conn:
+            build_fit(conn, season_id, version=0)
+    return run
+
+
+def case_rebuild_standings(ctx: Context) -> Callable[[], None]:
+    season_id = ctx.rng.choice(ctx.season_ids)
+
+    def run():
+        with rolled_back_session(ctx.engine) as db:
+            rebuild_standings(db, season_id)
+            db.commit()
+    return run
+
+
+def case_refdata_load(ctx: Context) -> Callable[[], None]:
+    def run():
+        with Session(ctx.engine) as db:
+            load_refdata(db, version=0)
+    return run
+
+
+CASES: Dict[str, Callable[[Context], Callable[[], None]]] = {
+    "roster_listing": case_roster_listing,
+    "roster_page": case_roster_page,
+    "player_search": case_player_search,
+    "goal_table_cold": case_goal_table_cold,
+    "goal_table_warm": case_goal_table_warm,
+    "match_save": case_match_save,
+    "standings": case_standings,
+    "top_scorers": case_top_scorers,
+    "season_markets": case_season_markets,
+    "poisson_fit": case_poisson_fit,
+    "rebuild_standings": case_rebuild_standings,
+    "refdata_load": case_refdata_load,
+}
+
+
+# ---------------- Runner ----------------
+def measure(fn: Callable[[], None], counter: QueryCounter, repeat: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    times, queries = [], []
+    for _ in range(repeat):
+        before = counter.count
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+        queries.append(counter.count - before)
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "queries": max(queries),
+    }
+
+
+def run_suite(engine: Engine, repeat: int = 20, seed: int = 42, only: Optional[List[str]] = None) -> Dict[str, Dict]:
+    counter = QueryCounter(engine)
+    ctx = Context(engine, seed)
+    return {
+        name: measure(factory(ctx), counter, repeat)
+        for name, factory in CASES.items()
+        if not only or name in only
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b is None:
+            continue
+        if r["queries"] > b["queries"]:
+            regressions.append(f"{name}: query {b['queries']} -> {r['queries']}")
+        if r["median_ms"] > b["median_ms"] * (1 + tolerance) and r["median_ms"] - b["median_ms"] > MIN_DELTA_MS:
+            regressions.append(f"{name}: mediana {b['median_ms']:.2f} -> {r['median_ms']:.2f} ms")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    print(f"{'caso':<20} {'mediana ms':>11} {'p95 ms':>9} {'query':>6}" + ("   vs baseline" if baseline else ""))
+    for name, r in results.items():
+        line = f"{name:<20} {r['median_ms']:>11.2f} {r['p95_ms']:>9.2f} {r['queries']:>6}"
+        b = (baseline or {}).get(name)
+        if b:
+            line += f"   {r['median_ms'] / b['median_ms'] - 1:+.0%}  q {b['queries']}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dei percorsi caldi su DB sintetico")
+    parser.add_argument("--db", default="./bench.db")
+    parser.add_argument("--competitions", type=int, default=2, help="solo se il DB va generato")
+    parser.add_argument("--seasons", type=int, default=3, help="solo se il DB va generato")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", choices=sorted(CASES))
+    parser.add_argument("--save", metavar="JSON", help="salva i risultati come baseline")
+    parser.add_argument("--compare", metavar="JSON", help="confronta con un baseline (exit 1 su regressione)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    engine = make_engine(f"sqlite:///{args.db}")
+    enable_savepoints(engine)
+    if not os.path.exists(args.db) or not os.path.getsize(args.db):
+        counts = generate(engine, args.competitions, args.seasons, seed=args.seed)
+        print("DB generato: " + " · ".join(f"{k}={v}" for k, v in counts.items()))
+    else:
+        # DB generato da una versione precedente: stesse migrazioni dell'app
+        ensure_schema_current(engine)
+
+    # piani delle query calde sul DB del benchmark (stesso controllo di python -m app.query_plans)
+    full_scans = check_query_plans(engine)
+    for name, plan in full_scans:
+        print(f"FULL SCAN {name}: " + " | ".join(plan))
+
+    results = run_suite(engine, args.repeat, args.seed, args.only)
+    engine.dispose()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["cases"]
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({
+                "meta": {
+                    "competitions": args.competitions, "seasons": args.seasons, "seed": args.seed,
+                    "repeat": args.repeat, "python": platform.python_version(), "machine": platform.machine(),
+                },
+                "cases": results,
+            }, fh, indent=2)
+            fh.write("\n")
+        print(f"Baseline salvato in {args.save}")
+
+    regressions = compare(results, baseline, args.tolerance) if baseline is not None else []
+    for r in regressions:
+        print(f"REGRESSIONE {r}")
+    if regressions or full_scans:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
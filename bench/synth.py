@@ -0,0 +1,261 @@
+# bench/synth.py
+# Generatore di dati sintetici riproducibile (stesso seed => stesso DB) sullo schema reale di app.models:
+# N competizioni × S stagioni × 20 squadre × 380 partite (andata e ritorno), rose realistiche,
+# gol da Poisson con forza attacco/difesa e fattore campo, assist, rigori, autogol, cartellini.
+#
+#   python -m bench.synth --db ./bench.db --competitions 2 --seasons 3 --seed 42
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db import make_engine
+from app.models import (
+    Card, Competition, Country, Goal, Match, Player, Season, Team, TeamSeason,
+)
+from app.player_stats import rebuild_player_stats
+from app.schema import upgrade_schema
+from app.standings import rebuild_standings
+
+COUNTRIES = [
+    ("Italia", "ITA"), ("Spagna", "ESP"), ("Inghilterra", "ENG"), ("Germania", "GER"), ("Francia", "FRA"),
+    ("Portogallo", "POR"), ("Brasile", "BRA"), ("Argentina", "ARG"), ("Olanda", "NED"), ("Turchia", "TUR"),
+    ("Serbia", "SRB"), ("Nigeria", "NGA"),
+]
+CITIES = [
+    "Ancona", "Bari", "Bergamo", "Bologna", "Brescia", "Cagliari", "Catania", "Como", "Cremona", "Empoli",
+    "Ferrara", "Firenze", "Frosinone", "Genova", "Lecce", "Livorno", "Milano", "Modena", "Monza", "Napoli",
+    "Padova", "Palermo", "Parma", "Perugia", "Pescara", "Pisa", "Reggio", "Roma", "Salerno", "Sassuolo",
+    "Siena", "Torino", "Trento", "Trieste", "Udine", "Venezia", "Verona", "Vicenza", "Lucca", "Avellino",
+]
+FIRST_NAMES = [
+    "Rafael", "Lautaro", "Nicolò", "Federico", "Sandro", "Hakan", "Khvicha", "Dušan", "Théo", "Mike",
+    "Alessandro", "Lorenzo", "Matteo", "Davide", "Giovanni", "João", "Álvaro", "Sergej", "Kylian", "Luka",
+    "Victor", "Marcus", "Paulo", "Ciro", "Andrea", "Simone", "Gianluigi", "Wojciech", "Kim", "Romelu",
+]
+LAST_NAMES = [
+    "Leão", "Martínez", "Barella", "Dimarco", "Tonali", "Çalhanoğlu", "Kvaratskhelia", "Vlahović", "Hernández",
+    "Maignan", "Bastoni", "Pellegrini", "Politano", "Frattesi", "Di Lorenzo", "Cancelo", "Morata", "Milinković",
+    "Mbappé", "Modrić", "Osimhen", "Thuram", "Dybala", "Immobile", "Belotti", "Zaccagni", "Donnarumma",
+    "Szczęsny", "Koopmeiners", "Lukaku", "Rossi", "Bianchi", "Esposito", "Romano", "Colombo", "Ricci",
+    "Marino", "Greco", "Bruno", "Gallo", "Conti", "De Luca", "Mancini", "Costa", "Giordano", "Rizzo",
+]
+
+# rosa tipo: 3 portieri, 8 difensori, 8 centrocampisti, 6 attaccanti
+ROSTER = [("GK", 3), ("DF", 8), ("MF", 8), ("ST", 6)]
+MICRO_BY_MACRO = {
+    "GK": ["GK"],
+    "DF": ["CB", "LB", "RB"],
+    "MF": ["DM", "CM", "AM", "LM", "RM"],
+    "ST": ["CF", "SS", "LW", "RW", "LF", "RF"],
+}
+# peso relativo per segnare / fare assist / essere ammonito
+SCORER_WEIGHT = {"GK": 0.02, "DF": 1.0, "MF": 3.0, "ST": 6.0}
+ASSIST_WEIGHT = {"GK": 0.05, "DF": 1.5, "MF": 4.0, "ST": 3.0}
+CARD_WEIGHT = {"GK": 0.3, "DF": 3.0, "MF": 2.5, "ST": 1.2}
+
+GOAL_TYPES = ["open_play", "penalty", "free_kick", "own_goal"]
+GOAL_TYPE_P = [0.84, 0.09, 0.04, 0.03]
+ASSIST_P = 0.7
+BASE_GOALS = 1.35          # gol attesi per squadra
+HOME_ADVANTAGE = 0.25      # sul log della media
+YELLOWS_PER_TEAM = 2.1
+SECOND_YELLOW_P = 0.04
+RED_P = 0.03
+
+
+def round_robin(n_teams: int) -> List[List[tuple]]:
+    # metodo del cerchio: n-1 giornate di andata, poi il ritorno a campi invertiti
+    idx = list(range(n_teams))
+    rounds = []
+    for r in range(n_teams - 1):
+        pairs = []
+        for i in range(n_teams // 2):
+            a, b = idx[i], idx[n_teams - 1 - i]
+            pairs.append((a, b) if (r + i) % 2 == 0 else (b, a))
+        rounds.append(pairs)
+        idx = [idx[0]] + [idx[-1]] + idx[1:-1]
+    return rounds + [[(b, a) for a, b in pairs] for pairs in rounds]
+
+
+def _minute_period(rng: np.random.Generator):
+    minute = int(rng.integers(1, 91))
+    return minute, "1T" if minute <= 45 else "2T"
+
+
+def _pick(rng: np.random.Generator, roster: List[Dict], weights: Dict[str, float], exclude=None) -> int:
+    pool = [p for p in roster if p["id"] != exclude]
+    w = np.array([weights[p["macro_role"]] for p in pool])
+    return pool[int(rng.choice(len(pool), p=w / w.sum()))]["id"]
+
+
+def _roster_rows(rng: np.random.Generator, team_season_id: int, country_ids: List[int], season_year: int) -> List[Dict]:
+    rows = []
+    numbers = rng.permutation(np.arange(1, 100))[:sum(n for _, n in ROSTER)]
+    k = 0
+    for macro, n in ROSTER:
+        for _ in range(n):
+            micro = MICRO_BY_MACRO[macro]
+            birth = date(season_year - int(rng.integers(17, 36)), int(rng.integers(1, 13)), int(rng.integers(1, 29)))
+            rows.append({
+                "first_name": FIRST_NAMES[int(rng.integers(len(FIRST_NAMES)))],
+                "last_name": LAST_NAMES[int(rng.integers(len(LAST_NAMES)))],
+                "birth_date": birth,
+                "age_years": season_year - birth.year,
+                "country_id": country_ids[int(rng.integers(len(country_ids)))],
+                "macro_role": macro,
+                "micro_roles": sorted(set(rng.choice(micro, size=min(2, len(micro)), replace=False).tolist())),
+                "jersey_number": int(numbers[k]),
+                "current_team_season_id": team_season_id,
+            })
+            k += 1
+    return rows
+
+
+def generate(
+    engine: Engine,
+    competitions: int = 2,
+    seasons: int = 3,
+    teams: int = 20,
+    seed: int = 42,
+) -> Dict[str, int]:
+    # schema dalle migrazioni (revisione salvata, indice di ricerca compreso), come un DB vero
+    upgrade_schema(engine)
+    rng = np.random.default_rng(seed)
+
+    with Session(engine) as db:
+        if db.scalar(select(func.count()).select_from(Match)):
+            raise SystemExit("Il DB contiene già partite: usa un file nuovo.")
+
+        country_ids = db.scalars(
+            insert(Country).returning(Country.id, sort_by_parameter_order=True),
+            [{"name": n, "code": c} for n, c in COUNTRIES],
+        ).all()
+
+        for ci in range(competitions):
+            comp_id = db.scalar(
+                insert(Competition).values(name=f"Lega {ci + 1}", country_id=country_ids[ci % len(country_ids)], division=1)
+                .returning(Competition.id)
+            )
+            names = [CITIES[(ci * teams + t) % len(CITIES)] + ("" if ci * teams + t < len(CITIES) else f" {ci + 1}")
+                     for t in range(teams)]
+            team_ids = db.scalars(
+                insert(Team).returning(Team.id, sort_by_parameter_order=True), [{"name": n} for n in names]
+            ).all()
+
+            for si in range(seasons):
+                year = 2020 + si
+                season_id = db.scalar(
+                    insert(Season).values(competition_id=comp_id, name=f"{year}-{year + 1}").returning(Season.id)
+                )
+                ts_ids = db.scalars(
+                    insert(TeamSeason).returning(TeamSeason.id, sort_by_parameter_order=True),
+                    [{"team_id": t, "season_id": season_id} for t in team_ids],
+                ).all()
+
+                rosters = {}
+                for team_id, ts_id in zip(team_ids, ts_ids):
+                    rows = _roster_rows(rng, ts_id, country_ids, year)
+                    ids = db.scalars(insert(Player).returning(Player.id, sort_by_parameter_order=True), rows).all()
+                    rosters[team_id] = [{"id": pid, "macro_role": r["macro_role"]} for pid, r in zip(ids, rows)]
+
+                # forza attacco/difesa per stagione
+                attack = dict(zip(team_ids, rng.normal(0.0, 0.2, teams)))
+                defence = dict(zip(team_ids, rng.normal(0.0, 0.2, teams)))
+
+                start = datetime(year, 8, 20, 15, 0)
+                fixtures, scores = [], []
+                for md, pairs in enumerate(round_robin(teams), start=1):
+                    for i, (h, a) in enumerate(pairs):
+                        home, away = team_ids[h], team_ids[a]
+                        lam_h = np.exp(np.log(BASE_GOALS) + HOME_ADVANTAGE + attack[home] - defence[away])
+                        lam_a = np.exp(np.log(BASE_GOALS) + attack[away] - defence[home])
+                        fixtures.append({
+                            "season_id": season_id, "matchday": md,
+                            "kickoff": start + timedelta(days=7 * (md - 1), hours=3 * (i % 4)),
+                            "home_team_id": home, "away_team_id": away,
+                            "home_team_name": names[h], "away_team_name": names[a],
+                            "referee": f"Arbitro {int(rng.integers(1, 25)):02d}",
+                        })
+                        scores.append((int(rng.poisson(lam_h)), int(rng.poisson(lam_a))))
+
+                goals, cards = [], []
+                for f, (hs, as_) in zip(fixtures, scores):
+                    f["home_score"], f["away_score"] = hs, as_
+                match_ids = db.scalars(insert(Match).returning(Match.id, sort_by_parameter_order=True), fixtures).all()
+
+                for mid, f in zip(match_ids, fixtures):
+                    home, away = f["home_team_id"], f["away_team_id"]
+                    for team_id, opp_id, n in ((home, away, f["home_score"]), (away, home, f["away_score"])):
+                        for _ in range(n):
+                            minute, period = _minute_period(rng)
+                            goal_type = GOAL_TYPES[int(rng.choice(4, p=GOAL_TYPE_P))]
+                            if goal_type == "own_goal":
+                                scorer, assist = _pick(rng, rosters[opp_id], CARD_WEIGHT), None
+                            else:
+                                scorer = _pick(rng, rosters[team_id], SCORER_WEIGHT)
+                                assist = (_pick(rng, rosters[team_id], ASSIST_WEIGHT, exclude=scorer)
+                                          if goal_type == "open_play" and rng.random() < ASSIST_P else None)
+                            goals.append({
+                                "match_id": mid, "team_id": team_id, "scorer_player_id": scorer,
+                                "assist_player_id": assist, "minute": minute, "period": period,
+                                "goal_type": goal_type,
+                            })
+
+                        for _ in range(int(rng.poisson(YELLOWS_PER_TEAM))):
+                            minute, period = _minute_period(rng)
+                            card_type = "second_yellow" if rng.random() < SECOND_YELLOW_P else "yellow"
+                            cards.append({
+                                "match_id": mid, "team_id": team_id,
+                                "player_id": _pick(rng, rosters[team_id], CARD_WEIGHT),
+                                "minute": minute, "period": period, "card_type": card_type,
+                            })
+                        if rng.random() < RED_P:
+                            minute, period = _minute_period(rng)
+                            cards.append({
+                                "match_id": mid, "team_id": team_id,
+                                "player_id": _pick(rng, rosters[team_id], CARD_WEIGHT),
+                                "minute": minute, "period": period, "card_type": "red",
+                            })
+
+                if goals:
+                    db.execute(insert(Goal), goals)
+                if cards:
+                    db.execute(insert(Card), cards)
+
+        rebuild_standings(db)
+        rebuild_player_stats(db)
+        db.commit()
+
+        return {
+            model.__tablename__: db.scalar(select(func.count()).select_from(model))
+            for model in (Competition, Season, Team, TeamSeason, Player, Match, Goal, Card)
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Popola un DB con dati sintetici riproducibili")
+    parser.add_argument("--db", default="./bench.db")
+    parser.add_argument("--competitions", type=int, default=2)
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = make_engine(f"sqlite:///{args.db}")
+    t0 = time.perf_counter()
+    counts = generate(engine, args.competitions, args.seasons, args.teams, args.seed)
+    elapsed = time.perf_counter() - t0
+    print(" · ".join(f"{k}={v}" for k, v in counts.items()) + f" · {elapsed:.1f}s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
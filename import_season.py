@@ -0,0 +1,30 @@
+import argparse
+
+from app.db import SessionLocal, engine
+from app.importer import import_season, read_records
+from app.schema import ensure_schema_current
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import massivo di una stagione (CSV / JSONL / Parquet)")
+    parser.add_argument("competition", help='es. "Serie A"')
+    parser.add_argument("season", help='es. "2023-2024"')
+    parser.add_argument("fixtures", help="file partite")
+    parser.add_argument("events", nargs="?", help="file eventi (gol + cartellini)")
+    parser.add_argument("--batch-size", type=int, default=500, help="partite per transazione")
+    args = parser.parse_args()
+
+    ensure_schema_current(engine)
+
+    fixtures = read_records(args.fixtures)
+    events = read_records(args.events) if args.events else []
+
+    db = SessionLocal()
+    try:
+        report = import_season(db, args.competition, args.season, fixtures, events, args.batch_size)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"Import completato: {report}")
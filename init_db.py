@@ -1,6 +1,12 @@
 from app.db import engine
-from app.models import Base
+from app.schema import current_revision, head_revision, upgrade_schema
 
 if __name__ == "__main__":
-    Base.metadata.create_all(bind=engine)
-    print("DB creato/aggiornato: retbet.db")
+    # migrazioni Alembic (equivale a "alembic upgrade head"); un DB senza migrazioni
+    # (creato con create_all) viene marcato alla head se già allineato, altrimenti alla baseline
+    before = current_revision(engine)
+    after = upgrade_schema(engine)
+    if before == after:
+        print(f"DB già aggiornato: revisione {after}")
+    else:
+        print(f"DB aggiornato: revisione {before or '-'} -> {after} (head {head_revision()})")
@@ -0,0 +1,54 @@
+# migrations/env.py
+# Connessione: quella passata da app/schema.py (config.attributes["connection"]),
+# altrimenti l'engine di app/db.py (RETBET_DATABASE_URL).
+from alembic import context
+
+from app.db import engine
+from app.models import Base
+from app.search import SEARCH_TABLE
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # indice FTS5 e tabelle interne: gestiti a mano (app/search.py), fuori dall'autogenerate
+    if type_ == "table" and reflected and name.startswith(SEARCH_TABLE):
+        return False
+    return True
+
+
+def _configure(**kw):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite: ALTER limitati, le modifiche di colonna passano da copia tabella
+        render_as_batch=engine.dialect.name == "sqlite",
+        **kw,
+    )
+
+
+def run_migrations_offline() -> None:
+    _configure(url=engine.url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
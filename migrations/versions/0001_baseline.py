@@ -0,0 +1,146 @@
+"""baseline: anagrafiche, partite, gol, cartellini
+
+Schema di partenza (prima di classifiche, statistiche e indici). I DB creati con
+create_all prima delle migrazioni vengono marcati a questa revisione (app/schema.py)
+e portati avanti dalle successive.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "countries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("code", sa.String(length=3), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("code"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "teams",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("crest_url", sa.String(), nullable=True),
+        sa.Column("extras", sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "competitions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("country_id", sa.Integer(), nullable=False),
+        sa.Column("division", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["country_id"], ["countries.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "seasons",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("competition_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["competition_id"], ["competitions.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("competition_id", "name", name="uq_season_comp_name"),
+    )
+    op.create_table(
+        "matches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("season_id", sa.Integer(), nullable=False),
+        sa.Column("matchday", sa.Integer(), nullable=False),
+        sa.Column("kickoff", sa.DateTime(), nullable=False),
+        sa.Column("home_team_id", sa.Integer(), nullable=False),
+        sa.Column("away_team_id", sa.Integer(), nullable=False),
+        sa.Column("referee", sa.String(), nullable=True),
+        sa.Column("extras", sa.JSON(), nullable=False),
+        sa.Column("home_team_name", sa.String(), nullable=False),
+        sa.Column("away_team_name", sa.String(), nullable=False),
+        sa.Column("home_score", sa.Integer(), nullable=False),
+        sa.Column("away_score", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["away_team_id"], ["teams.id"]),
+        sa.ForeignKeyConstraint(["home_team_id"], ["teams.id"]),
+        sa.ForeignKeyConstraint(["season_id"], ["seasons.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_matches_id", "matches", ["id"], unique=False)
+    op.create_table(
+        "team_seasons",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("team_id", sa.Integer(), nullable=False),
+        sa.Column("season_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["season_id"], ["seasons.id"]),
+        sa.ForeignKeyConstraint(["team_id"], ["teams.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("team_id", "season_id", name="uq_team_season"),
+    )
+    op.create_table(
+        "players",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("country_id", sa.Integer(), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("birth_date", sa.Date(), nullable=True),
+        sa.Column("age_years", sa.Integer(), nullable=True),
+        sa.Column("macro_role", sa.String(), nullable=True),
+        sa.Column("micro_roles", sa.JSON(), nullable=False),
+        sa.Column("jersey_number", sa.Integer(), nullable=True),
+        sa.Column("extras", sa.JSON(), nullable=False),
+        sa.Column("current_team_season_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["country_id"], ["countries.id"]),
+        sa.ForeignKeyConstraint(["current_team_season_id"], ["team_seasons.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_players_first_name", "players", ["first_name"], unique=False)
+    op.create_index("ix_players_last_name", "players", ["last_name"], unique=False)
+    op.create_table(
+        "cards",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("match_id", sa.Integer(), nullable=False),
+        sa.Column("team_id", sa.Integer(), nullable=False),
+        sa.Column("player_id", sa.Integer(), nullable=True),
+        sa.Column("minute", sa.Integer(), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("card_type", sa.String(), nullable=False),
+        sa.Column("extras", sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(["match_id"], ["matches.id"]),
+        sa.ForeignKeyConstraint(["player_id"], ["players.id"]),
+        sa.ForeignKeyConstraint(["team_id"], ["teams.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "goals",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("match_id", sa.Integer(), nullable=False),
+        sa.Column("team_id", sa.Integer(), nullable=False),
+        sa.Column("scorer_player_id", sa.Integer(), nullable=True),
+        sa.Column("assist_player_id", sa.Integer(), nullable=True),
+        sa.Column("minute", sa.Integer(), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("goal_type", sa.String(), nullable=False),
+        sa.Column("extras", sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(["assist_player_id"], ["players.id"]),
+        sa.ForeignKeyConstraint(["match_id"], ["matches.id"]),
+        sa.ForeignKeyConstraint(["scorer_player_id"], ["players.id"]),
+        sa.ForeignKeyConstraint(["team_id"], ["teams.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    for table in ("goals", "cards", "players", "team_seasons", "matches", "seasons", "competitions", "teams", "countries"):
+        op.drop_table(table)
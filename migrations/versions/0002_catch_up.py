@@ -0,0 +1,188 @@
+"""catch-up: classifiche, statistiche, versioni dati, live, indici, attributi promossi, ricerca
+
+Tutto quello che prima arrivava da create_all. Idempotente: un DB creato con create_all
+può avere già una parte di queste tabelle/indici (dipende da quando è stato creato).
+I DB più vecchi non hanno ancora birth_date / age_years / current_team_season_id su players:
+vengono aggiunte e riempite, dove possibile, dalle vecchie birth_year / current_team_id.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.extras import extras_value
+from app.search import SEARCH_TABLE, create_search_index
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabella, colonna, chiave extras, tipo)
+PROMOTED = [
+    ("matches", "stadium", "stadium", sa.String),
+    ("goals", "xg", "xg", sa.Float),
+    ("goals", "body_part", "body_part", sa.String),
+    ("cards", "var_reviewed", "var_reviewed", sa.Boolean),
+]
+
+# (nome, tabella, colonne)
+INDEXES = [
+    ("ix_matches_season_matchday", "matches", ["season_id", "matchday", "kickoff"]),
+    ("ix_matches_home_away", "matches", ["home_team_id", "away_team_id"]),
+    ("ix_matches_away_season", "matches", ["away_team_id", "season_id"]),
+    ("ix_matches_stadium", "matches", ["stadium"]),
+    ("ix_goals_match", "goals", ["match_id", "minute"]),
+    ("ix_goals_scorer", "goals", ["scorer_player_id"]),
+    ("ix_goals_assist", "goals", ["assist_player_id"]),
+    ("ix_goals_xg", "goals", ["xg"]),
+    ("ix_goals_body_part", "goals", ["body_part"]),
+    ("ix_cards_match", "cards", ["match_id", "minute"]),
+    ("ix_cards_player", "cards", ["player_id"]),
+    ("ix_cards_var_reviewed", "cards", ["var_reviewed"]),
+    ("ix_players_team_season_name", "players", ["current_team_season_id", "last_name", "first_name"]),
+    ("ix_team_seasons_season", "team_seasons", ["season_id"]),
+    ("ix_standings_season_points", "standings", ["season_id", "points"]),
+    ("ix_player_stats_season_goals", "player_season_stats", ["season_id", "goals"]),
+    ("ix_player_stats_season_assists", "player_season_stats", ["season_id", "assists"]),
+    ("ix_live_matches_status", "live_matches", ["status"]),
+]
+
+_STANDING_COLUMNS = [
+    f"{prefix}{name}"
+    for prefix in ("", "home_", "away_")
+    for name in ("played", "won", "drawn", "lost", "goals_for", "goals_against")
+]
+_STANDING_COLUMNS.insert(6, "points")
+
+
+def _columns(table: str) -> set:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _upgrade_players() -> None:
+    cols = _columns("players")
+    if "birth_date" not in cols:
+        op.add_column("players", sa.Column("birth_date", sa.Date(), nullable=True))
+    if "age_years" not in cols:
+        op.add_column("players", sa.Column("age_years", sa.Integer(), nullable=True))
+        if "birth_year" in cols:
+            op.execute(
+                sa.text("UPDATE players SET age_years = :year - birth_year WHERE birth_year IS NOT NULL")
+                .bindparams(year=date.today().year)
+            )
+    if "current_team_season_id" not in cols:
+        # FK: su SQLite serve la copia della tabella (batch)
+        with op.batch_alter_table("players") as batch:
+            batch.add_column(sa.Column("current_team_season_id", sa.Integer(), nullable=True))
+            batch.create_foreign_key(
+                "fk_players_current_team_season", "team_seasons", ["current_team_season_id"], ["id"],
+            )
+        if "current_team_id" in cols:
+            # la squadra di allora => la sua stagione più recente
+            op.execute(sa.text(
+                "UPDATE players SET current_team_season_id = ("
+                " SELECT MAX(ts.id) FROM team_seasons ts WHERE ts.team_id = players.current_team_id"
+                ") WHERE current_team_id IS NOT NULL"
+            ))
+
+
+def upgrade() -> None:
+    _upgrade_players()
+
+    op.create_table(
+        "data_versions",
+        sa.Column("scope", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "standings",
+        sa.Column("season_id", sa.Integer(), nullable=False),
+        sa.Column("team_id", sa.Integer(), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False) for name in _STANDING_COLUMNS],
+        sa.ForeignKeyConstraint(["season_id"], ["seasons.id"]),
+        sa.ForeignKeyConstraint(["team_id"], ["teams.id"]),
+        sa.PrimaryKeyConstraint("season_id", "team_id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "player_season_stats",
+        sa.Column("player_id", sa.Integer(), nullable=False),
+        sa.Column("season_id", sa.Integer(), nullable=False),
+        *[
+            sa.Column(name, sa.Integer(), nullable=False)
+            for name in (
+                "goals", "assists", "penalties", "own_goals", "goals_1t", "goals_2t",
+                "yellow_cards", "second_yellow_cards", "red_cards", "cards_1t", "cards_2t",
+            )
+        ],
+        sa.ForeignKeyConstraint(["player_id"], ["players.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["season_id"], ["seasons.id"]),
+        sa.PrimaryKeyConstraint("player_id", "season_id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "live_matches",
+        sa.Column("match_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("last_seq", sa.Integer(), nullable=False),
+        sa.Column("home_score", sa.Integer(), nullable=False),
+        sa.Column("away_score", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["match_id"], ["matches.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("match_id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "match_events",
+        sa.Column("match_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("player_team_id", sa.Integer(), nullable=True),
+        sa.Column("player_id", sa.Integer(), nullable=True),
+        sa.Column("assist_player_id", sa.Integer(), nullable=True),
+        sa.Column("minute", sa.Integer(), nullable=True),
+        sa.Column("period", sa.String(), nullable=True),
+        sa.Column("event_type", sa.String(), nullable=True),
+        sa.Column("retracts_seq", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["assist_player_id"], ["players.id"]),
+        sa.ForeignKeyConstraint(["match_id"], ["matches.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["player_id"], ["players.id"]),
+        sa.ForeignKeyConstraint(["player_team_id"], ["teams.id"]),
+        sa.PrimaryKeyConstraint("match_id", "seq"),
+        if_not_exists=True,
+    )
+
+    # colonne generate da extras (app/extras.py): calcolate dal DB anche sulle righe esistenti
+    for table, column, key, type_ in PROMOTED:
+        if column not in _columns(table):
+            op.add_column(table, sa.Column(column, type_(), sa.Computed(extras_value(key, type_)), nullable=True))
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+    if op.get_bind().dialect.name == "sqlite":
+        create_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("players_search_ai", "players_search_ad", "players_search_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    for table, column, _, _ in reversed(PROMOTED):
+        op.drop_column(table, column)
+    for table in ("match_events", "live_matches", "player_season_stats", "standings", "data_versions"):
+        op.drop_table(table)
@@ -0,0 +1,50 @@
+"""backtest per giornata: stato cumulativo per squadra e punteggi (app/backtest.py)
+
+Idempotente come 0002: un DB creato con create_all e marcato alla baseline ha già le tabelle.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backtest_steps",
+        sa.Column("season_id", sa.Integer(), nullable=False),
+        sa.Column("matchday", sa.Integer(), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column("state", sa.JSON(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["season_id"], ["seasons.id"]),
+        sa.PrimaryKeyConstraint("season_id", "matchday"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "backtest_scores",
+        sa.Column("season_id", sa.Integer(), nullable=False),
+        sa.Column("matchday", sa.Integer(), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("market", sa.String(), nullable=False),
+        sa.Column("n", sa.Integer(), nullable=False),
+        sa.Column("brier_sum", sa.Float(), nullable=False),
+        sa.Column("log_loss_sum", sa.Float(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["season_id"], ["seasons.id"]),
+        sa.PrimaryKeyConstraint("season_id", "matchday", "model", "market"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("backtest_scores", if_exists=True)
+    op.drop_table("backtest_steps", if_exists=True)
@@ -0,0 +1,36 @@
+"""match_events: un solo evento "retract" per (partita, seq annullato)
+
+Eventuali doppioni lasciati da due annullamenti concorrenti vengono tolti prima dell'indice
+(resta il primo; a fine partita contava comunque una volta sola, vedi effective_events).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RETRACT = sa.text("kind = 'retract'")
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM match_events WHERE kind = 'retract' AND seq > ("
+        "SELECT MIN(e.seq) FROM match_events e WHERE e.match_id = match_events.match_id "
+        "AND e.kind = 'retract' AND e.retracts_seq = match_events.retracts_seq)"
+    )
+    op.create_index(
+        "ux_match_events_retract", "match_events", ["match_id", "retracts_seq"], unique=True,
+        sqlite_where=RETRACT, postgresql_where=RETRACT, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_match_events_retract", table_name="match_events", if_exists=True)
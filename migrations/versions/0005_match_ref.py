@@ -0,0 +1,27 @@
+"""matches.match_ref: riferimento dell'import, univoco per stagione (reimport senza doppioni)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite non ha ADD COLUMN IF NOT EXISTS
+    if "match_ref" not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns("matches")}:
+        op.add_column("matches", sa.Column("match_ref", sa.String(), nullable=True))
+    op.create_index("ux_matches_season_ref", "matches", ["season_id", "match_ref"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_matches_season_ref", table_name="matches", if_exists=True)
+    op.drop_column("matches", "match_ref")
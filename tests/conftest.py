@@ -0,0 +1,47 @@
+# tests/conftest.py
+# DB SQLite temporaneo costruito con le migrazioni (come in produzione) e, per i test che
+# leggono dati, popolato con il generatore sintetico di bench/synth.py (4 squadre, 12 partite).
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import app.db  # noqa: E402
+from app.db import make_engine  # noqa: E402
+from app.schema import upgrade_schema  # noqa: E402
+from bench.synth import generate  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = make_engine(f"sqlite:///{tmp_path / 'retbet.db'}")
+    upgrade_schema(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def synth_engine(engine):
+    generate(engine, competitions=1, seasons=1, teams=4, seed=1)
+    return engine
+
+
+@pytest.fixture
+def routed(synth_engine, monkeypatch):
+    # RoutingSession sul DB del test: writer = synth_engine, lettori = secondo engine sullo stesso file.
+    # -> (factory, statement per ruolo)
+    reader = make_engine(str(synth_engine.url), role="read")
+    monkeypatch.setattr(app.db, "engine", synth_engine)
+    monkeypatch.setattr(app.db, "read_engine", reader)
+    log = {"write": [], "read": []}
+    for role, eng in (("write", synth_engine), ("read", reader)):
+        event.listen(eng, "before_cursor_execute",
+                     lambda _c, _cur, sql, *_a, role=role: log[role].append(sql.split()[0].upper()))
+    yield sessionmaker(class_=app.db.RoutingSession), log
+    reader.dispose()
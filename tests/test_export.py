@@ -0,0 +1,45 @@
+# tests/test_export.py
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.export import export_snapshot, read_table
+
+
+@pytest.fixture
+def snapshot(synth_engine, tmp_path):
+    out = tmp_path / "snap"
+    export_snapshot(synth_engine, out, ipc=True)
+    return out
+
+
+@pytest.mark.parametrize("table, types", [
+    ("matches", {"match_id": pa.int64(), "kickoff": pa.timestamp("us"), "home_score": pa.int64(),
+                 "referee": pa.string(), "extras": pa.string()}),
+    ("goals", {"scorer_player_id": pa.int64(), "assist_player_id": pa.int64(), "minute": pa.int64()}),
+    ("cards", {"player_id": pa.int64(), "card_type": pa.string()}),
+    ("players", {"country_id": pa.int64(), "birth_date": pa.date32(), "micro_roles": pa.string(),
+                 "current_team_season_id": pa.int64()}),
+])
+def test_field_types(snapshot, table, types):
+    # stesso tipo in ogni partizione (Parquet e IPC), anche con colonne nullable piene di null
+    parts = sorted(Path(snapshot, table).glob("*/*/part-0.parquet"))
+    assert parts
+    schemas = [pq.read_schema(p) for p in parts]
+    schemas.append(read_table(snapshot, table, competition_id=1, season_id=1).schema)
+    for schema in schemas:
+        for name, expected in types.items():
+            assert schema.field(name).type == expected, (table, name)
+
+
+def test_nullable_ids_stay_integers(snapshot):
+    assists = read_table(snapshot, "goals", columns=["assist_player_id"])["assist_player_id"]
+    assert assists.null_count > 0
+    assert all(isinstance(v, int) for v in assists.drop_null().to_pylist())
+
+
+def test_second_export_writes_nothing(synth_engine, snapshot):
+    report = export_snapshot(synth_engine, snapshot, ipc=True)
+    assert report.written == [] and report.removed == []
@@ -0,0 +1,59 @@
+# tests/test_importer.py
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.importer import import_season
+from app.match_service import MatchValidationError
+from app.models import Competition, Country, Goal, Match, Standing
+
+FIXTURES = [
+    {"match_ref": str(i + 1), "matchday": i // 2 + 1, "kickoff": f"2023-08-{19 + i} 18:30",
+     "home_team": home, "away_team": away}
+    for i, (home, away) in enumerate([("Inter", "Milan"), ("Roma", "Lazio"), ("Milan", "Roma"), ("Lazio", "Inter")])
+]
+EVENTS = [
+    {"match_ref": "1", "event": "goal", "team": "Inter", "player": None, "minute": 10, "type": "open_play"},
+    {"match_ref": "3", "event": "card", "team": "Roma", "player": None, "minute": 60, "type": "yellow"},
+]
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        country_id = session.scalar(insert(Country).values(name="Italy", code="ITA").returning(Country.id))
+        session.execute(insert(Competition).values(name="Serie A", country_id=country_id, division=1))
+        session.commit()
+        yield session
+
+
+def _counts(db):
+    return (
+        db.scalar(select(func.count()).select_from(Match)),
+        db.scalar(select(func.count()).select_from(Goal)),
+        db.scalar(select(func.sum(Standing.played))),
+    )
+
+
+def test_reimport_skips_existing_matches(db):
+    first = import_season(db, "Serie A", "2023-2024", FIXTURES, EVENTS, batch_size=2)
+    assert (first.matches, first.skipped) == (4, 0)
+    before = _counts(db)
+
+    again = import_season(db, "Serie A", "2023-2024", FIXTURES, EVENTS, batch_size=2)
+    assert (again.matches, again.skipped, again.goals) == (0, 4, 0)
+    assert _counts(db) == before == (4, 1, 8)
+
+
+def test_interrupted_import_resumes(db):
+    # il secondo batch fallisce: il primo resta salvato, il rilancio completa senza doppioni
+    broken = EVENTS + [{"match_ref": "4", "event": "goal", "team": "Juventus", "player": None,
+                        "minute": 5, "type": "open_play"}]
+    with pytest.raises(MatchValidationError):
+        import_season(db, "Serie A", "2023-2024", FIXTURES, broken, batch_size=2)
+    db.rollback()
+    assert _counts(db)[0] == 2
+
+    report = import_season(db, "Serie A", "2023-2024", FIXTURES, EVENTS, batch_size=2)
+    assert (report.matches, report.skipped) == (2, 2)
+    assert _counts(db) == (4, 1, 8)
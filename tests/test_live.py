@@ -0,0 +1,97 @@
+# tests/test_live.py
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.async_queries import season_matches_stmt
+from app.export import export_snapshot, read_table
+from app.live import append_goal, finalize_live_match, live_state, retract_event, start_live_match
+from app.match_service import MatchDraft, MatchValidationError
+from app.models import LiveMatch, MatchEvent, TeamSeason
+
+
+def _live_goals(engine, n=1):
+    with Session(engine) as db:
+        home, away = db.scalars(select(TeamSeason.team_id).order_by(TeamSeason.team_id).limit(2)).all()
+        match_id = start_live_match(db, MatchDraft(
+            season_id=1, matchday=99, kickoff=datetime(2026, 5, 1, 15), home_team_id=home, away_team_id=away,
+        ))
+        state = live_state(db, match_id)
+        for minute in range(1, n + 1):
+            state = append_goal(db, state, {
+                "player_team_id": home, "minute": minute, "period": "1T", "goal_type": "open_play",
+            })
+    assert state.home_score == n
+    return state
+
+
+def _retract_rows(engine, match_id):
+    with Session(engine) as db:
+        return db.scalar(
+            select(func.count()).select_from(MatchEvent)
+            .where(MatchEvent.match_id == match_id, MatchEvent.kind == "retract")
+        )
+
+
+def test_retract_twice(synth_engine):
+    state = _live_goals(synth_engine)
+    with Session(synth_engine) as db:
+        state = retract_event(db, state, 1)
+        with pytest.raises(MatchValidationError):
+            retract_event(db, state, 1)
+    assert state.home_score == 0
+    assert _retract_rows(synth_engine, state.match_id) == 1
+
+
+def test_concurrent_retract(synth_engine):
+    # la finestra della gara è stretta: più gol, ognuno annullato da due thread insieme
+    goals = 10
+    state = _live_goals(synth_engine, goals)
+    outcomes = []
+
+    def undo(barrier, seq):
+        with Session(synth_engine) as db:
+            barrier.wait()
+            try:
+                retract_event(db, state, seq)
+                outcomes.append("ok")
+            except MatchValidationError:
+                outcomes.append("rejected")
+
+    for seq in range(1, goals + 1):
+        barrier = threading.Barrier(2)
+        threads = [threading.Thread(target=undo, args=(barrier, seq)) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert sorted(outcomes) == ["ok"] * goals + ["rejected"] * goals
+    assert _retract_rows(synth_engine, state.match_id) == goals
+    with Session(synth_engine) as db:
+        assert db.get(LiveMatch, state.match_id).home_score == 0
+
+
+def test_open_live_match_not_published(synth_engine, tmp_path):
+    # 1-0 provvisorio: né lista partite dell'API né snapshot finché la partita non è chiusa
+    state = _live_goals(synth_engine)
+
+    def api_ids():
+        with Session(synth_engine) as db:
+            return {m.id for m in db.scalars(season_matches_stmt(1, limit=1000))}
+
+    def snapshot_ids():
+        export_snapshot(synth_engine, tmp_path / "snap")
+        return set(read_table(tmp_path / "snap", "matches", columns=["match_id"])["match_id"].to_pylist())
+
+    assert state.match_id not in api_ids()
+    assert state.match_id not in snapshot_ids()
+    assert len(api_ids()) == 12
+
+    with Session(synth_engine) as db:
+        finalize_live_match(db, state.match_id)
+    assert state.match_id in api_ids()
+    assert state.match_id in snapshot_ids()
@@ -0,0 +1,26 @@
+# tests/test_player_stats.py
+from sqlalchemy import select
+
+from app.models import PlayerSeasonStat
+from app.player_stats import rebuild_player_stats
+
+
+def _stats(db):
+    return sorted(tuple(r) for r in db.execute(
+        select(*[c for c in PlayerSeasonStat.__table__.columns])
+    ))
+
+
+def test_rebuild_reads_after_delete_on_writer(routed):
+    factory, log = routed
+    with factory() as db:
+        expected = _stats(db)
+        log["write"].clear()
+        log["read"].clear()
+        rebuild_player_stats(db)
+        db.commit()
+        # DELETE e poi le SELECT su goals/cards, tutto sulla connessione del writer
+        assert log["write"][0] == "DELETE"
+        assert log["write"].count("SELECT") == 2
+        assert log["read"] == []
+        assert _stats(db) == expected
@@ -0,0 +1,40 @@
+# tests/test_query_plans.py
+import pytest
+from sqlalchemy import text
+
+from app.query_plans import empty_engine, explain, full_scans, hot_queries
+
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    engine = empty_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", sorted(hot_queries()))
+def test_hot_query_uses_index(plan_engine, name):
+    plan = explain(plan_engine, hot_queries()[name])
+    assert full_scans(plan) == [], plan
+
+
+@pytest.mark.parametrize("step, table", [
+    ("SCAN matches", "matches"),
+    ("SCAN TABLE matches AS m", "matches"),
+    ("SCAN players USING INDEX ix_players_last_name", "players"),
+    ("SCAN TABLE players USING COVERING INDEX ix_players_team_season_name", "players"),
+    ("SCAN player_search VIRTUAL TABLE INDEX 32:M3", None),
+    ("SEARCH matches USING INDEX ix_matches_season_matchday (season_id=?)", None),
+])
+def test_full_scan_detection(step, table):
+    assert full_scans([step]) == ([table] if table else [])
+
+
+def test_missing_index_is_reported():
+    # senza l'indice della rosa SQLite ripiega su ix_players_last_name: scansione di tutto l'indice
+    engine = empty_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_players_team_season_name"))
+    plan = explain(engine, hot_queries()["roster per team-season"])
+    assert full_scans(plan) == ["players"], plan
+    engine.dispose()
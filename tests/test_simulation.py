@@ -0,0 +1,34 @@
+# tests/test_simulation.py
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Match, Team, TeamSeason
+from app.simulation import season_state, simulate_season
+
+
+def test_simulated_count_is_exact(synth_engine):
+    res = simulate_season(synth_engine, 1, n_sims=1001, seed=3, workers=1)
+    assert res.n_sims == 1001
+    np.testing.assert_allclose(res.positions.sum(axis=1), 1.0)
+
+
+def test_team_without_team_season(synth_engine):
+    # partita giocata contro una squadra non iscritta alla stagione: conta per lei, non per la vicina
+    with Session(synth_engine) as db:
+        home = db.scalar(select(TeamSeason.team_id).where(TeamSeason.season_id == 1).order_by(TeamSeason.team_id))
+        guest = db.scalar(insert(Team).values(name="Ospite").returning(Team.id))
+        db.execute(insert(Match).values(
+            season_id=1, matchday=99, kickoff=datetime(2026, 5, 1, 15), home_team_id=home, away_team_id=guest,
+            home_team_name="", away_team_name="Ospite", home_score=0, away_score=2,
+        ))
+        db.commit()
+
+    state = season_state(synth_engine, 1)
+    assert guest in state.team_ids
+    i = int(np.searchsorted(state.team_ids, guest))
+    assert state.team_ids[i] == guest
+    assert state.points[i] == 3 and state.goals_for[i] == 2
+    assert len(state.team_ids) == 5 and len(state.team_names) == 5
@@ -0,0 +1,43 @@
+# ui/debug_panel.py
+# Pannello debug SQL nella sidebar (solo con RETBET_SQL_DEBUG=1): query del rerun corrente,
+# statement più ripetuti (le raffiche N+1 saltano all'occhio) e storico degli ultimi rerun.
+import streamlit as st
+
+from app.instrumentation import SQL_DEBUG, SLOW_QUERY_MS, current_stats
+from app.session import SQL_HISTORY_KEY
+
+
+def _statement_rows(stats, n: int = 10):
+    return [
+        {
+            "N": s.count,
+            "Totale ms": round(s.total_ms, 2),
+            "Max ms": round(s.max_ms, 2),
+            "SQL": " ".join(sql.split())[:300],
+        }
+        for sql, s in stats.top(n, by="count")
+    ]
+
+
+def render_sql_panel(state) -> None:
+    # da chiamare in fondo alla pagina, prima di close_rerun_session
+    if not SQL_DEBUG:
+        return
+    stats = current_stats()
+    history = list(state.get(SQL_HISTORY_KEY, ()))
+
+    with st.sidebar.expander(f"🐞 SQL · {stats.count} query · {stats.total_ms:.1f} ms", expanded=False):
+        st.caption(f"Rerun corrente (callback compresi) · log query lente oltre {SLOW_QUERY_MS:g} ms")
+        st.dataframe(_statement_rows(stats), hide_index=True, width="stretch")
+
+        if history:
+            st.caption("Rerun precedenti")
+            st.dataframe(
+                [
+                    {"Ora": h.label, "Query": h.count, "ms": round(h.total_ms, 1),
+                     "Più ripetuta": f"{h.top(1, by='count')[0][1].count}x" if h.statements else ""}
+                    for h in reversed(history)
+                ],
+                hide_index=True,
+                width="stretch",
+            )
@@ -1,6 +1,6 @@
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
 import datetime as dt
 
 import streamlit as st
@@ -10,15 +10,39 @@ ROOT = Path(__file__).resolve().parents[1]  # ...\retbet
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.db import SessionLocal, engine
-from app.models import Base, Competition, Season, Team, Player, Match, Goal, Country
+from app.db import SessionLocal
+from app.live import (
+    LIVE,
+    LiveMatchClosed,
+    append_card,
+    append_goal,
+    effective_events,
+    events_since,
+    finalize_live_match,
+    live_state,
+    open_live_matches,
+    retract_event,
+    start_live_match,
+)
+from app.models import Competition, Season, Team, TeamSeason, Player, Country
+from app.queries import CARD_ICONS, card_table_rows, goal_table_rows
+from app.readmodels import player_options
+from app.refdata import get_refdata
+from app.match_service import MatchDraft, MatchValidationError, save_match
+from app.scoring import compute_live_score
+from app.session import close_rerun_session, ensure_schema, open_rerun_session
+from ui.debug_panel import render_sql_panel
 
-Base.metadata.create_all(bind=engine)
+ensure_schema()
 
 st.set_page_config(page_title="Inserimento Partite", layout="wide")
+
+LIVE_REFRESH_SECONDS = 5  # refresh del tabellone live
+
 st.title("📥 Inserimento partita")
 
-db = SessionLocal()
+# una sessione per rerun e per utente, chiusa a fine script
+db = open_rerun_session(st.session_state)
 
 
 # ---------------- Utils ----------------
@@ -61,19 +85,6 @@ def get_or_create(model, **kwargs):
     return obj
 
 
-def compute_live_score(goals, home_id, away_id):
-    hs, as_ = 0, 0
-    for g in goals:
-        player_team_id = g["player_team_id"]
-        is_og = g["goal_type"] == "own_goal"
-        goal_team_id = (home_id if player_team_id == away_id else away_id) if is_og else player_team_id
-        if goal_team_id == home_id:
-            hs += 1
-        elif goal_team_id == away_id:
-            as_ += 1
-    return hs, as_
-
-
 # ---------------- Sidebar: setup rapido ----------------
 with st.sidebar:
     st.header("Setup rapido")
@@ -82,7 +93,7 @@ with st.sidebar:
     season_name = st.text_input("Stagione (es. 2025-2026)", value="2025-2026")
 
     st.subheader("Paese competizione (obbligatorio)")
-    countries = db.query(Country).order_by(Country.name).all()
+    countries = get_refdata(db).countries
 
     country_id_options = [0] + [c.id for c in countries]
     country_id_to_label = {0: "—"} | {c.id: f"{c.name} ({c.code})" for c in countries}
@@ -104,12 +115,13 @@ with st.sidebar:
 
     if st.button("Crea/Carica competizione+stagione"):
         # risolvi country
-        country_obj = db.query(Country).get(country_pick_id) if country_pick_id != 0 else None
+        country_obj = get_refdata(db).countries_by_id.get(country_pick_id) if country_pick_id != 0 else None
         if country_name_in.strip() and country_code_in.strip():
             country_obj = get_or_create_country(country_name_in, country_code_in)
 
         if not country_obj:
             st.error("Seleziona o inserisci un Paese per la competizione.")
+            close_rerun_session(st.session_state)
             st.stop()
 
         comp = db.query(Competition).filter_by(name=comp_name.strip()).first()
@@ -154,12 +166,14 @@ with st.sidebar:
 st.divider()
 
 # ---------------- Selezione stagione/competizione ----------------
-comps = db.query(Competition).order_by(Competition.name).all()
+# dati di riferimento dalla cache di processo (riletti solo se la sidebar ha scritto)
+ref = get_refdata(db)
+comps = ref.competitions
 comp = st.selectbox("Competizione", comps, format_func=lambda x: x.name) if comps else None
-seasons = db.query(Season).filter_by(competition_id=comp.id).order_by(Season.name).all() if comp else []
+seasons = ref.seasons_of(comp.id) if comp else []
 season = st.selectbox("Stagione", seasons, format_func=lambda x: x.name) if seasons else None
 
-teams = db.query(Team).order_by(Team.name).all()
+teams = ref.teams
 
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -181,6 +195,120 @@ with colB:
     away = st.selectbox("Trasferta", teams, format_func=lambda x: x.name) if teams else None
 
 
+# ---------------- Modalità live ----------------
+# partita creata al calcio d'inizio, eventi scritti subito nel log (app/live.py):
+# un refresh del browser o un secondo operatore non perdono niente
+if "live_match_id" not in st.session_state:
+    st.session_state.live_match_id = None
+if "live_events" not in st.session_state:
+    st.session_state.live_events = []   # log già letto, seq crescente
+
+live = live_state(db, st.session_state.live_match_id) if st.session_state.live_match_id else None
+if live is not None and live.status != LIVE:
+    # chiusa da un altro operatore
+    st.info(f"La partita live ID={live.match_id} è stata chiusa: {live.home_score}-{live.away_score}.")
+    live = None
+if live is None:
+    st.session_state.live_match_id = None
+    st.session_state.live_events = []
+
+
+def follow_live(match_id: int):
+    st.session_state.live_match_id = match_id
+    st.session_state.live_events = []
+
+
+def sync_live_events(session, match_id: int):
+    # legge solo gli eventi dopo l'ultimo seq già visto
+    cached = st.session_state.live_events
+    last_seq = cached[-1].seq if cached else 0
+    cached.extend(events_since(session, match_id, last_seq))
+    return cached
+
+
+with st.expander("🔴 Live", expanded=live is not None):
+    if live is None:
+        lc1, lc2 = st.columns(2)
+        with lc1:
+            st.caption("Crea la partita adesso: gol e cartellini vengono salvati appena inseriti.")
+            if st.button("▶️ Inizia partita live", disabled=not (season and home and away)):
+                try:
+                    match_id = start_live_match(db, MatchDraft(
+                        season_id=season.id,
+                        matchday=int(matchday),
+                        kickoff=datetime.combine(kickoff_date, kickoff_time),
+                        home_team_id=home.id,
+                        away_team_id=away.id,
+                        home_team_name=home.name,
+                        away_team_name=away.name,
+                    ))
+                except MatchValidationError as e:
+                    st.error(f"Partita non creata: {e}")
+                else:
+                    follow_live(match_id)
+                    close_rerun_session(st.session_state)
+                    st.rerun()
+        with lc2:
+            open_matches = open_live_matches(db)
+            if open_matches:
+                picked = st.selectbox(
+                    "Partite live in corso",
+                    open_matches,
+                    format_func=lambda m: f"{m.home_team_name} {m.home_score}-{m.away_score} {m.away_team_name} (ID={m.match_id})",
+                    key="live_pick",
+                )
+                st.button("👀 Segui / riprendi", on_click=follow_live, args=(picked.match_id,))
+            else:
+                st.caption("Nessuna partita live in corso.")
+    else:
+        st.caption(
+            f"Partita live ID={live.match_id} · {live.last_seq} eventi nel log · "
+            "i dati sopra (stagione, squadre, kickoff) sono quelli della partita live"
+        )
+        goals_live, cards_live = effective_events(sync_live_events(db, live.match_id))
+        lc1, lc2, lc3 = st.columns([2, 1, 1])
+        with lc1:
+            undoable = sorted(goals_live + cards_live, key=lambda e: e["seq"], reverse=True)
+            undo_seq = st.selectbox(
+                "Evento da annullare",
+                [e["seq"] for e in undoable],
+                format_func=lambda seq: next(
+                    f"#{e['seq']} · {e['minute']}' · {'gol' if 'goal_type' in e else 'cartellino'}"
+                    for e in undoable if e["seq"] == seq
+                ),
+                key="live_undo_seq",
+            ) if undoable else None
+            if st.button("↩️ Annulla evento", disabled=undo_seq is None):
+                try:
+                    retract_event(db, live, undo_seq)
+                except (MatchValidationError, LiveMatchClosed) as e:
+                    st.error(str(e))
+                close_rerun_session(st.session_state)
+                st.rerun()
+        with lc2:
+            if st.button("🏁 Fine partita", type="primary"):
+                try:
+                    final_score = finalize_live_match(db, live.match_id)
+                except (MatchValidationError, LiveMatchClosed) as e:
+                    st.error(f"Partita non chiusa: {e}")
+                else:
+                    st.success(f"Partita chiusa (ID={live.match_id}) · Risultato: {final_score[0]}-{final_score[1]}")
+                    follow_live(None)
+                    close_rerun_session(st.session_state)
+                    st.rerun()
+        with lc3:
+            st.button("⏏️ Esci (resta live)", on_click=follow_live, args=(None,))
+
+if live is not None:
+    # in live la partita è quella nel DB, non quella dei selettori
+    season = ref.seasons_by_id.get(live.season_id)
+    home = ref.teams_by_id.get(live.home_team_id)
+    away = ref.teams_by_id.get(live.away_team_id)
+    kickoff_label = f"{live.kickoff.strftime('%d/%m/%Y · %H:%M')} · Giornata {live.matchday}"
+else:
+    kickoff_label = f"{kickoff_date.strftime('%d/%m/%Y')} · {kickoff_time_str} · Giornata {int(matchday)}"
+
+
 # ---------------- Match card (solo grafica) ----------------
 st.markdown("""
 <style>
@@ -191,24 +319,57 @@ st.markdown("""
 
 if "goals" not in st.session_state:
     st.session_state.goals = []
+if "cards" not in st.session_state:
+    st.session_state.cards = []
 
-hs, as_ = (0, 0)
-if home and away:
-    hs, as_ = compute_live_score(st.session_state.goals, home.id, away.id)
 
-st.markdown(f"""
+def match_card(hs: int, as_: int, badge: str = "Match"):
+    st.markdown(f"""
 <div class="card">
   <div style="display:flex; justify-content:space-between; align-items:center;">
     <div>
-      <div class="small">Match</div>
+      <div class="small">{badge}</div>
       <div style="font-size:1.4rem; font-weight:700;">{home.name if home else "—"} vs {away.name if away else "—"}</div>
-      <div class="small">{kickoff_date.strftime("%d/%m/%Y")} · {kickoff_time_str} · Giornata {int(matchday)}</div>
+      <div class="small">{kickoff_label}</div>
     </div>
     <div style="font-size:2rem; font-weight:800;">{hs} - {as_}</div>
   </div>
 </div>
 """, unsafe_allow_html=True)
 
+
+# id -> nome risolti in batch e tenuti in cache per sessione (niente query per gol a ogni rerun)
+if "name_cache" not in st.session_state:
+    st.session_state.name_cache = {}
+
+
+def event_tables(session, goals, cards):
+    st.dataframe(goal_table_rows(session, goals, st.session_state.name_cache), width="stretch", hide_index=True)
+    if cards:
+        st.dataframe(card_table_rows(session, cards, st.session_state.name_cache), width="stretch", hide_index=True)
+
+
+if live is not None:
+    # punteggio mantenuto evento per evento su live_matches, eventi letti dopo l'ultimo seq visto;
+    # il frammento si aggiorna da solo ogni LIVE_REFRESH_SECONDS (sessione propria, fuori dal rerun)
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_board(match_id: int):
+        with SessionLocal() as fdb:
+            state = live_state(fdb, match_id)
+            if state is None:
+                return
+            badge = "🔴 LIVE" if state.status == LIVE else "Finale"
+            match_card(state.home_score, state.away_score, badge=f"{badge} · {state.last_seq} eventi")
+            goals_live, cards_live = effective_events(sync_live_events(fdb, match_id))
+            event_tables(fdb, goals_live, cards_live)
+
+    live_board(live.match_id)
+else:
+    hs, as_ = (0, 0)
+    if home and away:
+        hs, as_ = compute_live_score(st.session_state.goals, home.id, away.id)
+    match_card(hs, as_)
+
 st.write("")
 
 
@@ -223,15 +384,16 @@ team_for_player = st.selectbox(
     key="team_for_player"
 )
 
-players_team = []
-if team_for_player:
-    players_team = (
-        db.query(Player)
-        .filter(Player.current_team_id == team_for_player.id)
-        .order_by(Player.last_name, Player.first_name)
-        .all()
+# rosa della squadra nella stagione scelta (Player -> TeamSeason)
+team_season_id = None
+if team_for_player and season:
+    team_season_id = next(
+        (ts.id for ts in ref.team_seasons_of(season.id) if ts.team_id == team_for_player.id), None
     )
 
+# solo le colonne mostrate nelle selectbox (PlayerOption), non oggetti ORM
+players_team = player_options(db, team_season_id) if team_season_id is not None else []
+
 player_mode = st.radio(
     "Giocatore: seleziona o inserisci",
     ["Seleziona esistente", "Inserisci nuovo"],
@@ -248,7 +410,7 @@ if player_mode == "Seleziona esistente":
         scorer_player = st.selectbox(
             "Marcatore",
             players_team,
-            format_func=lambda p: f"{p.last_name} {p.first_name} (#{p.jersey_number or '-'})",
+            format_func=lambda p: p.label,
             key="scorer_select"
         )
         scorer_player_id = scorer_player.id
@@ -268,14 +430,19 @@ else:
     if st.button("Crea giocatore", key="create_player_btn"):
         if not (fn.strip() and ln.strip()):
             st.error("Nome e cognome obbligatori.")
+        elif not (team_for_player and season):
+            st.error("Seleziona stagione e squadra.")
         else:
+            if team_season_id is None:
+                team_season_id = get_or_create(TeamSeason, team_id=team_for_player.id, season_id=season.id).id
             newp = Player(
                 first_name=fn.strip(),
                 last_name=ln.strip(),
-                birth_year=int(by),
+                # solo l'anno: età approssimata, la data completa si inserisce nella UI giocatori
+                age_years=date.today().year - int(by),
                 macro_role=macro,
                 micro_roles=micro,
-                current_team_id=team_for_player.id if team_for_player else None,
+                current_team_season_id=team_season_id,
                 jersey_number=int(jersey_new) if jersey_new else None,
             )
             db.add(newp)
@@ -308,105 +475,111 @@ if st.button("➕ Aggiungi gol", key="add_goal_btn"):
     elif scorer_player_id is None:
         st.error("Seleziona o crea il marcatore.")
     else:
-        st.session_state.goals.append({
+        goal = {
             "scorer_player_id": scorer_player_id,
             "assist_player_id": assist_player_id,
             "player_team_id": team_for_player.id,
             "minute": int(minute),
             "period": period,
             "goal_type": goal_type,
-        })
-
+        }
+        if live is not None:
+            try:
+                append_goal(db, live, goal)
+            except (MatchValidationError, LiveMatchClosed) as e:
+                st.error(f"Gol non registrato: {e}")
+            else:
+                close_rerun_session(st.session_state)
+                st.rerun()
+        else:
+            st.session_state.goals.append(goal)
 
-# ---------------- Lista gol inseriti ----------------
-st.subheader("🧾 Gol inseriti")
 
-pretty = []
-for g in st.session_state.goals:
-    scorer = db.query(Player).get(g["scorer_player_id"])
-    assist = db.query(Player).get(g["assist_player_id"]) if g["assist_player_id"] else None
-    team_p = db.query(Team).get(g["player_team_id"])
+# ---------------- Cartellini ----------------
+st.subheader("🟨 Cartellini")
 
-    tipo = "⚽" if g["goal_type"] != "own_goal" else "🔁 OG"
+ccol1, ccol2, ccol3, ccol4 = st.columns([2, 1, 1, 1])
+with ccol1:
+    card_player = st.selectbox(
+        "Giocatore ammonito/espulso",
+        [None] + players_team,
+        format_func=lambda p: "—" if p is None else f"{p.last_name} {p.first_name}",
+        key="card_player_select",
+    )
+with ccol2:
+    card_minute = st.number_input("Minuto", min_value=0, max_value=130, value=1, step=1, key="card_minute")
+with ccol3:
+    card_period = st.selectbox("Periodo", ["1T", "2T"], key="card_period")
+with ccol4:
+    card_type = st.selectbox("Tipo", ["yellow", "second_yellow", "red"], format_func=CARD_ICONS.get, key="card_type")
+
+if st.button("➕ Aggiungi cartellino", key="add_card_btn"):
+    if not team_for_player:
+        st.error("Seleziona la squadra del giocatore.")
+    else:
+        card = {
+            "player_id": card_player.id if card_player else None,
+            "player_team_id": team_for_player.id,
+            "minute": int(card_minute),
+            "period": card_period,
+            "card_type": card_type,
+        }
+        if live is not None:
+            try:
+                append_card(db, live, card)
+            except (MatchValidationError, LiveMatchClosed) as e:
+                st.error(f"Cartellino non registrato: {e}")
+            else:
+                close_rerun_session(st.session_state)
+                st.rerun()
+        else:
+            st.session_state.cards.append(card)
 
-    pretty.append({
-        "Squadra giocatore": team_p.name if team_p else None,
-        "Marcatore": f"{scorer.last_name} {scorer.first_name}" if scorer else None,
-        "Assist": f"{assist.last_name} {assist.first_name}" if assist else None,
-        "Min": g["minute"],
-        "Periodo": g["period"],
-        "Tipo": tipo
-    })
 
-st.dataframe(pretty, use_container_width=True, hide_index=True)
+# ---------------- Lista eventi inseriti ----------------
+if live is None:
+    st.subheader("🧾 Gol inseriti")
+    event_tables(db, st.session_state.goals, st.session_state.cards)
+else:
+    st.caption("Gol e cartellini della partita live sono nel tabellone in alto.")
 
 st.divider()
 
 
 # ---------------- Salvataggio match ----------------
-if st.button("💾 Salva partita nel DB", type="primary"):
+if live is not None:
+    st.caption("Partita live: gli eventi sono già salvati, chiudila con 🏁 Fine partita.")
+elif st.button("💾 Salva partita nel DB", type="primary"):
     if not season or not home or not away:
         st.error("Seleziona stagione e squadre.")
     elif home.id == away.id:
         st.error("Casa e trasferta non possono essere uguali.")
     else:
-        kickoff = datetime.combine(kickoff_date, kickoff_time)
-
-        # ✅ FIX: inizializza score
-        home_score = 0
-        away_score = 0
-
-        match = Match(
+        draft = MatchDraft(
             season_id=season.id,
             matchday=int(matchday),
-            kickoff=kickoff,
+            kickoff=datetime.combine(kickoff_date, kickoff_time),
             home_team_id=home.id,
             away_team_id=away.id,
-
-            # ✅ nuovi campi in matches
             home_team_name=home.name,
             away_team_name=away.name,
-            home_score=0,
-            away_score=0,
+            goals=list(st.session_state.goals),
+            cards=list(st.session_state.cards),
         )
-        db.add(match)
-        db.commit()
-        db.refresh(match)
-
-        for g in st.session_state.goals:
-            player_team_id = g["player_team_id"]
-            is_owngoal = g["goal_type"] == "own_goal"
-
-            # ✅ se autogol => gol alla squadra avversaria
-            if is_owngoal:
-                goal_team_id = home.id if player_team_id == away.id else away.id
-            else:
-                goal_team_id = player_team_id
-
-            # ✅ aggiorna risultato
-            if goal_team_id == home.id:
-                home_score += 1
-            elif goal_team_id == away.id:
-                away_score += 1
-
-            goal = Goal(
-                match_id=match.id,
-                team_id=goal_team_id,
-                scorer_player_id=g["scorer_player_id"],
-                assist_player_id=g["assist_player_id"],
-                minute=g["minute"],
-                period=g["period"],
-                goal_type=g["goal_type"],
-            )
-            db.add(goal)
-
-        db.commit()
-
-        # ✅ salva risultato nel match
-        match.home_score = home_score
-        match.away_score = away_score
-        db.commit()
+        home_score, away_score = draft.score()
+        try:
+            # match + gol + cartellini + classifica + statistiche in un'unica transazione (un commit)
+            match_id = save_match(db, draft)
+        except MatchValidationError as e:
+            st.error(f"Partita non salvata: {e}")
+            close_rerun_session(st.session_state)
+            st.stop()
 
-        st.success(f"Partita salvata (ID={match.id}) · Risultato: {home_score}-{away_score}")
+        st.success(f"Partita salvata (ID={match_id}) · Risultato: {home_score}-{away_score}")
         st.session_state.goals = []
+        st.session_state.cards = []
+        close_rerun_session(st.session_state)
         st.rerun()
+
+render_sql_panel(st.session_state)
+close_rerun_session(st.session_state)
@@ -2,17 +2,24 @@ import sys
 from pathlib import Path
 from datetime import date
 from sqlalchemy.exc import IntegrityError
+import pandas as pd
 import streamlit as st
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.db import SessionLocal, engine
-from app.models import Base, Competition, Season, Team, TeamSeason, Player, Country
+from app.db import SessionLocal
+from app.models import Competition, Season, Team, TeamSeason, Player, Country
+from app.queries import get_player_with_roster, roster_page
+from app.refdata import get_refdata
+from app.roster import apply_roster_edits, compute_age_years
+from app.session import close_rerun_session, ensure_schema, open_rerun_session
+from ui.debug_panel import render_sql_panel
 
-Base.metadata.create_all(bind=engine)
-db = SessionLocal()
+ensure_schema()
+# una sessione per rerun e per utente, chiusa a fine script
+db = open_rerun_session(st.session_state)
 
 st.set_page_config(page_title="Gestione Giocatori", layout="wide")
 st.title("👤 Inserimento / Gestione Giocatori")
@@ -20,6 +27,14 @@ st.title("👤 Inserimento / Gestione Giocatori")
 MACRO = ["GK", "DF", "MF", "ST"]
 MICRO = ["GK", "LB", "RB", "CB", "DM", "CM", "AM", "LM", "RM", "CF", "SS", "LW", "LF", "RW", "RF"]
 
+PAGE_SIZES = [25, 50, 100, 200]
+ACTION_NONE, ACTION_EDIT, ACTION_DELETE = "", "✏️ Modifica", "❌ Elimina"
+ACTIONS = [ACTION_NONE, ACTION_EDIT, ACTION_DELETE]
+GRID_COLUMNS = [
+    "id", "Azione", "last_name", "first_name", "full_name", "Squadra", "Stagione", "Nat",
+    "birth_date", "Età", "jersey_number", "macro_role", "micro_roles",
+]
+
 
 # ---------------- Helpers ----------------
 def get_or_create(model, **kwargs):
@@ -33,7 +48,7 @@ def get_or_create(model, **kwargs):
     return obj
 
 
-def get_or_create_country(name: str, code: str):
+def get_or_create_country(db, name: str, code: str):
     name = (name or "").strip()
     code = (code or "").strip().upper()
     if not name or not code:
@@ -58,18 +73,32 @@ def get_or_create_country(name: str, code: str):
         return db.query(Country).filter(Country.code == code).first()
 
 
-def compute_age_years(birth: date | None) -> int | None:
-    if not birth:
-        return None
-    today = date.today()
-    years = today.year - birth.year
-    if (today.month, today.day) < (birth.month, birth.day):
-        years -= 1
-    return years
+def _is_missing(value) -> bool:
+    # celle svuotate nella griglia arrivano come None / NaN / NaT
+    return value is None or (not isinstance(value, (list, tuple)) and pd.isna(value))
+
+
+def save_roster_edits(updates: dict, delete_ids: list):
+    # tutte le modifiche della pagina in una transazione: se una fallisce non si salva niente
+    try:
+        apply_roster_edits(db, updates, delete_ids)
+    except ValueError as e:
+        st.session_state["roster_error"] = str(e)
+        return
+    except IntegrityError:
+        # foreign_keys=ON: almeno un giocatore ha gol o cartellini registrati
+        st.session_state["roster_error"] = (
+            "Modifiche non salvate: tra i giocatori da eliminare c'è chi ha gol o cartellini registrati."
+        )
+        return
+    st.session_state["roster_error"] = ""
+    st.session_state["roster_grid_rev"] += 1
+    if st.session_state.get("edit_player_id") in delete_ids:
+        st.session_state["edit_player_id"] = None
 
 
-def start_edit(player_id: int):
-    p = db.query(Player).get(player_id)
+def start_edit(db, player_id: int):
+    p = get_player_with_roster(db, player_id)
     if not p:
         return
 
@@ -96,6 +125,12 @@ def reset_name_fields_only():
 
 
 def submit_player(team_season_id: int):
+    # callback on_click: gira prima del rerun, quando la sessione del rerun precedente è già chiusa
+    with SessionLocal() as db:
+        _submit_player(db, team_season_id)
+
+
+def _submit_player(db, team_season_id: int):
     first_name = (st.session_state.get("first_name_val") or "").strip()
     last_name = (st.session_state.get("last_name_val") or "").strip()
     full_name = (st.session_state.get("full_name_val") or "").strip() or None
@@ -107,14 +142,14 @@ def submit_player(team_season_id: int):
 
     # nazionalità: pick ID
     country_pick_id = int(st.session_state.get("country_pick_val") or 0)
-    country_obj = db.query(Country).get(country_pick_id) if country_pick_id != 0 else None
+    country_obj = get_refdata(db).countries_by_id.get(country_pick_id) if country_pick_id != 0 else None
 
     # nazionalità: creazione da input
     country_code_in = (st.session_state.get("country_code_val") or "").strip()
     country_name_in = (st.session_state.get("country_name_val") or "").strip()
 
     if country_name_in and country_code_in:
-        country_obj = get_or_create_country(country_name_in, country_code_in)
+        country_obj = get_or_create_country(db, country_name_in, country_code_in)
         st.session_state["country_code_val"] = ""
         st.session_state["country_name_val"] = ""
 
@@ -193,6 +228,18 @@ if "full_name_val" not in st.session_state:
 if "form_error" not in st.session_state:
     st.session_state["form_error"] = ""
 
+# griglia: filtro corrente, pila cursori keyset, revisione (cambia la key => azzera le modifiche)
+if "roster_filter" not in st.session_state:
+    st.session_state["roster_filter"] = None
+if "roster_cursors" not in st.session_state:
+    st.session_state["roster_cursors"] = [None]
+if "roster_grid_rev" not in st.session_state:
+    st.session_state["roster_grid_rev"] = 0
+if "roster_error" not in st.session_state:
+    st.session_state["roster_error"] = ""
+if "pending_roster_edits" not in st.session_state:
+    st.session_state["pending_roster_edits"] = None
+
 
 # ---------------- Sidebar: Setup rapido ----------------
 with st.sidebar:
@@ -211,34 +258,27 @@ with st.sidebar:
     st.subheader("Assegna club a Stagione (TeamSeason)")
     st.caption("Qui definisci: Atalanta in Serie A 2025-2026")
 
-    comps_sb = db.query(Competition).order_by(Competition.name).all()
+    # dati di riferimento dalla cache di processo (nessuna query se nessuno ha scritto)
+    ref_sb = get_refdata(db)
+    comps_sb = ref_sb.competitions
 
     comp_id_sb = st.selectbox(
         "Competizione",
         [c.id for c in comps_sb] if comps_sb else [],
-        format_func=lambda cid: next((c.name for c in comps_sb if c.id == cid), "—"),
+        format_func=lambda cid: ref_sb.competitions_by_id[cid].name if cid in ref_sb.competitions_by_id else "—",
         key="sb_comp_id",
     )
 
-    seasons_sb = (
-        db.query(Season)
-        .filter(Season.competition_id == comp_id_sb)
-        .order_by(Season.name)
-        .all()
-    ) if comp_id_sb else []
+    seasons_sb = ref_sb.seasons_of(comp_id_sb) if comp_id_sb else []
 
     season_id_sb = st.selectbox(
         "Stagione",
         [s.id for s in seasons_sb] if seasons_sb else [],
-        format_func=lambda sid: next((s.name for s in seasons_sb if s.id == sid), "—"),
+        format_func=lambda sid: ref_sb.seasons_by_id[sid].name if sid in ref_sb.seasons_by_id else "—",
         key="sb_season_id",
     )
 
-    # oggetti veri (solo se ti servono)
-    season_sb = db.query(Season).get(season_id_sb) if season_id_sb else None
-
-
-    teams_sb = db.query(Team).order_by(Team.name).all()
+    teams_sb = ref_sb.teams
     team_sb = st.selectbox("Club", teams_sb, format_func=lambda t: t.name, key="sb_team") if teams_sb else None
 
     if st.button("➕ Aggiungi squadra a questa stagione"):
@@ -259,159 +299,196 @@ with st.sidebar:
 st.divider()
 
 # ---------------- Selettori principali: Competition -> Season -> TeamSeason ----------------
-comps = db.query(Competition).order_by(Competition.name).all()
+# riletti qui: la sidebar potrebbe aver appena scritto (nuova versione => ricarica)
+ref = get_refdata(db)
+comps = ref.competitions
 if not comps:
     st.info("Prima crea almeno una Competizione/Stagione (nella UI match o da DB).")
-    st.stop()
-
-comps = db.query(Competition).order_by(Competition.name).all()
-if not comps:
-    st.info("Prima crea almeno una Competizione/Stagione.")
+    close_rerun_session(st.session_state)
     st.stop()
 
 comp_id = st.selectbox(
     "Competizione",
     [c.id for c in comps],
-    format_func=lambda cid: next((c.name for c in comps if c.id == cid), "—"),
+    format_func=lambda cid: ref.competitions_by_id[cid].name if cid in ref.competitions_by_id else "—",
     key="main_comp_id",
 )
 
-seasons = (
-    db.query(Season)
-    .filter(Season.competition_id == comp_id)
-    .order_by(Season.name)
-    .all()
-)
+seasons = ref.seasons_of(comp_id)
 if not seasons:
     st.info("Nessuna stagione per questa competizione.")
+    close_rerun_session(st.session_state)
     st.stop()
 
 season_id = st.selectbox(
     "Stagione",
     [s.id for s in seasons],
-    format_func=lambda sid: next((s.name for s in seasons if s.id == sid), "—"),
+    format_func=lambda sid: ref.seasons_by_id[sid].name if sid in ref.seasons_by_id else "—",
     key="main_season_id",
 )
 
-team_seasons = (
-    db.query(TeamSeason)
-    .filter(TeamSeason.season_id == season_id)
-    .all()
-)
+team_seasons = ref.team_seasons_of(season_id)
 if not team_seasons:
     st.info("Nessuna squadra registrata per questa stagione. Usa la sidebar per aggiungerla.")
+    close_rerun_session(st.session_state)
     st.stop()
 
 team_season_id = st.selectbox(
     "Squadra (in questa stagione)",
     [ts.id for ts in team_seasons],
-    format_func=lambda tsid: next((ts.team.name for ts in team_seasons if ts.id == tsid), "—"),
+    format_func=lambda tsid: ref.team_seasons_by_id[tsid].team_name if tsid in ref.team_seasons_by_id else "—",
     key="main_team_season_id",
 )
 
-# ricarico oggetti veri (se ti servono per caption)
-comp = db.query(Competition).get(comp_id)
-season = db.query(Season).get(season_id)
-team_season = db.query(TeamSeason).get(team_season_id)
+comp = ref.competitions_by_id[comp_id]
+season = ref.seasons_by_id[season_id]
+team_season = ref.team_seasons_by_id[team_season_id]
 
-st.caption(f"Vista corrente: **{comp.name}** · **{season.name}** · **{team_season.team.name}**")
-
-
-st.caption(f"Vista corrente: **{comp.name}** · **{season.name}** · **{team_season.team.name}**")
+st.caption(f"Vista corrente: **{comp.name}** · **{season.name}** · **{team_season.team_name}**")
 
 # ---------------- Lista giocatori di quella TeamSeason ----------------
-colA, colB = st.columns([2, 1])
+colA, colB, colC = st.columns([2, 1, 0.6])
 with colA:
     search = st.text_input("Cerca (cognome/nome/full name)", placeholder="es: Leao / Lautaro / Rafael Leão")
 with colB:
     show_all = st.checkbox("Mostra tutti (ignora stagione/squadra)", value=False)
-
-q = db.query(Player)
-if not show_all:
-    q = q.filter(Player.current_team_season_id == team_season_id)
-
-if search.strip():
-    s = f"%{search.strip()}%"
-    q = q.filter(
-        (Player.last_name.ilike(s)) |
-        (Player.first_name.ilike(s)) |
-        (Player.full_name.ilike(s))
-    )
-
-players = q.order_by(Player.last_name, Player.first_name).all()
+with colC:
+    page_size = st.selectbox("Righe", PAGE_SIZES, index=1, key="roster_page_size")
+
+# filtro cambiato => si riparte dalla prima pagina
+roster_filter = (None if show_all else team_season_id, (search or "").strip(), page_size)
+if st.session_state["roster_filter"] != roster_filter:
+    st.session_state["roster_filter"] = roster_filter
+    st.session_state["roster_cursors"] = [None]
+
+# pila dei cursori keyset: l'ultimo è l'inizio della pagina corrente
+cursors = st.session_state["roster_cursors"]
+rows = roster_page(
+    db,
+    team_season_id=roster_filter[0],
+    search=search,
+    after=cursors[-1],
+    limit=page_size + 1,
+)
+has_next = len(rows) > page_size
+rows = rows[:page_size]
 
 st.subheader("📋 Giocatori")
 
-# layout righe: Nome | Squadra | Stagione | Nat | DoB | Age | Macro | Micro | ✏️ | ❌
-for p in players:
-    cols = st.columns([2.6, 1.4, 1.2, 0.8, 1.3, 0.6, 0.8, 2.8, 0.5, 0.5])
-
-    with cols[0]:
-        display = f"{p.last_name} {p.first_name}".strip()
-        if p.full_name:
-            display = f"{display} · ({p.full_name})"
-        st.write(display)
-
-    with cols[1]:
-        # squadra = p.current_team_season.team.name
-        try:
-            st.write(p.current_team_season.team.name if p.current_team_season else "")
-        except Exception:
-            st.write("")
-
-    with cols[2]:
-        try:
-            st.write(p.current_team_season.season.name if p.current_team_season else "")
-        except Exception:
-            st.write("")
-
-    with cols[3]:
-        st.write(p.country.code if p.country else "")
-
-    with cols[4]:
-        st.write(p.birth_date.strftime("%d/%m/%Y") if p.birth_date else "")
-
-    with cols[5]:
-        st.write(p.age_years if p.age_years is not None else "")
-
-    with cols[6]:
-        st.write(p.macro_role or "")
-
-    with cols[7]:
-        st.write(", ".join(p.micro_roles or []))
+# una sola griglia (un widget) al posto di 10 colonne + 2 bottoni per riga
+grid = pd.DataFrame(
+    [
+        {
+            "id": r.id,
+            "Azione": ACTION_NONE,
+            "last_name": r.last_name,
+            "first_name": r.first_name,
+            "full_name": r.full_name,
+            "Squadra": r.team_name,
+            "Stagione": r.season_name,
+            "Nat": r.country_code,
+            "birth_date": r.birth_date,
+            "Età": r.age_years,
+            "jersey_number": r.jersey_number,
+            "macro_role": r.macro_role,
+            "micro_roles": list(r.micro_roles or []),
+        }
+        for r in rows
+    ],
+    columns=GRID_COLUMNS,
+).set_index("id")
+
+grid_key = f"roster_grid_{st.session_state['roster_grid_rev']}_{len(cursors)}_{hash(roster_filter)}"
+edited = st.data_editor(
+    grid,
+    key=grid_key,
+    hide_index=True,
+    width="stretch",
+    num_rows="fixed",
+    disabled=["Squadra", "Stagione", "Nat", "Età"],
+    column_config={
+        "Azione": st.column_config.SelectboxColumn("Azione", options=ACTIONS, required=True, width="small"),
+        "last_name": st.column_config.TextColumn("Cognome", required=True),
+        "first_name": st.column_config.TextColumn("Nome", required=True),
+        "full_name": st.column_config.TextColumn("Nome completo"),
+        "birth_date": st.column_config.DateColumn("Nascita", format="DD/MM/YYYY"),
+        "jersey_number": st.column_config.NumberColumn("Maglia", min_value=0, max_value=99, step=1),
+        "macro_role": st.column_config.SelectboxColumn("Macro", options=MACRO),
+        "micro_roles": st.column_config.MultiselectColumn("Micro", options=MICRO),
+    },
+)
 
-    with cols[8]:
-        st.button("✏️", key=f"edit_btn_{p.id}", on_click=start_edit, args=(p.id,))
+p1, p2, p3 = st.columns([1, 1, 4])
+with p1:
+    if st.button("⬅️ Precedenti", disabled=len(cursors) == 1) and len(cursors) > 1:
+        cursors.pop()
+        close_rerun_session(st.session_state)
+        st.rerun()
+with p2:
+    if st.button("Successivi ➡️", disabled=not has_next) and has_next:
+        last = rows[-1]
+        cursors.append((last.last_name, last.first_name, last.id))
+        close_rerun_session(st.session_state)
+        st.rerun()
+with p3:
+    st.caption(f"Pagina {len(cursors)} · {len(rows)} giocatori")
+
+# modifiche della griglia: edited_rows = {posizione riga: {colonna: nuovo valore}}
+grid_state = st.session_state.get(grid_key) or {}
+row_ids = grid.index.tolist()
+updates, delete_ids, edit_id = {}, [], None
+for pos, changes in grid_state.get("edited_rows", {}).items():
+    pid = row_ids[int(pos)]
+    action = changes.get("Azione", ACTION_NONE)
+    if action == ACTION_DELETE:
+        delete_ids.append(pid)
+    elif action == ACTION_EDIT and edit_id is None:
+        edit_id = pid
+    fields = {c: edited.at[pid, c] for c in changes if c != "Azione"}
+    if fields:
+        updates[pid] = {c: (None if _is_missing(v) else v) for c, v in fields.items()}
+
+if edit_id is not None:
+    # "Modifica" apre il giocatore nel form sotto e azzera la scelta nella griglia
+    start_edit(db, edit_id)
+    st.session_state["roster_grid_rev"] += 1
+    close_rerun_session(st.session_state)
+    st.rerun()
+
+if updates or delete_ids:
+    label = f"💾 Salva modifiche ({len(updates)} modificati, {len(delete_ids)} da eliminare)"
+    if st.button(label, type="primary"):
+        if delete_ids:
+            st.session_state["pending_roster_edits"] = (updates, delete_ids)
+        else:
+            save_roster_edits(updates, [])
+            close_rerun_session(st.session_state)
+            st.rerun()
 
-    with cols[9]:
-        if st.button("❌", key=f"del_btn_{p.id}"):
-            st.session_state["delete_player_id"] = p.id
-            st.session_state["delete_player_name"] = f"{p.last_name} {p.first_name}"
+if st.session_state["roster_error"]:
+    st.error(st.session_state["roster_error"])
 
 # --- popup conferma delete ---
-if st.session_state.get("delete_player_id") is not None:
-    pid = st.session_state["delete_player_id"]
-    pname = st.session_state.get("delete_player_name", "")
+if st.session_state.get("pending_roster_edits") is not None:
+    pending_updates, pending_deletes = st.session_state["pending_roster_edits"]
 
-    @st.dialog("Delete player")
+    @st.dialog("Delete players")
     def confirm_delete():
-        st.write(f"Are you sure to delete this player from DB?\n\n**{pname}** (ID={pid})")
+        st.write(
+            f"Are you sure to delete {len(pending_deletes)} player(s) from DB?\n\n"
+            f"ID: {', '.join(str(pid) for pid in pending_deletes)}"
+        )
         c1, c2 = st.columns(2)
         with c1:
-            if st.button("Yes, delete"):
-                obj = db.query(Player).get(pid)
-                if obj:
-                    db.delete(obj)
-                    db.commit()
-                st.session_state["delete_player_id"] = None
-                st.session_state["delete_player_name"] = None
-                if st.session_state.get("edit_player_id") == pid:
-                    st.session_state["edit_player_id"] = None
+            if st.button("Yes, save"):
+                save_roster_edits(pending_updates, pending_deletes)
+                st.session_state["pending_roster_edits"] = None
+                close_rerun_session(st.session_state)
                 st.rerun()
         with c2:
             if st.button("No"):
-                st.session_state["delete_player_id"] = None
-                st.session_state["delete_player_name"] = None
+                st.session_state["pending_roster_edits"] = None
+                close_rerun_session(st.session_state)
                 st.rerun()
 
     confirm_delete()
@@ -425,7 +502,7 @@ if st.session_state["edit_player_id"] is not None:
         "Premi 'Crea giocatore' per sovrascrivere (match su Nome+Cognome+Data **nella stessa squadra/stagione**)."
     )
 
-countries = db.query(Country).order_by(Country.name).all()
+countries = ref.countries
 
 c1, c2, c3, c4 = st.columns(4)
 with c1:
@@ -471,3 +548,6 @@ st.button(
     on_click=submit_player,
     args=(team_season_id,),
 )
+
+render_sql_panel(st.session_state)
+close_rerun_session(st.session_state)